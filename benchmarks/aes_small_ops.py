@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark: many small encrypt/decrypt calls on one unlocked crypt
+
+"per-call" rebuilds the cipher for every message from the hex key & iv
+(as every call did before crypts kept a `CtrCipher`), "cached" is the
+crypt's own encrypt/decrypt.
+
+Usage: python benchmarks/aes_small_ops.py [--calls N] [--size BYTES]
+"""
+
+# Built-in library packages
+import argparse
+import base64
+import time
+
+# Third party packages
+from Cryptodome.Cipher import AES
+from Cryptodome.Util import Counter
+
+# In-project modules
+from phibes.crypto import create_crypt, list_crypts
+
+
+def per_call_encrypt(key: str, iv: str, plaintext: str) -> str:
+    cipher = AES.new(
+        key=bytes.fromhex(key),
+        mode=AES.MODE_CTR,
+        counter=Counter.new(
+            AES.block_size * 8,
+            initial_value=int.from_bytes(bytes.fromhex(iv), "big")
+        )
+    )
+    return base64.urlsafe_b64encode(
+        cipher.encrypt(plaintext.encode('utf-8'))
+    ).decode('utf-8')
+
+
+def per_call_decrypt(key: str, iv: str, ciphertext: str) -> str:
+    cipher = AES.new(
+        key=bytes.fromhex(key),
+        mode=AES.MODE_CTR,
+        counter=Counter.new(
+            AES.block_size * 8,
+            initial_value=int.from_bytes(bytes.fromhex(iv), "big")
+        )
+    )
+    return cipher.decrypt(
+        base64.urlsafe_b64decode(ciphertext.encode('utf-8'))
+    ).decode('utf-8')
+
+
+def run(encrypt, decrypt, messages: list) -> float:
+    start = time.perf_counter()
+    for msg in messages:
+        assert decrypt(encrypt(msg)) == msg
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--calls', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=32)
+    args = parser.parse_args()
+    messages = [
+        f"{i:0{args.size}d}"[-args.size:] for i in range(args.calls // 2)
+    ]
+    print(f"{'crypt_id':<48}{'per-call s':>12}{'cached s':>12}{'speedup':>9}")
+    for crypt_id in list_crypts():
+        crypt = create_crypt("correct horse battery staple", crypt_id)
+        if not hasattr(crypt, 'cipher'):
+            continue
+        key, iv = crypt.key, crypt.iv
+        before = run(
+            lambda m: per_call_encrypt(key, iv, m),
+            lambda c: per_call_decrypt(key, iv, c),
+            messages
+        )
+        after = run(crypt.encrypt, crypt.decrypt, messages)
+        print(
+            f"{crypt_id:<48}{before:>12.2f}{after:>12.2f}"
+            f"{before / after:>8.1f}x"
+        )
+
+
+if __name__ == '__main__':
+    main()
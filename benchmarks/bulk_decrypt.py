@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Benchmark: decrypting every value of a locker-sized batch
+
+All values in a locker are encrypted with the same key & iv.
+"per-item" calls `aes_cipher.decrypt` for each value, "batch" is the
+crypt's `decrypt_many` (one keystream for the batch), with and without
+NumPy for the XOR.
+
+Usage: python benchmarks/bulk_decrypt.py [--items N] [--size BYTES]
+"""
+
+# Built-in library packages
+import argparse
+import time
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto import aes_cipher, create_crypt, default_id
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument(
+        '--size', type=int, nargs='+', default=[16, 256, 2048, 16384]
+    )
+    args = parser.parse_args()
+    crypt = create_crypt("correct horse battery staple", default_id)
+    numpy = aes_cipher.numpy
+    print(
+        f"{'items':>8}{'bytes':>8}{'per-item s':>12}"
+        f"{'batch s':>10}{'numpy s':>10}"
+    )
+    for size in args.size:
+        # keep the total size reasonable for big values
+        count = min(args.items, 2 ** 28 // size)
+        plaintexts = [f"{i:0{size}d}"[-size:] for i in range(count)]
+        ciphertexts = crypt.encrypt_many(plaintexts)
+        per_item = timed(
+            lambda: [
+                aes_cipher.decrypt(crypt.key, crypt.iv, val)
+                for val in ciphertexts
+            ]
+        )
+        aes_cipher.numpy = None
+        batch = timed(crypt.decrypt_many, ciphertexts)
+        aes_cipher.numpy = numpy
+        vectorized = (
+            f"{timed(crypt.decrypt_many, ciphertexts):>10.3f}"
+            if numpy is not None else f"{'n/a':>10}"
+        )
+        assert crypt.decrypt_many(ciphertexts) == plaintexts
+        print(
+            f"{count:>8}{size:>8}{per_item:>12.3f}{batch:>10.3f}{vectorized}"
+        )
+
+
+if __name__ == '__main__':
+    main()
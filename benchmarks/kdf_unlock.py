@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Benchmark: unlock latency and peak memory of each registered crypt
+
+Each crypt is measured in a fresh process, so the peak resident memory
+(growth over the freshly-imported interpreter) reflects that crypt's
+key derivation alone.
+
+Usage: python benchmarks/kdf_unlock.py [--runs N] [crypt_id ...]
+"""
+
+# Built-in library packages
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto import create_crypt, get_crypt, list_crypts
+
+
+def measure(crypt_id: str, runs: int) -> dict:
+    """
+    Runs in a child process: unlock `runs` times, report timing & memory
+    """
+    password = "correct horse battery staple"
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    crypt = create_crypt(password, crypt_id)
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        get_crypt(crypt_id, password, crypt.pw_hash, crypt.salt)
+        timings.append(time.perf_counter() - start)
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = (1024, 1)[sys.platform == 'darwin']
+    return {
+        'crypt_id': crypt_id,
+        'best_ms': min(timings) * 1000,
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'peak_growth_mib': (rss_after - rss_before) * scale / 2 ** 20
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('crypt_ids', nargs='*')
+    args = parser.parse_args()
+    crypt_ids = args.crypt_ids or list_crypts()
+    ctx = multiprocessing.get_context('spawn')
+    print(f"{'crypt_id':<48}{'best ms':>10}{'mean ms':>10}{'peak MiB':>10}")
+    for crypt_id in crypt_ids:
+        with ctx.Pool(1) as pool:
+            res = pool.apply(measure, (crypt_id, args.runs))
+        print(
+            f"{res['crypt_id']:<48}"
+            f"{res['best_ms']:>10.1f}"
+            f"{res['mean_ms']:>10.1f}"
+            f"{res['peak_growth_mib']:>10.1f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Benchmark: parse time and on-disk size of the phibes_file record layouts
+
+"text" is the v1 layout (encrypted text, a line each field),
+"binary" the v2 layout with the encrypted bytes stored as-is.
+"binary+zlib" is the v2 layout asked to compress an unencrypted body
+(the FLAG_COMPRESSED case); ciphertext doesn't compress, so for it
+`compress` stores the body as-is, the same as "binary".
+
+Usage: python benchmarks/record_format.py [--items N] [--size BYTES]
+"""
+
+# Built-in library packages
+import argparse
+from pathlib import Path
+import tempfile
+import time
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto import create_crypt, default_id
+from phibes.lib import phibes_file
+
+
+def write_all(dir_path: Path, bodies: list, compress: bool = False) -> int:
+    """
+    Write a record file per body, return the total size of the files
+    """
+    total = 0
+    for num, body in enumerate(bodies):
+        pth = dir_path / f"{num}.cry"
+        kwargs = {'compress': True} if compress else {}
+        phibes_file.write(
+            pth,
+            salt="00b8881d6a5720bdb62e9acfb4a0f2bb",
+            crypt_id=default_id,
+            timestamp="2020-11-25 11:45:52.873940",
+            body=body,
+            **kwargs
+        )
+        total += pth.stat().st_size
+    return total
+
+
+def parse_all(dir_path: Path) -> float:
+    start = time.perf_counter()
+    for pth in dir_path.iterdir():
+        phibes_file.read(pth)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument(
+        '--size', type=int, nargs='+', default=[64, 1024, 16384, 262144]
+    )
+    args = parser.parse_args()
+    crypt = create_crypt("correct horse battery staple", default_id)
+    print(
+        f"{'items':>7}{'bytes':>8}{'layout':>13}"
+        f"{'disk KiB':>11}{'parse s':>10}"
+    )
+    for size in args.size:
+        # keep the total size reasonable for big values
+        count = min(args.items, 2 ** 28 // size)
+        plaintexts = [
+            (f"line {i} of a note\n" * size)[:size] for i in range(count)
+        ]
+        layouts = [
+            ("text", crypt.encrypt_many(plaintexts), False),
+            (
+                "binary",
+                [crypt.encrypt_bytes(val.encode()) for val in plaintexts],
+                False
+            ),
+            ("binary+zlib", [val.encode() for val in plaintexts], True),
+        ]
+        for name, bodies, compress in layouts:
+            with tempfile.TemporaryDirectory() as tmp:
+                disk = write_all(Path(tmp), bodies, compress)
+                parse = parse_all(Path(tmp))
+            print(
+                f"{count:>7}{size:>8}{name:>13}"
+                f"{disk / 1024:>11.1f}{parse:>10.3f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -8,10 +8,13 @@ import enum
 
 # in-project modules
 from phibes.cli import handlers
+from phibes.cli.options import agent_socket_option
+from phibes.cli.options import agent_ttl_option
 from phibes.cli.options import cli_config_file_option
 from phibes.cli.options import config_option
 from phibes.cli.options import editor_option
 from phibes.cli.options import env_options
+from phibes.cli.options import hash_alg_option
 from phibes.cli.options import crypt_option
 from phibes.cli.options import item_name_option
 from phibes.cli.options import locker_name_option
@@ -19,6 +22,7 @@ from phibes.cli.options import locker_path_option
 from phibes.cli.options import new_password_option
 from phibes.cli.options import password_option
 from phibes.cli.options import store_path_option
+from phibes.cli.options import target_ms_option
 from phibes.cli.options import template_name_option
 from phibes.cli.options import verbose_item_option
 
@@ -27,6 +31,8 @@ class Target(enum.Enum):
     Locker = 'Locker'
     Item = 'Item'
     Config = 'Config'
+    Agent = 'Agent'
+    Crypt = 'Crypt'
 
 
 class Action(enum.Enum):
@@ -49,6 +55,14 @@ ANON_COMMAND_DICT = {
         Action.Update: {'name': 'edit', 'func': handlers.edit_item},
         Action.List: {'name': 'list', 'func': handlers.get_items},
         Action.Delete: {'name': 'remove', 'func': handlers.delete_item}
+    },
+    Target.Agent: {
+        Action.Create: {'name': 'agent', 'func': handlers.start_agent},
+        Action.Get: {'name': 'agent-status', 'func': handlers.get_agent},
+        Action.Delete: {'name': 'agent-stop', 'func': handlers.stop_agent}
+    },
+    Target.Crypt: {
+        Action.Create: {'name': 'calibrate', 'func': handlers.calibrate_crypt}
     }
 }
 
@@ -76,6 +90,14 @@ NAMED_COMMAND_DICT = {
         Action.Update: {
             'name': 'update-config', 'func': handlers.update_cli_config
         }
+    },
+    Target.Agent: {
+        Action.Create: {'name': 'agent', 'func': handlers.start_agent},
+        Action.Get: {'name': 'agent-status', 'func': handlers.get_agent},
+        Action.Delete: {'name': 'agent-stop', 'func': handlers.stop_agent}
+    },
+    Target.Crypt: {
+        Action.Create: {'name': 'calibrate', 'func': handlers.calibrate_crypt}
     }
 }
 
@@ -123,6 +145,15 @@ class PhibesClickCmd(object):
                         'store_path': store_path_option,
                         'editor': editor_option
                     }
+                elif self.target == Target.Agent:
+                    cmd_opts = {'socket': agent_socket_option}
+                    if self.action == Action.Create:
+                        cmd_opts['ttl'] = agent_ttl_option
+                elif self.target == Target.Crypt:
+                    cmd_opts = {
+                        'target_ms': target_ms_option,
+                        'hash_alg': hash_alg_option
+                    }
                 else:
                     cmd_opts = {'password': password_option}
                     if self.named_locker:
@@ -11,9 +11,12 @@ import click
 from phibes.cli.cli_config import CliConfig, write_config_file
 from phibes.cli.errors import PhibesCliError, PhibesCliExistsError
 from phibes.cli.errors import PhibesCliNotFoundError
+from phibes.cli.lib import LockerContext
 from phibes.cli.lib import present_item, present_list_items
 from phibes.cli.lib import user_edit_local_item
 from phibes.cli.options import crypt_choices
+from phibes.crypto import calibrate
+from phibes.crypto.hash_pbkdf2 import HashAlg
 from phibes.lib.config import ConfigModel, load_config_file
 from phibes.lib.errors import PhibesExistsError, PhibesNotFoundError
 from phibes.storage.types import StoreType
@@ -74,10 +77,9 @@ def create_locker(password: str, crypt_id: int, locker: str = None, **kwargs):
 def get_locker(password: str, locker: str = None, **kwargs):
     """Get a Locker"""
     store_info = set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
-        inst = views.get_locker(
-            password=password, locker_name=locker, **kwargs
-        )
+        inst = views.get_locker(**ctx.view_args(), **kwargs)
     except PhibesNotFoundError as err:
         raise PhibesCliNotFoundError(err)
     if hasattr(inst, 'path'):
@@ -87,16 +89,16 @@ def get_locker(password: str, locker: str = None, **kwargs):
     click.echo(f"{store_info}")
     click.echo(f"Was created {inst['timestamp']}")
     click.echo(f"Crypt ID {inst['crypt_id']}")
+    click.echo(f"Items {inst['item_count']}")
     return inst
 
 
 def delete_locker(password: str, locker: str = None, **kwargs):
     """Delete a Locker"""
     store_info = set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
-        inst = views.get_locker(
-            password=password, locker_name=locker, **kwargs
-        )
+        inst = views.get_locker(**ctx.view_args(), **kwargs)
     except PhibesNotFoundError as err:
         raise PhibesCliNotFoundError(err)
     click.confirm(
@@ -108,9 +110,7 @@ def delete_locker(password: str, locker: str = None, **kwargs):
         ), abort=True
     )
     try:
-        resp = views.delete_locker(
-            password=password, locker_name=locker, **kwargs
-        )
+        resp = views.delete_locker(**ctx.view_args(), **kwargs)
     except Exception as err:
         raise PhibesCliError(f"something went wrong {err=}")
     click.echo(resp)
@@ -140,12 +140,10 @@ def create_item(
     store_info = set_store_config(**kwargs)
     if template == 'Empty':
         template = None
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
         item_inst = views.get_item(
-            password=password,
-            locker_name=locker,
-            item_name=item,
-            **kwargs
+            item_name=item, **ctx.view_args(), **kwargs
         )
         if item_inst:
             raise PhibesCliExistsError(
@@ -158,10 +156,7 @@ def create_item(
     if template:
         try:
             found = views.get_item(
-                password=password,
-                locker_name=locker,
-                item_name=template,
-                **kwargs
+                item_name=template, **ctx.view_args(), **kwargs
             )
             content = found['body']
         except PhibesNotFoundError:
@@ -178,11 +173,7 @@ def create_item(
     if not template_is_file:
         content = user_edit_local_item(item_name=item, initial_content=content)
     return views.create_item(
-        password=password,
-        locker_name=locker,
-        item_name=item,
-        content=content,
-        **kwargs
+        item_name=item, content=content, **ctx.view_args(), **kwargs
     )
 
 
@@ -192,9 +183,10 @@ def edit_item(password: str, item: str, locker: str = None, **kwargs):
     # constructor should set the relevant environment variable
     CliConfig(**kwargs)
     set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
         item_inst = views.get_item(
-            password=password, locker_name=locker, item_name=item, **kwargs
+            item_name=item, **ctx.view_args(), **kwargs
         )
         if not item_inst:
             raise PhibesNotFoundError
@@ -206,20 +198,17 @@ def edit_item(password: str, item: str, locker: str = None, **kwargs):
         item_name=item, initial_content=item_inst['body']
     )
     return views.update_item(
-        password=password,
-        locker_name=locker,
-        item_name=item,
-        content=content,
-        **kwargs
+        item_name=item, content=content, **ctx.view_args(), **kwargs
     )
 
 
 def get_item(password: str, item: str, locker: str = None, **kwargs):
     """Get and display an Item from a Locker"""
     store_info = set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
         item_inst = views.get_item(
-            password=password, locker_name=locker, item_name=item, **kwargs
+            item_name=item, **ctx.view_args(), **kwargs
         )
     except KeyError as err:
         raise PhibesCliError(err)
@@ -234,19 +223,22 @@ def get_item(password: str, item: str, locker: str = None, **kwargs):
 def get_items(password: str, locker: str = None, **kwargs):
     """Get and display all Items in a Locker"""
     set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
+    verbose = kwargs.pop('verbose', True)
     try:
-        items = views.get_items(
-            password=password,
-            locker_name=locker,
-            **kwargs
-        )
+        if verbose:
+            items = views.get_items(**ctx.view_args(), **kwargs)
+        else:
+            # names alone, without reading the items
+            items = [
+                {'name': name}
+                for name in views.get_item_names(**ctx.view_args(), **kwargs)
+            ]
     except KeyError as err:
         raise PhibesCliError(err)
     except PhibesNotFoundError as err:
         raise PhibesCliNotFoundError(err)
-    report = present_list_items(
-        items=items, verbose=kwargs.pop('verbose', True)
-    )
+    report = present_list_items(items=items, verbose=verbose)
     click.echo(f"{report}")
     return items
 
@@ -254,9 +246,10 @@ def get_items(password: str, locker: str = None, **kwargs):
 def delete_item(password: str, item: str, locker: str = None, **kwargs):
     """Delete an Item from a Locker"""
     set_store_config(**kwargs)
+    ctx = LockerContext(password=password, locker_name=locker)
     try:
         resp = views.delete_item(
-            password=password, locker_name=locker, item_name=item, **kwargs
+            item_name=item, **ctx.view_args(), **kwargs
         )
     except KeyError as err:
         raise PhibesCliError(err)
@@ -304,3 +297,72 @@ def update_cli_config(**kwargs):
     Provide values to update an existing Phibes CLI config file
     """
     edit_cli_config(create=False, **kwargs)
+
+
+def _agent():
+    """
+    The agent module, imported when it's used; where it's not available,
+    saying so
+    """
+    from phibes.lib import agent
+    if not agent.AVAILABLE:
+        raise PhibesCliError("the unlock agent is not available here")
+    return agent
+
+
+def start_agent(socket: Path, ttl: int, **kwargs):
+    """
+    Run an unlock agent in the foreground
+    """
+    agent = _agent()
+    try:
+        server = agent.AgentServer(socket_path=socket, ttl=ttl)
+    except PhibesExistsError as err:
+        raise PhibesCliExistsError(err)
+    except OSError as err:
+        raise PhibesCliError(f"could not start agent {err=}")
+    env_var = agent.AGENT_SOCK_ENV
+    click.echo(f"{env_var}={socket}; export {env_var};")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def get_agent(socket: Path, **kwargs):
+    """
+    Report on a running unlock agent
+    """
+    resp = _agent().request({'op': 'status'}, socket_path=socket)
+    if not resp:
+        raise PhibesCliNotFoundError(f"no agent reachable at {socket}")
+    click.echo(f"Agent at {socket}")
+    click.echo(f"Holding {resp['entries']} unlocked locker(s)")
+    click.echo(f"Idle TTL {resp['ttl']} seconds")
+    return resp
+
+
+def stop_agent(socket: Path, **kwargs):
+    """
+    Stop a running unlock agent, it forgets all unlocked lockers
+    """
+    resp = _agent().request({'op': 'stop'}, socket_path=socket)
+    if not resp:
+        raise PhibesCliNotFoundError(f"no agent reachable at {socket}")
+    click.echo("agent stopped")
+
+
+def calibrate_crypt(target_ms: int, hash_alg: str, **kwargs):
+    """
+    Tune key derivation on this host to take about target-ms per unlock,
+    and make the tuned crypt the default for new lockers
+    """
+    hash_alg = HashAlg(hash_alg)
+    key_rounds = calibrate.calibrate_rounds(hash_alg, target_ms)
+    crypt_id = calibrate.save_calibration(hash_alg, key_rounds, target_ms)
+    click.echo(
+        f"{key_rounds} PBKDF2-{hash_alg.value} rounds for {target_ms}ms"
+    )
+    click.echo(f"{crypt_id} is now the default crypt")
+    click.echo(f"saved to {calibrate.calibration_path()}")
+    return crypt_id
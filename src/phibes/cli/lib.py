@@ -12,6 +12,7 @@ import click
 # in-project modules
 from phibes.cli.cli_config import CliConfig
 from phibes.cli.errors import PhibesCliError
+from phibes.lib import views
 
 CONTEXT_SETTINGS = dict(
     help_option_names=['-h', '--help'],
@@ -31,6 +32,43 @@ class NaturalOrderGroup(click.Group):
         return self.commands.keys()
 
 
+class LockerContext(object):
+    """
+    Per-invocation context for a command that operates on a locker
+
+    The locker is unlocked (i.e. key derivation runs) at most once,
+    on first use, and that unlocked locker is passed to every view call
+    made while handling the command.
+    """
+
+    def __init__(self, password: str, locker_name: str = None):
+        self.password = password
+        self.locker_name = locker_name
+        self._session = None
+
+    @property
+    def session(self) -> views.LockerSession:
+        if self._session is None:
+            self._session = views.LockerSession(
+                password=self.password, locker_name=self.locker_name
+            )
+        return self._session
+
+    @property
+    def locker_inst(self):
+        return self.session.locker
+
+    def view_args(self) -> dict:
+        """
+        Keyword args identifying the (unlocked) locker to a view function
+        """
+        return {
+            'password': self.password,
+            'locker_name': self.locker_name,
+            'locker_inst': self.locker_inst
+        }
+
+
 def catch_phibes_cli(func):
     """
     decorator for command-line function error handling
@@ -12,7 +12,10 @@ import click
 # in-project modules
 from phibes.cli.cli_config import CLI_CONFIG_FILE_NAME, get_home_dir
 from phibes.cli.cli_config import DEFAULT_EDITOR
-from phibes.crypto import default_id, list_crypts
+from phibes.crypto import get_default_id, list_crypts
+from phibes.crypto.calibrate import CALIBRATED_CLASSES, DEFAULT_TARGET_MS
+from phibes.crypto.hash_pbkdf2 import HashAlg
+from phibes.lib.agent import DEFAULT_TTL, default_socket_path
 from phibes.lib.config import DEFAULT_STORE_PATH
 
 
@@ -108,10 +111,12 @@ def validate_item_name(
     return value
 
 
+# the default first, so crypts calibrated on this host are among the choices
+default_crypt_id = get_default_id()
 crypt_choices = MappedChoices(
     prompt='Crypt ID (accept default)\n',
     choices=list_crypts(),
-    default_val=default_id,
+    default_val=default_crypt_id,
     help="Encryption type, usually best to accept default"
 )
 crypt_option = crypt_choices.get_click_option("--crypt_id")
@@ -207,6 +212,34 @@ config_option = click.option(
     show_envvar=True,
     envvar="PHIBES_CONFIG",
 )
+agent_socket_option = click.option(
+    '--socket',
+    default=default_socket_path(),
+    type=pathlib.Path,
+    help="Path of the agent's Unix socket",
+    show_envvar=True,
+    envvar="PHIBES_AGENT_SOCK",
+)
+agent_ttl_option = click.option(
+    '--ttl',
+    default=DEFAULT_TTL,
+    type=int,
+    help="Seconds an unused unlocked locker is held by the agent"
+)
+target_ms_option = click.option(
+    '--target_ms',
+    '--target-ms',
+    default=DEFAULT_TARGET_MS,
+    type=click.IntRange(min=1),
+    help="Target unlock time in milliseconds for the calibrated crypt"
+)
+hash_alg_option = click.option(
+    '--hash_alg',
+    '--hash-alg',
+    default=HashAlg.SHA512.value,
+    type=click.Choice([alg.value for alg in CALIBRATED_CLASSES]),
+    help="Hash algorithm for PBKDF2 key derivation"
+)
 
 env_vars = {
     'editor': 'PHIBES_EDITOR'
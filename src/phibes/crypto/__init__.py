@@ -1,15 +1,23 @@
 # Built-in library packages
+from functools import partial
+import threading
+import warnings
 
 # local project
+from phibes.crypto.factory import CryptFactory
 from phibes.crypto.factory import create_crypt, get_crypt, list_crypts
 from phibes.crypto.factory import register_crypt, register_default_crypt
+from phibes.crypto.factory import restore_crypt
 from phibes.crypto.crypt_aes_ctr_sha import Aes128CtrPbkdf2Sha256
 # from phibes.crypto.crypt_aes_ctr_sha import Aes128CtrPbkdf2Sha512
 # from phibes.crypto.crypt_aes_ctr_sha import Aes192CtrPbkdf2Sha256
 # from phibes.crypto.crypt_aes_ctr_sha import Aes192CtrPbkdf2Sha512
 from phibes.crypto.crypt_aes_ctr_sha import Aes256CtrPbkdf2Sha256
 from phibes.crypto.crypt_aes_ctr_sha import Aes256CtrPbkdf2Sha512
+from phibes.crypto.crypt_aes_ctr_sha import Aes256CtrPbkdf2Sha512Split
+from phibes.crypto.crypt_aes_ctr_scrypt import Aes256CtrScrypt
 from phibes.crypto.crypt_plain_plain import CryptPlainPlain
+from phibes.lib.errors import PhibesConfigurationError
 
 register_crypt(CryptPlainPlain)
 aes128_256 = register_crypt(
@@ -27,13 +35,45 @@ aes128_256 = register_crypt(
 aes256_256 = register_crypt(
     Aes256CtrPbkdf2Sha256, key_rounds=100100, fallback_id=aes128_256
 )
-aes256_512 = register_default_crypt(
+aes256_512 = register_crypt(
     Aes256CtrPbkdf2Sha512, key_rounds=100100, fallback_id=aes256_256,
 )
-default_id = aes256_512
+aes256_512_split = register_default_crypt(
+    Aes256CtrPbkdf2Sha512Split, key_rounds=100100, fallback_id=aes256_512,
+)
+aes256_scrypt = register_crypt(
+    Aes256CtrScrypt, n=2**14, r=8, p=1, fallback_id=aes256_512_split
+)
+default_id = aes256_512_split
+
+# Crypts calibrated on this host (see `phibes calibrate`) are registered
+# when they're used, and loaded as the default when it's asked for
+from phibes.crypto import calibrate  # noqa: E402
+CryptFactory().add_resolver(
+    partial(calibrate.register_calibrated, fallback_id=aes256_512_split)
+)
+_calibrations_loaded = False
+_calibrations_lock = threading.Lock()
+
+
+def get_default_id() -> str:
+    """
+    The crypt_id new lockers are created with: the one most recently
+    calibrated on this host, its calibrations loaded when this is first
+    called, otherwise `default_id`
+    """
+    global _calibrations_loaded
+    with _calibrations_lock:
+        if not _calibrations_loaded:
+            _calibrations_loaded = True
+            try:
+                calibrate.load_calibrations(fallback_id=aes256_512_split)
+            except PhibesConfigurationError as err:
+                warnings.warn(f"{err}, {default_id} is the default crypt")
+    return CryptFactory().get_default()
 
 
 __all__ = [
     "create_crypt", "get_crypt", "list_crypts", "register_crypt",
-    "register_default_crypt", "default_id"
+    "register_default_crypt", "restore_crypt", "default_id", "get_default_id"
 ]
@@ -4,10 +4,15 @@ AES CTR-mode encryption
 
 # Built-in library packages
 import base64
+from itertools import accumulate
+from typing import Iterable, List
 
 # Third party packages
 from Cryptodome.Cipher import AES
-from Cryptodome.Util import Counter
+try:
+    import numpy
+except ImportError:  # optional, see the `fast` extra
+    numpy = None
 
 # In-project modules
 
@@ -29,31 +34,148 @@ def get_cipher(key: str, iv: str):
     key_bytes = bytes.fromhex(key)
     if len(key_bytes) not in [16, 24, 32]:
         raise ValueError(f"key {key} length {len(key)} not valid")
-    iv_int = int.from_bytes(bytes.fromhex(iv), "big")
+    # The whole 128-bit block is the counter, starting at the iv
     return AES.new(
         key=key_bytes,
         mode=AES.MODE_CTR,
-        counter=Counter.new(AES.block_size * 8, initial_value=iv_int)
+        nonce=b'',
+        initial_value=bytes.fromhex(iv)
     )
 
 
-def encrypt(key: str, iv: str, plaintext: str) -> str:
+class CtrCipher(object):
     """
+    AES counter-mode for one key & iv, decoded & key-scheduled once
 
-    :param key:
-    :type key:
-    :param iv:
-    :type iv:
-    :param plaintext:
-    :type plaintext:
-    :return:
-    :rtype:
+    Cipher objects of pycryptodome's CTR mode are single-use streams,
+    so `get_cipher` pays for hex decoding and AES key expansion per message.
+    Here the expanded key is held in an ECB cipher (which is stateless),
+    and small messages are XORed with ECB-encrypted counter blocks:
+    the same keystream CTR mode produces.
     """
 
+    # Above this, a CTR cipher object is cheaper than the Python-side work
+    small_message_bytes = 4096
+
+    def __init__(self, key: str, iv: str):
+        self._key = key
+        self._iv = iv
+        self._key_bytes = bytes.fromhex(key)
+        if len(self._key_bytes) not in [16, 24, 32]:
+            raise ValueError(f"key {key} length {len(key)} not valid")
+        self._iv_bytes = bytes.fromhex(iv)
+        self._iv_int = int.from_bytes(self._iv_bytes, "big")
+        self._ecb = AES.new(key=self._key_bytes, mode=AES.MODE_ECB)
+
+    def matches(self, key: str, iv: str) -> bool:
+        return key == self._key and iv == self._iv
+
+    def keystream(self, length: int) -> bytes:
+        """
+        The first `length` bytes of this key & iv's CTR keystream
+        """
+        if length > self.small_message_bytes:
+            return self._new_ctr().encrypt(bytes(length))
+        block_count = -(-length // AES.block_size)
+        counter_blocks = b"".join(
+            ((self._iv_int + i) & 0xffffffffffffffffffffffffffffffff)
+            .to_bytes(AES.block_size, "big")
+            for i in range(block_count)
+        )
+        return self._ecb.encrypt(counter_blocks)[:length]
+
+    def apply(self, data: bytes) -> bytes:
+        """
+        Encrypt or decrypt (the same operation in CTR mode)
+        """
+        length = len(data)
+        if length > self.small_message_bytes:
+            return self._new_ctr().encrypt(data)
+        if not length:
+            return b""
+        return (
+            int.from_bytes(data, "big")
+            ^ int.from_bytes(self.keystream(length), "big")
+        ).to_bytes(length, "big")
+
+    def apply_many(self, values: List[bytes]) -> List[bytes]:
+        """
+        `apply` to each value; as every value starts at the same counter,
+        the keystream is generated once, for the longest value
+        """
+        if not values:
+            return []
+        stream = self.keystream(max(map(len, values)))
+        if numpy is not None:
+            return _xor_prefixes_numpy(values, stream)
+        from_bytes = int.from_bytes
+        ret_val = []
+        for data in values:
+            length = len(data)
+            if length > self.small_message_bytes:
+                # big ints are no match for the C-level CTR object here
+                ret_val.append(self.apply(data))
+                continue
+            ret_val.append(
+                (
+                    from_bytes(data, "big")
+                    ^ from_bytes(stream[:length], "big")
+                ).to_bytes(length, "big")
+            )
+        return ret_val
+
+    def ctr_at(self, offset: int = 0):
+        """
+        A CTR cipher object positioned `offset` bytes into the keystream;
+        successive `encrypt` calls on it continue the stream
+        """
+        block, skip = divmod(offset, AES.block_size)
+        counter = (self._iv_int + block) & 0xffffffffffffffffffffffffffffffff
+        cipher = AES.new(
+            key=self._key_bytes,
+            mode=AES.MODE_CTR,
+            nonce=b'',
+            initial_value=counter.to_bytes(AES.block_size, "big")
+        )
+        if skip:
+            cipher.encrypt(bytes(skip))
+        return cipher
+
+    def _new_ctr(self):
+        return AES.new(
+            key=self._key_bytes,
+            mode=AES.MODE_CTR,
+            nonce=b'',
+            initial_value=self._iv_bytes
+        )
+
+
+def _xor_prefixes_numpy(values: List[bytes], stream: bytes) -> List[bytes]:
+    """
+    XOR each value with the same-length prefix of `stream`, in one pass:
+    values & their keystream prefixes are laid end to end, XORed as
+    two flat arrays, and the result is sliced back into values
+    """
+    data = b"".join(values)
+    prefixes = b"".join([stream[:len(val)] for val in values])
+    out = (
+        numpy.frombuffer(data, dtype=numpy.uint8)
+        ^ numpy.frombuffer(prefixes, dtype=numpy.uint8)
+    ).tobytes()
+    ends = list(accumulate(map(len, values)))
+    return [
+        out[start:end] for start, end in zip([0] + ends[:-1], ends)
+    ]
+
+
+def encrypt_with(cipher: CtrCipher, plaintext: str) -> str:
+    """
+    Encrypt with a prepared cipher, see `encrypt`
+    """
     # convert from str to bytes
     plaintext_bytes = plaintext.encode('utf-8')
     # run the actual encryption - it gets bytes, returns bytes
-    cipherbytes = get_cipher(key, iv).encrypt(plaintext_bytes)
+    cipherbytes = cipher.apply(plaintext_bytes)
     # substitute for chars that aren't file-system safe
     # e.g. - instead of + and _ instead of /
     # bytes in, bytes returned
@@ -62,13 +184,57 @@ def encrypt(key: str, iv: str, plaintext: str) -> str:
     return fs_safe_cipherbytes.decode('utf-8')
 
 
-def decrypt(key: str, iv: str, ciphertext: str) -> str:
-    # reverse the steps in `encrypt`
+def decrypt_with(cipher: CtrCipher, ciphertext: str) -> str:
+    """
+    Decrypt with a prepared cipher, see `decrypt`
+    """
+    # reverse the steps in `encrypt_with`
     # convert from str to bytes
     fs_safe_cipherbytes = ciphertext.encode('utf-8')
     # char substitution back to + and /
     cipherbytes = base64.urlsafe_b64decode(fs_safe_cipherbytes)
     # run the actual decryption
-    plaintext_bytes = get_cipher(key, iv).decrypt(cipherbytes)
+    plaintext_bytes = cipher.apply(cipherbytes)
     # convert the bytes to utf-8 str
     return plaintext_bytes.decode('utf-8')
+
+
+def encrypt_many_with(
+        cipher: CtrCipher, plaintexts: Iterable[str]
+) -> List[str]:
+    """
+    Encrypt several values with a prepared cipher, see `encrypt`
+    """
+    encode = base64.urlsafe_b64encode
+    cipherbytes = cipher.apply_many(
+        [plaintext.encode('utf-8') for plaintext in plaintexts]
+    )
+    return [encode(val).decode('utf-8') for val in cipherbytes]
+
+
+def decrypt_many_with(
+        cipher: CtrCipher, ciphertexts: Iterable[str]
+) -> List[str]:
+    """
+    Decrypt several values with a prepared cipher, see `decrypt`
+    """
+    decode = base64.urlsafe_b64decode
+    plaintext_bytes = cipher.apply_many(
+        [decode(ciphertext.encode('utf-8')) for ciphertext in ciphertexts]
+    )
+    return [val.decode('utf-8') for val in plaintext_bytes]
+
+
+def encrypt(key: str, iv: str, plaintext: str) -> str:
+    """
+    Encrypt to a file-system safe str
+    :param key: encryption key, str repr of hex value
+    :param iv: counter initialization vector, str repr of hex value
+    :param plaintext: str to encrypt
+    :return: urlsafe base64 str of the cipher bytes
+    """
+    return encrypt_with(CtrCipher(key, iv), plaintext)
+
+
+def decrypt(key: str, iv: str, ciphertext: str) -> str:
+    return decrypt_with(CtrCipher(key, iv), ciphertext)
@@ -0,0 +1,199 @@
+"""
+Calibration of PBKDF2 work factor to the current host
+
+`key_rounds` for the built-in crypts is a constant, whatever the hardware.
+Calibration measures PBKDF2 on this host, picks the round count meeting a
+target unlock latency, and persists a crypt definition with that count.
+Persisted definitions are loaded when the default crypt is first asked for
+(see `phibes.crypto.get_default_id`), and the most recent one becomes the
+default crypt for new lockers.
+
+A calibrated crypt_id names its parameters (e.g.
+"Aes256CtrPbkdf2Sha512Splitkey_rounds200000"), so it's registered from
+them when it's first used, e.g. to unlock a locker created with it,
+whether or not the calibration file holds it.
+"""
+
+# Built-in library packages
+import json
+from os import environ
+from pathlib import Path
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto.crypt_aes_ctr_sha import Aes256CtrPbkdf2Sha256Split
+from phibes.crypto.crypt_aes_ctr_sha import Aes256CtrPbkdf2Sha512Split
+from phibes.crypto.factory import CryptFactory, register_crypt
+from phibes.crypto.hash_pbkdf2 import HashAlg, pbkdf2
+from phibes.lib.errors import PhibesConfigurationError
+
+
+CALIBRATION_ENV = 'PHIBES_CALIBRATION_FILE'
+CALIBRATION_FILE_NAME = '.phibes.crypts'
+# Calibration never goes below the built-in work factor
+MIN_KEY_ROUNDS = 100100
+DEFAULT_TARGET_MS = 250
+ROUNDS_GRANULARITY = 1000
+PROBE_ROUNDS = 20000
+CALIBRATED_CLASSES = {
+    HashAlg.SHA256: Aes256CtrPbkdf2Sha256Split,
+    HashAlg.SHA512: Aes256CtrPbkdf2Sha512Split,
+}
+CALIBRATED_ID = re.compile(
+    r"(?P<name>[A-Za-z0-9]+)key_rounds(?P<rounds>[0-9]+)"
+)
+
+# so a crypt asked for by two threads at once is registered once
+_registering = threading.Lock()
+
+
+def calibration_path() -> Path:
+    """
+    The calibration file from the environment, otherwise in user home
+    """
+    if environ.get(CALIBRATION_ENV):
+        return Path(environ[CALIBRATION_ENV])
+    return Path.home() / CALIBRATION_FILE_NAME
+
+
+def time_pbkdf2(hash_alg: HashAlg, rounds: int, repeat: int = 3) -> float:
+    """
+    Best-of-`repeat` seconds for one PBKDF2 run of `rounds`
+    """
+    dklen = CALIBRATED_CLASSES[hash_alg].derived_length()
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pbkdf2(hash_alg.value, "calibration", "00" * 16, rounds, dklen)
+        elapsed = time.perf_counter() - start
+        best = (best, elapsed)[best is None or elapsed < best]
+    return best
+
+
+def calibrate_rounds(hash_alg: HashAlg, target_ms: int) -> int:
+    """
+    Round count for which one PBKDF2 run takes about `target_ms` here
+    (the calibrated crypts need one run per unlock)
+    :param hash_alg: hash algorithm to calibrate
+    :param target_ms: target unlock latency in milliseconds
+    :return: round count, never less than MIN_KEY_ROUNDS
+    """
+    # PBKDF2 time is linear in rounds, so one probe gives the rate,
+    # and a second measurement at the estimate corrects for overhead
+    rounds = PROBE_ROUNDS
+    for _ in range(2):
+        per_round = time_pbkdf2(hash_alg, rounds) / rounds
+        rounds = max(int(target_ms / 1000 / per_round), PROBE_ROUNDS)
+    rounds = round(rounds / ROUNDS_GRANULARITY) * ROUNDS_GRANULARITY
+    return max(rounds, MIN_KEY_ROUNDS)
+
+
+def calibrated_crypt_id(hash_alg: HashAlg, key_rounds: int) -> str:
+    """
+    The crypt_id a calibrated definition is registered as
+    """
+    return f"{CALIBRATED_CLASSES[hash_alg].__name__}key_rounds{key_rounds}"
+
+
+def parse_crypt_id(crypt_id: str) -> Optional[Tuple[HashAlg, int]]:
+    """
+    The hash algorithm & round count a calibrated crypt_id names
+    :return: (hash_alg, key_rounds), or None if it's not calibrated
+        (or has fewer rounds than calibration allows)
+    """
+    match = CALIBRATED_ID.fullmatch(crypt_id)
+    if match is None or int(match['rounds']) < MIN_KEY_ROUNDS:
+        return None
+    for hash_alg, crypt_class in CALIBRATED_CLASSES.items():
+        if crypt_class.__name__ == match['name']:
+            return hash_alg, int(match['rounds'])
+    return None
+
+
+def register_calibrated(crypt_id: str, fallback_id: str = None) -> bool:
+    """
+    Register the calibrated crypt named by crypt_id, unless it already is
+    :param crypt_id: see `calibrated_crypt_id`
+    :param fallback_id: registered crypt to fall back on
+    :return: whether crypt_id names a calibrated crypt
+    """
+    parsed = parse_crypt_id(crypt_id)
+    if parsed is None:
+        return False
+    hash_alg, key_rounds = parsed
+    with _registering:
+        if crypt_id not in CryptFactory().list_wrappers():
+            register_crypt(
+                CALIBRATED_CLASSES[hash_alg],
+                fallback_id=fallback_id,
+                key_rounds=key_rounds
+            )
+    return True
+
+
+def read_calibrations(path: Path = None) -> list:
+    """
+    Return the persisted definitions, oldest first
+    """
+    path = (path, calibration_path())[path is None]
+    if not path.exists():
+        return []
+    try:
+        return list(json.loads(path.read_text())['crypts'])
+    except (OSError, ValueError, KeyError, TypeError) as err:
+        raise PhibesConfigurationError(f"invalid calibration {path} {err}")
+
+
+def save_calibration(
+        hash_alg: HashAlg, key_rounds: int, target_ms: int, path: Path = None
+) -> str:
+    """
+    Persist a calibrated definition, as the most recent one
+    :return: crypt_id of the definition
+    """
+    path = (path, calibration_path())[path is None]
+    crypts = [
+        rec for rec in read_calibrations(path)
+        if not (
+            rec['hash_alg'] == hash_alg.value
+            and rec['key_rounds'] == key_rounds
+        )
+    ]
+    crypts.append(
+        {
+            'hash_alg': hash_alg.value,
+            'key_rounds': key_rounds,
+            'target_ms': target_ms
+        }
+    )
+    path.write_text(json.dumps({'crypts': crypts}, indent=4))
+    return calibrated_crypt_id(hash_alg, key_rounds)
+
+
+def load_calibrations(
+        fallback_id: str, path: Path = None
+) -> Optional[str]:
+    """
+    Register every persisted definition, make the most recent the default
+    :param fallback_id: registered crypt to fall back on
+    :param path: optional calibration file, see `calibration_path`
+    :return: crypt_id of the new default, None if nothing was persisted
+    """
+    default_id = None
+    for rec in read_calibrations(path):
+        try:
+            default_id = calibrated_crypt_id(
+                HashAlg(rec['hash_alg']), rec['key_rounds']
+            )
+        except (ValueError, KeyError, TypeError) as err:
+            raise PhibesConfigurationError(f"invalid calibration {rec} {err}")
+        if not register_calibrated(default_id, fallback_id=fallback_id):
+            raise PhibesConfigurationError(f"invalid calibration {rec}")
+    if default_id:
+        CryptFactory().set_default(default_id)
+    return default_id
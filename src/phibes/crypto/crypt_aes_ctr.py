@@ -0,0 +1,116 @@
+"""
+Common encryption operations for crypts using AES CTR-mode encryption,
+whatever they use for key derivation
+"""
+
+# Built-in library packages
+import abc
+import secrets
+from typing import Callable, Iterable, List, Union
+
+# Third party packages
+from Cryptodome.Cipher import AES
+
+# In-project modules
+from phibes.crypto import aes_cipher
+from phibes.crypto.crypt_ifc import CryptIfc
+
+
+# TODO: revisit salt length. Only concern is if a chosen encryption
+# implementation and hash implementation don't have a compatible
+# length for salt.
+
+
+class AesCtr(CryptIfc):
+    """
+    Base crypt implementation for AES encryption with mode=Counter
+
+    crypt key + counter(iv=salt) are used to create a cipher
+    Child classes provide key derivation & password hashing.
+    """
+
+    # No need to vary this, so not an instance value
+    name_bytes = 4
+    salt_length_bytes = AES.block_size  # 16
+    supports_bytes = True
+
+    @property
+    @abc.abstractmethod
+    def key_length_bytes(self):
+        pass
+
+    @key_length_bytes.setter
+    @abc.abstractmethod
+    def key_length_bytes(self, new_val: int):
+        pass
+
+    @classmethod
+    def create_salt(cls):
+        return secrets.token_hex(cls.salt_length_bytes)
+
+    @property
+    def key(self):
+        """
+        key property accessor
+        :return:
+        """
+        return self._key
+
+    @key.setter
+    def key(self, new_key: str):
+        """
+        key property mutator
+        :param new_key:
+        :return:
+        """
+        if len(bytes.fromhex(new_key)) != self.key_length_bytes:
+            raise ValueError(
+                f"key {new_key} is {len(bytes.fromhex(new_key))} bytes long\n"
+                f"{self.key_length_bytes} bytes required\n"
+            )
+        self._key = new_key
+
+    @property
+    def iv(self):
+        return self.salt
+
+    @property
+    def cipher(self) -> aes_cipher.CtrCipher:
+        """
+        Cipher for the current key & iv, kept for reuse across calls
+        """
+        cipher = getattr(self, '_cipher', None)
+        if cipher is None or not cipher.matches(self.key, self.iv):
+            cipher = self._cipher = aes_cipher.CtrCipher(self.key, self.iv)
+        return cipher
+
+    def encrypt(self, plaintext: str) -> str:
+        return aes_cipher.encrypt_with(self.cipher, plaintext)
+
+    def decrypt(self, ciphertext: str) -> str:
+        return aes_cipher.decrypt_with(self.cipher, ciphertext)
+
+    def encrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        return self.cipher.apply(data)
+
+    def decrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        return self.cipher.apply(data)
+
+    def bytes_stream(self, offset: int = 0) -> Callable[[bytes], bytes]:
+        # CTR is symmetric, the same transform both ways
+        return self.cipher.ctr_at(offset).encrypt
+
+    def decrypt_bytes_many(self, values: Iterable[bytes]) -> List[bytes]:
+        return self.cipher.apply_many(list(values))
+
+    def encrypt_many(self, plaintexts: Iterable[str]) -> List[str]:
+        return aes_cipher.encrypt_many_with(self.cipher, plaintexts)
+
+    def decrypt_many(self, ciphertexts: Iterable[str]) -> List[str]:
+        return aes_cipher.decrypt_many_with(self.cipher, ciphertexts)
+
+    def __str__(self):
+        return (
+            f"{self.crypt_id=} - {type(self.crypt_id)=}"
+            f"{self.salt=} - {type(self.salt)=}"
+        )
@@ -0,0 +1,72 @@
+"""
+Provides full encryption/hashing operations using
+AES CTR-mode encryption and memory-hard scrypt key derivation
+"""
+
+# Built-in library packages
+from typing import Optional
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto.crypt_aes_ctr import AesCtr
+from phibes.crypto.hash_scrypt import scrypt
+
+
+class AesCtrScrypt(AesCtr):
+    """
+    Crypt implementation for AES encryption with mode=Counter,
+    with scrypt key generation
+
+    The cost parameters `n`, `r` and `p` are passed as init kwargs,
+    so each registered combination has its own crypt_id.
+    Like AesCtrPbkdf2ShaSplit, one derivation produces both the crypt key
+    and the auth verifier.
+    """
+
+    def __init__(
+            self,
+            crypt_id: str,
+            password: str,
+            pw_hash: Optional[str] = None,
+            salt: Optional[str] = None,
+            **kwargs
+    ):
+        self.n = kwargs.get('n')
+        self.r = kwargs.get('r')
+        self.p = kwargs.get('p')
+        super(AesCtrScrypt, self).__init__(
+            crypt_id, password, pw_hash, salt, **kwargs
+        )
+        return
+
+    def create_key(self, password: str, salt: str):
+        derived = scrypt(
+            password,
+            salt,
+            self.n,
+            self.r,
+            self.p,
+            self.key_length_bytes + self.name_bytes
+        )
+        # hex str, two chars per byte
+        split_at = self.key_length_bytes * 2
+        self._verifier = derived[split_at:]
+        return derived[:split_at]
+
+    def hash_pw(self, password: str) -> str:
+        """
+        The verifier was derived along with the key by `create_key`
+        """
+        return self.encrypt(self._verifier)
+
+    def hash_name(self, name: str, salt: str) -> str:
+        return scrypt(name, salt, self.n, self.r, self.p, self.name_bytes)
+
+
+class Aes256CtrScrypt(AesCtrScrypt):
+    """
+    Crypt implementation for Counter-mode AES256 encryption
+    with key generation using scrypt
+    """
+    key_length_bytes = 32
@@ -5,24 +5,18 @@ AES256 CTR-mode encryption and PBKDF2 hashing using SHA
 
 # Built-in library packages
 import abc
-import secrets
+import hashlib
+import hmac
 from typing import Optional
 
 # Third party packages
-from Cryptodome.Cipher import AES
 
 # In-project modules
-from phibes.crypto import aes_cipher
-from phibes.crypto.crypt_ifc import CryptIfc
+from phibes.crypto.crypt_aes_ctr import AesCtr
 from phibes.crypto.hash_pbkdf2 import pbkdf2
 
 
-# TODO: revisit salt length. Only concern is if a chosen encryption
-# implementation and hash implementation don't have a compatible
-# length for salt.
-
-
-class AesCtrPbkdf2Sha(CryptIfc):
+class AesCtrPbkdf2Sha(AesCtr):
     """
     Crypt implementation for AES256 encryption with mode=Counter,
     with PBKDF2 key generation using SHA hashing
@@ -37,20 +31,6 @@ class AesCtrPbkdf2Sha(CryptIfc):
     For convenience, the same salt is used for each of these.
     """
 
-    # No need to vary this, so not an instance value
-    name_bytes = 4
-    salt_length_bytes = AES.block_size  # 16
-
-    @property
-    @abc.abstractmethod
-    def key_length_bytes(self):
-        pass
-
-    @key_length_bytes.setter
-    @abc.abstractmethod
-    def key_length_bytes(self, new_val: int):
-        pass
-
     @property
     @abc.abstractmethod
     def hash_alg(self):
@@ -61,36 +41,6 @@ class AesCtrPbkdf2Sha(CryptIfc):
     def hash_alg(self, new_val: int):
         pass
 
-    @classmethod
-    def create_salt(cls):
-        return secrets.token_hex(cls.salt_length_bytes)
-
-    @property
-    def key(self):
-        """
-        key property accessor
-        :return:
-        """
-        return self._key
-
-    @key.setter
-    def key(self, new_key: str):
-        """
-        key property mutator
-        :param new_key:
-        :return:
-        """
-        if len(bytes.fromhex(new_key)) != self.key_length_bytes:
-            raise ValueError(
-                f"key {new_key} is {len(bytes.fromhex(new_key))} bytes long\n"
-                f"{self.key_length_bytes} bytes required\n"
-            )
-        self._key = new_key
-
-    @property
-    def iv(self):
-        return self.salt
-
     def __init__(
             self,
             crypt_id: str,
@@ -106,12 +56,6 @@ class AesCtrPbkdf2Sha(CryptIfc):
         )
         return
 
-    def encrypt(self, plaintext: str) -> str:
-        return aes_cipher.encrypt(self.key, self.iv, plaintext)
-
-    def decrypt(self, ciphertext: str) -> str:
-        return aes_cipher.decrypt(self.key, self.iv, ciphertext)
-
     def create_key(self, password: str, salt: str):
         return pbkdf2(
             self.hash_alg,
@@ -130,11 +74,56 @@ class AesCtrPbkdf2Sha(CryptIfc):
             self.name_bytes
         )
 
-    def __str__(self):
-        return (
-            f"{self.crypt_id=} - {type(self.crypt_id)=}"
-            f"{self.salt=} - {type(self.salt)=}"
+
+class AesCtrPbkdf2ShaSplit(AesCtrPbkdf2Sha):
+    """
+    Crypt implementation like AesCtrPbkdf2Sha, but with a single PBKDF2 run
+
+    One derivation of `key_length_bytes + name_bytes` is split: the first
+    part is the crypt key, the rest is the auth verifier (encrypted and
+    saved as the pw_hash), so an unlock costs `key_rounds` once, not twice.
+    PBKDF2 runs the rounds again for each block (digest) of output, so
+    where the two don't fit in one, only the key is derived, and the
+    verifier is an HMAC of it.
+    """
+
+    # HMAC message of a verifier derived from the key
+    verifier_info = b"phibes verifier"
+
+    @classmethod
+    def derived_length(cls) -> int:
+        """
+        Bytes derived by PBKDF2 for an unlock, see the class docstring
+        """
+        digest_size = hashlib.new(cls.hash_alg.lower()).digest_size
+        if cls.key_length_bytes + cls.name_bytes <= digest_size:
+            return cls.key_length_bytes + cls.name_bytes
+        return cls.key_length_bytes
+
+    def create_key(self, password: str, salt: str):
+        derived = pbkdf2(
+            self.hash_alg,
+            password,
+            salt,
+            self.key_rounds,
+            self.derived_length()
         )
+        # hex str, two chars per byte
+        split_at = self.key_length_bytes * 2
+        if len(derived) > split_at:
+            self._verifier = derived[split_at:]
+        else:
+            self._verifier = hmac.new(
+                bytes.fromhex(derived), self.verifier_info,
+                self.hash_alg.lower()
+            ).hexdigest()[:self.name_bytes * 2]
+        return derived[:split_at]
+
+    def hash_pw(self, password: str) -> str:
+        """
+        The verifier was derived along with the key by `create_key`
+        """
+        return self.encrypt(self._verifier)
 
 
 class Aes128CtrPbkdf2Sha256(AesCtrPbkdf2Sha):
@@ -189,3 +178,21 @@ class Aes256CtrPbkdf2Sha512(AesCtrPbkdf2Sha):
     """
     key_length_bytes = 32
     hash_alg = 'SHA512'
+
+
+class Aes256CtrPbkdf2Sha256Split(AesCtrPbkdf2ShaSplit):
+    """
+    Crypt implementation for Counter-mode AES256 encryption
+    with key & verifier generation in one pass using SHA256
+    """
+    key_length_bytes = 32
+    hash_alg = 'SHA256'
+
+
+class Aes256CtrPbkdf2Sha512Split(AesCtrPbkdf2ShaSplit):
+    """
+    Crypt implementation for Counter-mode AES256 encryption
+    with key & verifier generation in one pass using SHA512
+    """
+    key_length_bytes = 32
+    hash_alg = 'SHA512'
@@ -3,7 +3,7 @@ Interface definition for crypt classes
 """
 # Built-in library packages
 import abc
-from typing import Optional
+from typing import Callable, Iterable, List, Optional, Union
 
 # Third party packages
 
@@ -19,6 +19,9 @@ class CryptIfc(abc.ABC):
     """
 
     salt_length_bytes = -1
+    # whether `encrypt_bytes`, `decrypt_bytes` & `bytes_stream` are
+    # implemented; if not, content is stored as encrypted text
+    supports_bytes = False
 
     @property
     def salt(self):
@@ -60,6 +63,8 @@ class CryptIfc(abc.ABC):
         :param pw_hash: Previously-stored hash, passed for existing items
         :param salt: Previously-stored salt, passed for existing items
         :param kwargs: additional parameters required by certain Crypt classes
+        `key` may be passed (with pw_hash & salt) to restore a crypt that
+        was previously unlocked, e.g. by the agent, skipping key derivation
         """
         if bool(pw_hash) ^ bool(salt):
             pref = f"{self.__class__.__name__}\n"
@@ -72,6 +77,10 @@ class CryptIfc(abc.ABC):
             )
         self.crypt_id = crypt_id
         self.salt = (self.create_salt(), salt)[bool(salt)]
+        if kwargs.get('key') and pw_hash:
+            self.key = kwargs['key']
+            self.pw_hash = pw_hash
+            return
         self.key = self.create_key(password, self.salt)
         self.pw_hash = self.hash_pw(password)
         if pw_hash and not (self.pw_hash == pw_hash):
@@ -116,6 +125,68 @@ class CryptIfc(abc.ABC):
         """
         pass
 
+    def encrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        """
+        Encrypts raw bytes, with no text encoding of the result
+        Implementations that can't store binary ciphertext don't override
+        this, or set `supports_bytes`
+        :param data: bytes-like to encrypt
+        :return: encrypted bytes
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} has no bytes encryption"
+        )
+
+    def decrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        """
+        Decrypts bytes from `encrypt_bytes`
+        :param data: encrypted bytes-like
+        :return: Original bytes
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} has no bytes decryption"
+        )
+
+    def bytes_stream(self, offset: int = 0) -> Callable[[bytes], bytes]:
+        """
+        A stream transform for `encrypt_bytes` ciphertext:
+        each call encrypts (or decrypts) the next chunk of one body.
+        Chunks may be of any size, and the result is the same as
+        `encrypt_bytes` (`decrypt_bytes`) of the whole.
+        :param offset: position in the body of the first chunk
+        :return: callable, chunk in, transformed chunk out
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} has no bytes streaming"
+        )
+
+    def decrypt_bytes_many(self, values: Iterable[bytes]) -> List[bytes]:
+        """
+        Decrypts each of the values, as `decrypt_bytes` would
+        Implementations override this where a batch can be done cheaper
+        :param values: encrypted bytes-likes
+        :return: Original bytes, in the same order
+        """
+        return [self.decrypt_bytes(val) for val in values]
+
+    def encrypt_many(self, plaintexts: Iterable[str]) -> List[str]:
+        """
+        Encrypts each of the plaintexts, as `encrypt` would
+        Implementations override this where a batch can be done cheaper
+        :param plaintexts: strs to encrypt
+        :return: encrypted values, in the same order
+        """
+        return [self.encrypt(plaintext) for plaintext in plaintexts]
+
+    def decrypt_many(self, ciphertexts: Iterable[str]) -> List[str]:
+        """
+        Decrypts each of the ciphertexts, as `decrypt` would
+        Implementations override this where a batch can be done cheaper
+        :param ciphertexts: encrypted values
+        :return: Original plaintexts, in the same order
+        """
+        return [self.decrypt(ciphertext) for ciphertext in ciphertexts]
+
     @abc.abstractmethod
     def hash_name(self, name: str, salt: str) -> str:
         pass
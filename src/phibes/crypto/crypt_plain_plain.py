@@ -6,7 +6,7 @@ Basically no-op for everything
 # Built-in library packages
 from __future__ import annotations
 import secrets
-from typing import Optional
+from typing import Callable, Iterable, List, Optional, Union
 
 # Third party packages
 
@@ -31,6 +31,7 @@ class CryptPlainPlain(CryptIfc):
     """
 
     salt_length_bytes = 4  # arbitrary choice
+    supports_bytes = True
 
     def __init__(
             self,
@@ -87,5 +88,47 @@ class CryptPlainPlain(CryptIfc):
         val = ciphertext.replace(chr(31), "\n")
         return f"{val[:-len(self.salt)]}"
 
+    def encrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        """
+        Encrypt raw bytes, a no-op
+        @param data: bytes to encrypt
+        @return: the same bytes
+        """
+        return bytes(data)
+
+    def decrypt_bytes(self, data: Union[bytes, memoryview]) -> bytes:
+        """
+        Decrypt raw bytes, a no-op
+        @param data: encrypted bytes
+        @return: the same bytes
+        """
+        return bytes(data)
+
+    def bytes_stream(self, offset: int = 0) -> Callable[[bytes], bytes]:
+        """
+        Stream transform for raw bytes, a no-op
+        @param offset: position in the body of the first chunk
+        @return: callable returning each chunk as-is
+        """
+        return bytes
+
+    def encrypt_many(self, plaintexts: Iterable[str]) -> List[str]:
+        """
+        Encrypt each of the plaintexts
+        @param plaintexts: Texts to encrypt
+        @return: encrypted strings
+        """
+        salt = self.salt
+        return [val.replace("\n", chr(31)) + salt for val in plaintexts]
+
+    def decrypt_many(self, ciphertexts: Iterable[str]) -> List[str]:
+        """
+        Decrypt each of the ciphertexts
+        @param ciphertexts: encrypted texts
+        @return: decrypted strings
+        """
+        salt_len = len(self.salt)
+        return [val[:-salt_len].replace(chr(31), "\n") for val in ciphertexts]
+
     def create_key(self, password: str, salt: str):
         return hash_str(password, salt, self.salt_length_bytes)
@@ -4,7 +4,7 @@ All available implementations are registered and accessible by name.
 """
 # Built-in library packages
 from __future__ import annotations
-from typing import Optional, Type
+from typing import Callable, Optional, Type
 
 # Third party packages
 
@@ -43,6 +43,7 @@ class CryptFactory(object, metaclass=SingletonMeta):
         self._objects = {}
         self._fallbacks = {}
         self._default_crypt_id = None
+        self._resolvers = []
         return
 
     def register_wrapper(
@@ -73,6 +74,43 @@ class CryptFactory(object, metaclass=SingletonMeta):
         if is_default:
             self._default_crypt_id = key
 
+    def set_default(self, key: str) -> None:
+        """
+        Make an already-registered crypt the default, replacing any other
+        :param key: unique identifier (crypt_id)
+        :return: None
+        """
+        if key not in self._objects:
+            raise ValueError(f"{key} is not registered")
+        self._default_crypt_id = key
+
+    def get_default(self) -> Optional[str]:
+        """
+        The crypt_id of the default crypt, if one is registered
+        """
+        return self._default_crypt_id
+
+    def add_resolver(self, resolver: Callable[[str], bool]) -> None:
+        """
+        Add a function to register crypts that aren't, when they're
+        first asked for (e.g. one whose parameters are in its crypt_id)
+        :param resolver: given a crypt_id, registers it if it can,
+            returning whether it did
+        :return: None
+        """
+        self._resolvers.append(resolver)
+
+    def _wrapper(self, crypt_id: str) -> Optional[CryptWrapper]:
+        """
+        The wrapper registered for crypt_id, if need be by a resolver
+        """
+        wrapper = self._objects.get(crypt_id)
+        if wrapper is None and crypt_id is not None:
+            for resolver in self._resolvers:
+                if resolver(crypt_id):
+                    return self._objects.get(crypt_id)
+        return wrapper
+
     def list_wrappers(self) -> list:
         """
         Convenience method to inspect the registered wrappers
@@ -105,7 +143,7 @@ class CryptFactory(object, metaclass=SingletonMeta):
         ret_ob = None
         while not ret_ob:
             try:
-                wrapper = self._objects.get(crypt_id)
+                wrapper = self._wrapper(crypt_id)
                 if not wrapper:
                     raise ValueError(crypt_id)
                 return wrapper(crypt_id, password, **kwargs)
@@ -138,11 +176,29 @@ class CryptFactory(object, metaclass=SingletonMeta):
         :kwargs:
         :return: Crypt
         """
-        wrapper = self._objects.get(crypt_id)
+        wrapper = self._wrapper(crypt_id)
         if not wrapper:
             raise ValueError(crypt_id)
         return wrapper(crypt_id, password, pw_hash, salt, **kwargs)
 
+    def restore(
+            self, crypt_id: str, key: str, pw_hash: str, salt: str
+    ) -> crypt_ifc.CryptIfc:
+        """
+        Returns the crypt initialized with an already-derived key
+        (i.e. one that was unlocked earlier and held by the agent).
+        No key derivation or password authentication is performed.
+        :crypt_id: Registered GUID of the crypt needed
+        :key: previously-derived encryption key
+        :pw_hash: restored authentication hash from the created locker
+        :salt: salt used to create auth hash (and encryption key)
+        :return: Crypt
+        """
+        wrapper = self._wrapper(crypt_id)
+        if not wrapper:
+            raise ValueError(crypt_id)
+        return wrapper(crypt_id, '', pw_hash, salt, key=key)
+
 
 class CryptWrapper(object):
     """
@@ -201,8 +257,11 @@ class CryptWrapper(object):
         :param kwargs: constructor params specific to the select implementation
         :return: instance of class that implements CryptIfc
         """
+        init_kwargs = dict(self.init_kwargs)
+        if kwargs.get('key'):
+            init_kwargs['key'] = kwargs['key']
         return self.crypt_class(
-            crypt_id, password, pw_hash, salt, **self.init_kwargs
+            crypt_id, password, pw_hash, salt, **init_kwargs
         )
 
 
@@ -261,6 +320,20 @@ def get_crypt(crypt_id, password, pw_hash, salt, **kwargs):
     return CryptFactory().get(crypt_id, password, pw_hash, salt)
 
 
+def restore_crypt(crypt_id, key, pw_hash, salt):
+    """
+    Returns an instance of the CryptIfc registered to the `crypt_id`
+    using a previously-derived key - no password authentication is performed,
+    so the caller is responsible for having authenticated the key holder
+    :param crypt_id: registered Crypt unique string
+    :param key: previously-derived encryption key
+    :param pw_hash: restored value from a Locker
+    :param salt: restored value from a Locker
+    :return:
+    """
+    return CryptFactory().restore(crypt_id, key, pw_hash, salt)
+
+
 def list_crypts() -> list:
     """
     Returns a list of the `crypt_id`s of all registered crypts
@@ -0,0 +1,52 @@
+"""
+Module to support scrypt-based (memory-hard) hashing
+"""
+
+# Built-in library packages
+import hashlib
+
+# Third party packages
+
+# In project
+
+
+def scrypt_memory(n: int, r: int, p: int) -> int:
+    """
+    Approximate bytes of memory scrypt needs for the cost parameters
+    @param n: CPU/memory cost, a power of 2
+    @param r: block size
+    @param p: parallelization
+    @return: bytes
+    """
+    return 128 * r * (n + p + 2)
+
+
+def scrypt(
+        seed: str,
+        salt: str,
+        n: int,
+        r: int,
+        p: int,
+        key_length: int = 64
+) -> str:
+    """
+
+    @param seed: The plaintext value to be hashed (e.g. a password)
+    @param salt: Crypto salt, as a hexadecimal string
+    @param n: CPU/memory cost, a power of 2
+    @param r: block size
+    @param p: parallelization
+    @param key_length: `dklen` is requested length of key (in bytes)
+    @return: the result of the hashing operation in hexadecimal string form
+    """
+    # OpenSSL refuses (by default) anything over 32 MiB unless told
+    maxmem = scrypt_memory(n, r, p) + 1024 * 1024
+    return hashlib.scrypt(
+        seed.encode('utf-8'),
+        salt=bytes.fromhex(salt),
+        n=n,
+        r=r,
+        p=p,
+        maxmem=maxmem,
+        dklen=key_length
+    ).hex()
@@ -0,0 +1,271 @@
+"""
+Unlock agent, in the spirit of ssh-agent
+
+Unlocking a locker requires key derivation, which is deliberately slow.
+The agent is a small server listening on a local Unix socket that holds
+the derived key material of lockers unlocked during its lifetime, so
+repeat operations (e.g. a series of CLI commands) skip key derivation.
+
+Clients find the agent through the `PHIBES_AGENT_SOCK` environment variable.
+If it isn't set, or the agent can't be reached, every client function here
+quietly does nothing, and lockers are unlocked the usual way.
+
+Entries are looked up by an HMAC of the locker's identifying values keyed
+with the password, so a wrong password simply misses the cache, and falls
+through to regular (failing) authentication.
+Entries expire after `ttl` seconds without use.
+
+Where there are no Unix sockets (Windows), there's no agent: it can't
+be started, and the client functions do nothing.
+"""
+
+# Built-in library packages
+from __future__ import annotations
+import getpass
+import hashlib
+import hmac
+import json
+from os import environ, umask
+from pathlib import Path
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from typing import Optional
+
+# Third party packages
+
+# In-project modules
+from phibes.crypto import restore_crypt
+from phibes.crypto.crypt_ifc import CryptIfc
+from phibes.lib.errors import PhibesConfigurationError
+from phibes.lib.errors import PhibesExistsError
+
+
+AGENT_SOCK_ENV = 'PHIBES_AGENT_SOCK'
+DEFAULT_TTL = 900
+CLIENT_TIMEOUT = 2.0
+# whether an agent can run here at all
+AVAILABLE = hasattr(socket, 'AF_UNIX')
+
+if AVAILABLE:
+    _ServerBase = socketserver.ThreadingUnixStreamServer
+else:  # never set up, see `AgentServer`
+    _ServerBase = socketserver.BaseServer
+
+
+def default_socket_path() -> Path:
+    """
+    The socket path from the environment, otherwise a per-user temp path
+    """
+    if environ.get(AGENT_SOCK_ENV):
+        return Path(environ[AGENT_SOCK_ENV])
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'user'
+    return Path(tempfile.gettempdir()) / f"phibes-agent-{user}.sock"
+
+
+class AgentRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles one client connection: one JSON request per line,
+    one JSON response per line
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request)
+            except (ValueError, KeyError) as err:
+                response = {'ok': False, 'error': f"{err}"}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+class AgentServer(_ServerBase):
+    """
+    Holds unlocked crypt records, keyed by lookup id, with an idle TTL
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, ttl: int = DEFAULT_TTL):
+        if not AVAILABLE:
+            raise PhibesConfigurationError(
+                "the agent needs Unix sockets, not available here"
+            )
+        self.socket_path = Path(socket_path)
+        if self.socket_path.exists():
+            raise PhibesExistsError(
+                f"{self.socket_path} exists, is an agent already running?"
+            )
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._stopping = False
+        # Only the owner may talk to the agent
+        old_mask = umask(0o177)
+        try:
+            super(AgentServer, self).__init__(
+                str(self.socket_path), AgentRequestHandler
+            )
+        finally:
+            umask(old_mask)
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v[0] < now]:
+                del self._entries[key]
+
+    def dispatch(self, request: dict) -> dict:
+        """
+        Perform the operation named in the request
+        :param request: dict with `op` and operation-specific keys
+        :return: response dict
+        """
+        self._expire()
+        op = request['op']
+        if op == 'get':
+            with self._lock:
+                entry = self._entries.get(request['id'])
+                if entry is None:
+                    return {'ok': False}
+                # idle TTL: every use extends the entry's life
+                self._entries[request['id']] = (
+                    time.monotonic() + self.ttl, entry[1]
+                )
+            return {'ok': True, 'crypt': entry[1]}
+        elif op == 'put':
+            with self._lock:
+                self._entries[request['id']] = (
+                    time.monotonic() + self.ttl, request['crypt']
+                )
+            return {'ok': True}
+        elif op == 'remove':
+            with self._lock:
+                self._entries.pop(request['id'], None)
+            return {'ok': True}
+        elif op == 'clear':
+            with self._lock:
+                self._entries.clear()
+            return {'ok': True}
+        elif op == 'status':
+            with self._lock:
+                count = len(self._entries)
+            return {'ok': True, 'entries': count, 'ttl': self.ttl}
+        elif op == 'stop':
+            self._stopping = True
+            return {'ok': True}
+        raise ValueError(f"unknown op {op}")
+
+    def service_actions(self):
+        """
+        Called by `serve_forever` on every poll loop
+        """
+        self._expire()
+        if self._stopping:
+            self._stopping = False
+            # `shutdown` blocks until the loop exits, so it can't be
+            # called from the loop's own thread
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def server_close(self):
+        super(AgentServer, self).server_close()
+        with self._lock:
+            self._entries.clear()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+
+def serve(socket_path: Path, ttl: int = DEFAULT_TTL) -> None:
+    """
+    Run an agent in the foreground until it is sent a `stop` request
+    :param socket_path: path of the Unix socket to listen on
+    :param ttl: idle seconds before an unlocked locker is forgotten
+    """
+    server = AgentServer(socket_path=socket_path, ttl=ttl)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def request(message: dict, socket_path: Path = None) -> Optional[dict]:
+    """
+    Send one request to the agent
+    :param message: request dict
+    :param socket_path: agent socket, defaults to the environment value
+    :return: response dict, or None if no agent is reachable
+    """
+    if not AVAILABLE:
+        return None
+    if socket_path is None:
+        if not environ.get(AGENT_SOCK_ENV):
+            return None
+        socket_path = Path(environ[AGENT_SOCK_ENV])
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as resp:
+                return json.loads(resp.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def lookup_id(password: str, crypt_id: str, salt: str, pw_hash: str) -> str:
+    """
+    Agent key for a locker & password combination
+    """
+    msg = f"{crypt_id}\n{salt}\n{pw_hash}".encode('utf-8')
+    return hmac.new(
+        password.encode('utf-8'), msg, hashlib.sha256
+    ).hexdigest()
+
+
+def get_cached_crypt(
+        password: str, crypt_id: str, salt: str, pw_hash: str, **kwargs
+) -> Optional[CryptIfc]:
+    """
+    Get an unlocked crypt from the agent
+    :return: restored crypt, or None if the agent doesn't have it
+    """
+    resp = request(
+        {'op': 'get', 'id': lookup_id(password, crypt_id, salt, pw_hash)}
+    )
+    if not resp or not resp.get('ok'):
+        return None
+    rec = resp['crypt']
+    return restore_crypt(
+        crypt_id=rec['crypt_id'],
+        key=rec['key'],
+        pw_hash=rec['pw_hash'],
+        salt=rec['salt']
+    )
+
+
+def cache_crypt(password: str, crypt: CryptIfc) -> None:
+    """
+    Give an unlocked crypt to the agent, if there is one
+    """
+    if not environ.get(AGENT_SOCK_ENV):
+        return
+    request(
+        {
+            'op': 'put',
+            'id': lookup_id(
+                password, crypt.crypt_id, crypt.salt, crypt.pw_hash
+            ),
+            'crypt': {
+                'crypt_id': crypt.crypt_id,
+                'key': crypt.key,
+                'pw_hash': crypt.pw_hash,
+                'salt': crypt.salt
+            }
+        }
+    )
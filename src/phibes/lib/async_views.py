@@ -0,0 +1,246 @@
+"""
+asyncio counterparts of the operation functions in `views`
+
+Each runs its view in a bounded executor of `async_storage`, so
+the slow unlock (key derivation) and the storage I/O it makes don't
+block the event loop: views that unlock a locker in that of key
+derivation (`run_kdf`), the others in that of I/O (`run_blocking`),
+so an unlock that takes a while holds up only the requests waiting on
+it, and unlocks don't hold up other requests' I/O.
+"""
+
+# core library modules
+from __future__ import annotations
+from typing import Awaitable, BinaryIO, Callable, Optional, Union
+
+# third party packages
+# in-project modules
+from phibes.lib import views
+from phibes.model import Locker
+from phibes.storage.async_storage import run_blocking, run_kdf
+
+
+async def open_locker(password: str, locker_name: str, **kwargs) -> Locker:
+    """
+    Unlock a locker, for use with the `locker_inst` param of other views
+    """
+    return await run_kdf(
+        views.open_locker, password=password, locker_name=locker_name
+    )
+
+
+def _runner(locker_inst: Optional[Locker]) -> Callable[..., Awaitable]:
+    """
+    Where a view runs: with the key derivations, if it unlocks the locker
+    """
+    return run_blocking if locker_inst is not None else run_kdf
+
+
+class AsyncLockerSession(object):
+    """
+    A locker unlocked once, for any number of item operations,
+    which are awaited (see `views.LockerSession`)
+
+    Made with `open`, which awaits the unlock; usable as an async
+    context manager.
+    """
+
+    def __init__(self, session: views.LockerSession):
+        self._session = session
+
+    @classmethod
+    async def open(
+            cls,
+            password: str = None,
+            locker_name: str = None,
+            locker_inst: Locker = None
+    ) -> AsyncLockerSession:
+        if locker_inst is None:
+            locker_inst = await open_locker(
+                password=password, locker_name=locker_name
+            )
+        return cls(views.LockerSession(locker_inst=locker_inst))
+
+    async def __aenter__(self) -> AsyncLockerSession:
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self._session.close()
+
+    @property
+    def locker(self) -> Locker:
+        return self._session.locker
+
+    async def get_locker(self) -> dict:
+        return await run_blocking(self._session.get_locker)
+
+    async def delete_locker(self):
+        return await run_blocking(self._session.delete_locker)
+
+    async def create_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> dict:
+        return await run_blocking(
+            self._session.create_item, item_name, content
+        )
+
+    async def update_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> dict:
+        return await run_blocking(
+            self._session.update_item, item_name, content
+        )
+
+    async def get_item(self, item_name: str) -> dict:
+        return await run_blocking(self._session.get_item, item_name)
+
+    async def get_item_info(self, item_name: str) -> dict:
+        return await run_blocking(self._session.get_item_info, item_name)
+
+    async def get_item_bytes(self, item_name: str) -> bytes:
+        return await run_blocking(self._session.get_item_bytes, item_name)
+
+    async def append_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> int:
+        return await run_blocking(
+            self._session.append_item, item_name, content
+        )
+
+    async def read_item_range(
+            self, item_name: str, offset: int, length: int
+    ) -> bytes:
+        return await run_blocking(
+            self._session.read_item_range, item_name, offset, length
+        )
+
+    async def create_item_from_stream(
+            self, item_name: str, src: BinaryIO
+    ) -> int:
+        return await run_blocking(
+            self._session.create_item_from_stream, item_name, src
+        )
+
+    async def update_item_from_stream(
+            self, item_name: str, src: BinaryIO
+    ) -> int:
+        return await run_blocking(
+            self._session.update_item_from_stream, item_name, src
+        )
+
+    async def read_item_to_stream(
+            self, item_name: str, dest: BinaryIO
+    ) -> int:
+        return await run_blocking(
+            self._session.read_item_to_stream, item_name, dest
+        )
+
+    async def list_items(self) -> list:
+        return await run_blocking(self._session.list_items)
+
+    async def list_item_names(self) -> list:
+        return await run_blocking(self._session.list_item_names)
+
+    async def delete_item(self, item_name: str):
+        return await run_blocking(self._session.delete_item, item_name)
+
+
+async def create_locker(
+        password: str,
+        crypt_id: str,
+        locker_name: str = None,
+        **kwargs
+):
+    return await run_kdf(
+        views.create_locker,
+        password=password,
+        crypt_id=crypt_id,
+        locker_name=locker_name
+    )
+
+
+async def get_locker(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    return await _runner(locker_inst)(
+        views.get_locker, password, locker_name, locker_inst
+    )
+
+
+async def delete_locker(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    return await _runner(locker_inst)(
+        views.delete_locker, password, locker_name, locker_inst
+    )
+
+
+async def create_item(
+        password: str,
+        locker_name: str,
+        item_name: str,
+        content: str,
+        locker_inst: Locker = None,
+        **kwargs
+):
+    return await _runner(locker_inst)(
+        views.create_item,
+        password, locker_name, item_name, content, locker_inst
+    )
+
+
+async def update_item(
+        password: str,
+        locker_name: str,
+        item_name: str,
+        content: str,
+        locker_inst: Locker = None,
+        **kwargs
+):
+    return await _runner(locker_inst)(
+        views.update_item,
+        password, locker_name, item_name, content, locker_inst
+    )
+
+
+async def get_item(
+        password: str,
+        locker_name: str,
+        item_name: str,
+        locker_inst: Locker = None,
+        **kwargs
+):
+    return await _runner(locker_inst)(
+        views.get_item, password, locker_name, item_name, locker_inst
+    )
+
+
+async def get_items(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    return await _runner(locker_inst)(
+        views.get_items, password, locker_name, locker_inst
+    )
+
+
+async def get_item_names(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    return await _runner(locker_inst)(
+        views.get_item_names, password, locker_name, locker_inst
+    )
+
+
+async def delete_item(
+        password: str,
+        locker_name: str,
+        item_name: str,
+        locker_inst: Locker = None,
+        **kwargs
+):
+    return await _runner(locker_inst)(
+        views.delete_item, password, locker_name, item_name, locker_inst
+    )
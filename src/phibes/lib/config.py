@@ -19,6 +19,13 @@ from phibes.storage.types import StoreType
 
 CONFIG_FILE_NAME = '.phibes.cfg'
 DEFAULT_STORE_PATH = '.phibes'
+# Store types kept in files under a `store_path`
+PATH_STORE_TYPES = (
+    StoreType.FileSystem.name,
+    StoreType.PackedFile.name,
+    StoreType.Sqlite.name,
+    StoreType.Dbm.name
+)
 count = 0
 none_recs = {}
 all_recs = {}
@@ -36,7 +43,7 @@ class ConfigModel(object):
         :return: protected _store attribute
         """
         ret_val = {'store_type': environ['PHIBES_STORE_TYPE']}
-        if ret_val['store_type'] == StoreType.FileSystem.name:
+        if ret_val['store_type'] in PATH_STORE_TYPES:
             ret_val['store_path'] = environ['PHIBES_FILE_STORE_PATH']
         return ret_val
 
@@ -45,9 +52,9 @@ class ConfigModel(object):
         # Have to flatten for environ
         if val is None:
             return
-        if val['store_type'] == StoreType.FileSystem.name:
+        if val['store_type'] in PATH_STORE_TYPES:
             self._validate_store_path(val['store_path'])
-            environ['PHIBES_STORE_TYPE'] = StoreType.FileSystem.name
+            environ['PHIBES_STORE_TYPE'] = val['store_type']
             environ['PHIBES_FILE_STORE_PATH'] = f"{val['store_path']}"
         else:
             environ['PHIBES_STORE_TYPE'] = val['store_type']
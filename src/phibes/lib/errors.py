@@ -49,6 +49,13 @@ class PhibesExistsError(PhibesError):
     pass
 
 
+class PhibesConflictError(PhibesError):
+    """
+    Custom error for a write based on an out-of-date version of something
+    """
+    pass
+
+
 class PhibesUnknownError(PhibesError):
     """
     Custom error for problem detected but not categorized
@@ -0,0 +1,148 @@
+"""
+Advisory locks on files (`fcntl.flock`), shared between processes,
+for storage kept in files
+
+A lock is held for a `with` block of `locked`: SHARED by readers,
+any number at once, or EXCLUSIVE by a writer, alone.
+Within a thread, a lock already held is taken again without waiting
+(an exclusive lock covers a shared one, but a thread holding a lock
+shared can't take it exclusive: that could deadlock with another
+thread doing the same).
+Where fcntl isn't available (Windows), nothing is locked.
+
+Time spent waiting for locks is counted, see `wait_stats`.
+"""
+
+# Built-in library packages
+from __future__ import annotations
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Iterator
+try:
+    import fcntl
+except ImportError:  # not on Windows: nothing is locked there
+    fcntl = None
+
+# Third party packages
+
+# In-project modules
+
+
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+
+
+class WaitStats(object):
+    """
+    Counts of locks taken, by mode: how many, how many had to wait
+    (were contended), and the total & longest waits, in seconds
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {
+                mode: {
+                    'acquired': 0,
+                    'contended': 0,
+                    'wait_seconds': 0.0,
+                    'max_wait_seconds': 0.0
+                }
+                for mode in (SHARED, EXCLUSIVE)
+            }
+
+    def add(self, mode: str, waited: float, contended: bool) -> None:
+        with self._lock:
+            stats = self._stats[mode]
+            stats['acquired'] += 1
+            stats['contended'] += contended
+            stats['wait_seconds'] += waited
+            stats['max_wait_seconds'] = max(
+                stats['max_wait_seconds'], waited
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {mode: dict(stats) for mode, stats in self._stats.items()}
+
+
+_wait_stats = WaitStats()
+# locks this thread holds: path -> [mode, times taken]
+_held = threading.local()
+
+
+def wait_stats() -> dict:
+    """
+    Lock wait metrics since the process started (or `reset_wait_stats`),
+    see `WaitStats`
+    """
+    return _wait_stats.snapshot()
+
+
+def reset_wait_stats() -> None:
+    _wait_stats.reset()
+
+
+@contextmanager
+def locked(
+        pth: Path, mode: str = SHARED, create: bool = True
+) -> Iterator[None]:
+    """
+    Hold a lock on the file at pth for the `with` block, waiting for it
+    as long as it takes
+    :param pth: lock file, its directory must exist
+    :param mode: SHARED or EXCLUSIVE
+    :param create: make the lock file if it doesn't exist; if not,
+        and it doesn't exist or can't be opened, nothing is locked
+    """
+    if mode not in (SHARED, EXCLUSIVE):
+        raise ValueError(f"invalid lock mode {mode}")
+    held = getattr(_held, 'locks', None)
+    if held is None:
+        held = _held.locks = {}
+    entry = held.get(pth)
+    if entry is not None:
+        if mode == EXCLUSIVE and entry[0] == SHARED:
+            raise RuntimeError(f"{pth} is locked shared, not exclusive")
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+        return
+    if fcntl is None:
+        yield
+        return
+    if create:
+        fd = os.open(pth, os.O_RDWR | os.O_CREAT, 0o600)
+    else:
+        try:
+            # read-only is enough to lock, & works in a read-only locker
+            fd = os.open(pth, os.O_RDONLY)
+        except OSError:
+            yield
+            return
+    try:
+        operation = (fcntl.LOCK_SH, fcntl.LOCK_EX)[mode == EXCLUSIVE]
+        start = time.perf_counter()
+        try:
+            fcntl.flock(fd, operation | fcntl.LOCK_NB)
+            contended = False
+        except BlockingIOError:
+            fcntl.flock(fd, operation)
+            contended = True
+        _wait_stats.add(mode, time.perf_counter() - start, contended)
+        held[pth] = [mode, 1]
+        try:
+            yield
+        finally:
+            del held[pth]
+    finally:
+        # closing releases the lock
+        os.close(fd)
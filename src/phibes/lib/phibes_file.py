@@ -10,66 +10,677 @@ Line 4: the user content
 This file interface is 'agnostic' about encryption,
 but for complete reference, the standard is that Lines 4 is
 encrypted.
+
+A body passed as bytes is written in the binary layout instead, which
+stores it as-is, with no text encoding:
+
+MAGIC, a version byte, a flags byte, then
+salt, crypt_id & timestamp, each a 2-byte length and utf-8 text,
+and the body, an 8-byte length and the raw bytes.
+All lengths are unsigned big-endian.
+Flags (FLAG_*) describe how the body is stored: with FLAG_COMPRESSED,
+it's zlib-compressed, and the length is the compressed length.
+With FLAG_VERSIONED, the record's version, an 8-byte count of the times
+it's been written, follows the flags byte.
+A reader rejects a record with flags it doesn't know.
+
+`read` tells the layouts apart by MAGIC (a text file never starts with NUL),
+and returns the body as str for text files, bytes for binary ones.
+`pack` & `unpack` convert records to & from bytes in the same layouts,
+for storage that keeps many records in one file.
+Compression is only used when asked for (`compress`), and where it makes
+the record smaller; encrypted bodies generally don't compress.
+A compressed body can't be read in ranges or appended to in place,
+so those functions treat its record as they do a text-layout one.
+Where only the fields before the body are wanted, `read` can skip it,
+and `read_lazy` leaves it to be read if and when it's used.
+
+`write` & `write_chunks` write a temporary file beside the target and
+move it into place with `os.replace`, so a reader (or a crash) sees the
+old record or the new one, never part of one. Whether & when written
+files are flushed to disk is the `FsyncPolicy` in effect:
+by default that's left to the OS.
+
+`append` adds to a binary record's body in place: the bytes appended,
+synced, then the fields before the body (their new version, timestamp
+& body length) in one write, so a reader (or a crash) sees the record
+with its old body length or its new one.
+
+They version the binary records they write: 1 for a new file, one more
+than the file's version when replacing it. A new file is linked into
+place, which fails if there's a file there by then, and a file being
+replaced (or appended to) is locked while it is, where fcntl is
+available; so given the version it's expected to have, a write is
+a compare-and-swap, and concurrent writers can't overwrite each other's
+records unknowingly. Text-layout records have no version (it's 0).
 """
 
 # Built-in library packages
 from __future__ import annotations
+from collections.abc import Mapping
+from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
+import io
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional
+from typing import Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: writes aren't locked there
+    fcntl = None
 
 # Third party packages
 
 # In-project modules
+from phibes.lib.errors import PhibesConflictError
+
+
+MAGIC = b"\x00PHIBES"
+BINARY_VERSION = 2
+FIELD_LEN = struct.Struct(">H")
+BODY_LEN = struct.Struct(">Q")
+VERSION = struct.Struct(">Q")
+CHUNK_BYTES = 2 ** 16
+RECORD_FIELDS = ('salt', 'crypt_id', 'timestamp', 'body')
+FLAG_COMPRESSED = 0x01
+FLAG_VERSIONED = 0x02
+KNOWN_FLAGS = FLAG_COMPRESSED | FLAG_VERSIONED
+# where FLAG_VERSIONED puts the version
+VERSION_AT = len(MAGIC) + 2
+# temporary files are "<dot><target name>.<random>.tmp", beside the target
+TEMP_SUFFIX = '.tmp'
+
+
+class FsyncPolicy(object):
+    """
+    When files written here (or by storage using `written`) are fsynced:
+    never (the default, `FsyncPolicy()`), after every write (`writes=1`),
+    or as a group commit, once `writes` files have been written since the
+    last sync, or `interval_ms` has passed since the first of them was.
+    The directories holding the synced files are synced after them,
+    so that their creation & replacement is durable too.
+
+    With a group commit, a file is replaced before it's synced,
+    so a crash (of the machine, not only of the process) can lose
+    the files written since the last sync, where a sync after every
+    write loses nothing it returned from.
+    The interval is checked as files are written, and `sync`
+    syncs what's pending at any time, e.g. at the end of a batch.
+    """
+
+    def __init__(self, writes: int = 0, interval_ms: Optional[float] = None):
+        self.writes = writes
+        self.interval_ms = interval_ms
+        # whether written files are synced at all
+        self.enabled = bool(writes) or interval_ms is not None
+        # paths written since the last sync: whether each needs its own
+        self._pending = {}
+        self._first_at = None
+        self._lock = threading.Lock()
+        # counts of fsync calls made, of files & of directories
+        self.file_syncs = 0
+        self.dir_syncs = 0
+
+    @property
+    def per_write(self) -> bool:
+        return self.writes == 1
+
+    def before_replace(self, tmp_file: BinaryIO) -> None:
+        """
+        Called with a written temporary file before it replaces its target
+        """
+        if self.per_write:
+            os.fsync(tmp_file.fileno())
+            self.file_syncs += 1
+
+    def written(self, pth: Path, synced: bool = False) -> None:
+        """
+        Record that the file at pth was written, syncing if that's due
+        :param pth: file written
+        :param synced: whether its content was already synced
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._pending[pth] = self._pending.get(pth, False) or not synced
+            if self._first_at is None:
+                self._first_at = time.monotonic()
+            due = (
+                bool(self.writes) and len(self._pending) >= self.writes
+            ) or (
+                self.interval_ms is not None and (
+                    time.monotonic() - self._first_at
+                ) * 1000 >= self.interval_ms
+            )
+        if due:
+            self.sync()
+
+    def sync(self) -> None:
+        """
+        fsync the files written since the last sync, then their directories
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._first_at = None
+        for pth, needs_sync in pending.items():
+            if needs_sync and _fsync_path(pth, os.O_RDONLY):
+                self.file_syncs += 1
+        for dir_path in dict.fromkeys(pth.parent for pth in pending):
+            if _fsync_path(dir_path, os.O_RDONLY | getattr(
+                    os, 'O_DIRECTORY', 0
+            )):
+                self.dir_syncs += 1
+
+
+def _fsync_path(pth: Path, flags: int) -> bool:
+    """
+    fsync the file or directory at pth
+    :return: whether it could be, it may have been removed since,
+        and some platforms can't open directories
+    """
+    try:
+        fd = os.open(pth, flags)
+    except (FileNotFoundError, PermissionError, IsADirectoryError):
+        return False
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return True
+
+
+_fsync_policy = FsyncPolicy()
+# a thread's `group_commit` policy, in place of `_fsync_policy` for it
+_group = threading.local()
+
+
+def get_fsync_policy() -> FsyncPolicy:
+    """
+    The policy for this thread's writes: its group commit's, if it's
+    in one, otherwise the process's
+    """
+    group = getattr(_group, 'policy', None)
+    return _fsync_policy if group is None else group
+
+
+def set_fsync_policy(policy: FsyncPolicy) -> FsyncPolicy:
+    """
+    Use `policy` for the writes that follow, after syncing what's pending
+    under the current one
+    :return: the policy it replaces
+    """
+    global _fsync_policy
+    previous = _fsync_policy
+    previous.sync()
+    _fsync_policy = policy
+    return previous
+
+
+def sync() -> None:
+    """
+    Sync what's pending under the current `FsyncPolicy`
+    """
+    get_fsync_policy().sync()
+
+
+@contextmanager
+def group_commit(
+        writes: int = 0, interval_ms: Optional[float] = None
+) -> Iterator[FsyncPolicy]:
+    """
+    Sync the files written in the `with` block as a group, once it ends
+    (and sooner, by `writes` or `interval_ms`, see `FsyncPolicy`),
+    rather than as the current policy would, e.g. for a bulk import.
+    If the current policy never syncs, nor does this; if it's a group
+    commit itself, the block's writes are left to it, then what's pending
+    under it is synced at the end; inside another `group_commit`,
+    the outer one applies.
+    Only this thread's writes are grouped, other threads' are synced
+    as they would be.
+    """
+    current = get_fsync_policy()
+    if not current.enabled or current is getattr(_group, 'policy', None):
+        yield current
+        return
+    if not current.per_write:
+        # as this thread's group, so a `group_commit` inside leaves it be
+        _group.policy = current
+        try:
+            yield current
+        finally:
+            _group.policy = None
+            current.sync()
+        return
+    group = FsyncPolicy(writes, interval_ms)
+    # synced at the end, if not before
+    group.enabled = True
+    _group.policy = group
+    try:
+        yield group
+    finally:
+        _group.policy = None
+        group.sync()
+
+
+def _link_exclusive(tmp_name: str, pth: Path) -> None:
+    """
+    Move the file at tmp_name to pth, raising FileExistsError if there's
+    a file there: by a hard link, or where there are none (e.g. FAT, some
+    network filesystems), by creating pth exclusively as a placeholder
+    and replacing that (so it's briefly empty)
+    """
+    try:
+        os.link(tmp_name, pth)
+    except FileExistsError:
+        raise
+    except OSError:
+        os.close(os.open(pth, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+        try:
+            os.replace(tmp_name, pth)
+        except BaseException:
+            os.unlink(pth)
+            raise
+        return
+    os.unlink(tmp_name)
+
+
+@contextmanager
+def _replacing(pth: Path, exclusive: bool = False) -> Iterator[BinaryIO]:
+    """
+    A temporary file, in the same directory, that replaces the file at pth
+    when the `with` block completes; if the block raises, it's removed,
+    and pth is left as it was
+    :param exclusive: whether to raise FileExistsError, rather than
+        replace, if there's a file at pth by then
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        dir=pth.parent, prefix=f".{pth.name}.", suffix=TEMP_SUFFIX
+    )
+    policy = get_fsync_policy()
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            yield tmp_file
+            tmp_file.flush()
+            policy.before_replace(tmp_file)
+        if exclusive:
+            _link_exclusive(tmp_name, pth)
+        else:
+            os.replace(tmp_name, pth)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+    policy.written(pth, synced=policy.per_write)
+
+
+@contextmanager
+def _locked(pth: Path, mode: str = 'rb') -> Iterator[Optional[BinaryIO]]:
+    """
+    The file at pth, open & exclusively locked against the other writers
+    here, or None if there's no file; as they replace the file rather
+    than change it, it's checked to still be the one at pth once locked
+    """
+    while True:
+        try:
+            cf = pth.open(mode)
+        except FileNotFoundError:
+            yield None
+            return
+        with cf:
+            if fcntl is not None:
+                fcntl.flock(cf.fileno(), fcntl.LOCK_EX)
+                try:
+                    stat = os.stat(pth)
+                except FileNotFoundError:
+                    continue
+                opened = os.fstat(cf.fileno())
+                if (stat.st_dev, stat.st_ino) != (
+                        opened.st_dev, opened.st_ino
+                ):
+                    continue
+            yield cf
+            return
+
+
+def record_version(cf: BinaryIO) -> int:
+    """
+    Version of the record starting at the position of `cf`,
+    0 if it hasn't one
+    """
+    if cf.read(len(MAGIC)) != MAGIC:
+        return 0
+    return _read_binary_header(cf)[0].get('version', 0)
+
+
+@contextmanager
+def _writing(
+        pth: Path,
+        overwrite: bool,
+        replace: bool = False,
+        expect_version: Optional[int] = None
+) -> Iterator[Tuple[BinaryIO, int]]:
+    """
+    A temporary file for a record to replace the file at pth,
+    and the version the record is to have, see `write`
+    """
+    if not (overwrite or replace):
+        if expect_version:
+            raise PhibesConflictError(
+                f"{pth} expected at version {expect_version}, it's new"
+            )
+        try:
+            with _replacing(pth, exclusive=True) as tmp_file:
+                yield tmp_file, 1
+        except FileExistsError:
+            raise FileExistsError(
+                f"file {pth} already exists, and overwrite is False"
+            )
+        return
+    with _locked(pth) as cf:
+        if cf is None and replace:
+            raise FileNotFoundError(f"Item file {pth} not found")
+        current = 0 if cf is None else record_version(cf)
+        if expect_version is not None and expect_version != current:
+            raise PhibesConflictError(
+                f"{pth} expected at version {expect_version}, it's {current}"
+            )
+        with _replacing(pth, exclusive=cf is None) as tmp_file:
+            yield tmp_file, current + 1
+
+
+def _read_exact(cf: BinaryIO, length: int) -> bytes:
+    data = cf.read(length)
+    if len(data) != length:
+        raise ValueError(f"truncated record {getattr(cf, 'name', '')}")
+    return data
+
+
+def _read_binary_header(cf: BinaryIO) -> Tuple[dict, int, int]:
+    """
+    Read the fields following MAGIC, leaving `cf` at the start of the body
+    :return: record without body, stored body length, flags
+    """
+    version, flags = _read_exact(cf, 2)
+    if version != BINARY_VERSION:
+        raise ValueError(
+            f"unsupported record version {version} {getattr(cf, 'name', '')}"
+        )
+    if flags & ~KNOWN_FLAGS:
+        raise ValueError(
+            f"unsupported record flags {flags:#x} {getattr(cf, 'name', '')}"
+        )
+    ret_val = dict()
+    if flags & FLAG_VERSIONED:
+        (ret_val['version'],) = VERSION.unpack(_read_exact(cf, VERSION.size))
+    for field in ('salt', 'crypt_id', 'timestamp'):
+        (length,) = FIELD_LEN.unpack(_read_exact(cf, FIELD_LEN.size))
+        ret_val[field] = _read_exact(cf, length).decode('utf-8')
+    (length,) = BODY_LEN.unpack(_read_exact(cf, BODY_LEN.size))
+    return ret_val, length, flags
+
+
+def _read_binary(cf: BinaryIO) -> dict:
+    ret_val, length, flags = _read_binary_header(cf)
+    ret_val['body'] = _read_body(cf, length, flags)
+    return ret_val
+
+
+def _binary_header(
+        salt: str,
+        crypt_id: str,
+        timestamp: str,
+        flags: int = 0,
+        version: Optional[int] = None
+) -> bytes:
+    if version is not None:
+        flags |= FLAG_VERSIONED
+    header = [MAGIC, bytes([BINARY_VERSION, flags])]
+    if version is not None:
+        header.append(VERSION.pack(version))
+    for field in (salt, crypt_id, timestamp):
+        encoded = field.encode('utf-8')
+        header.append(FIELD_LEN.pack(len(encoded)))
+        header.append(encoded)
+    return b"".join(header)
+
+
+def pack(
+        salt: str,
+        crypt_id: str,
+        timestamp: str,
+        body: Union[str, bytes, memoryview],
+        compress: bool = False,
+        version: Optional[int] = None
+) -> List[Union[bytes, memoryview]]:
+    """
+    A record in the layout `write` would use, for storage other than
+    a file of its own; the parts are written in order
+    (a bytes-like body is one of them, not copied)
+    :param salt: salt value
+    :param crypt_id: ID of crypt handler
+    :param timestamp: timestamp
+    :param body: body, bytes-like for the binary layout
+    :param compress: whether to compress a bytes-like body,
+        if that makes it smaller
+    :param version: the record's version, for the binary layout
+    :return: successive parts of the record
+    """
+    if "\n" in salt or "\n" in crypt_id or "\n" in timestamp:
+        raise ValueError(
+            f"File fields can not contain newline char\n"
+            f"salt: [{salt}]\n"
+            f"crypt_id: [{crypt_id}]\n"
+            f"timestamp: [{timestamp}]\n"
+        )
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        body = memoryview(body)
+        flags = 0
+        if compress:
+            compressed = zlib.compress(body)
+            if len(compressed) < body.nbytes:
+                body = memoryview(compressed)
+                flags = FLAG_COMPRESSED
+        return [
+            _binary_header(salt, crypt_id, timestamp, flags, version),
+            BODY_LEN.pack(body.nbytes),
+            body
+        ]
+    if "\n" in body:
+        raise ValueError(f"File fields can not contain newline char {body}")
+    return [f"{salt}\n{crypt_id}\n{timestamp}\n{body}\n".encode('utf-8')]
+
+
+def unpack(data: Union[bytes, memoryview]) -> dict:
+    """
+    The record from the bytes of a file (or of `pack`), see `read`
+    """
+    cf = io.BytesIO(data)
+    if cf.read(len(MAGIC)) == MAGIC:
+        return _read_binary(cf)
+    lines = bytes(data).decode('utf-8').split('\n')
+    return dict(zip(RECORD_FIELDS, lines))
+
+
+def read_header(cf: BinaryIO) -> Optional[Tuple[dict, int]]:
+    """
+    Read the fields of the record starting at the position of `cf`,
+    leaving `cf` at the start of the body
+    :param cf: binary stream
+    :return: record without body & body length, or None for a record
+        whose body isn't stored as-is: in the text layout, or compressed
+    """
+    if cf.read(len(MAGIC)) != MAGIC:
+        return None
+    ret_val, length, flags = _read_binary_header(cf)
+    if flags & FLAG_COMPRESSED:
+        return None
+    return ret_val, length
+
+
+def _read_fields(cf: BinaryIO) -> Tuple[dict, Optional[int], int]:
+    """
+    Read the fields before the body of the file `cf`,
+    leaving `cf` at the start of the body
+    :return: record without body, stored body length & flags;
+        the length is None for a text-layout file (the body is a line)
+    """
+    if cf.read(len(MAGIC)) == MAGIC:
+        return _read_binary_header(cf)
+    cf.seek(0)
+    ret_val = dict()
+    # the salt (a hex string), the unique crypt implementation ID,
+    # and the encrypted datetime stamp, a line each
+    for field in RECORD_FIELDS[:3]:
+        ret_val[field] = cf.readline().decode('utf-8').rstrip('\r\n')
+    return ret_val, None, 0
+
+
+def _read_body(
+        cf: BinaryIO, length: Optional[int], flags: int = 0
+) -> Union[str, bytes]:
+    if length is None:
+        # the next line is the encrypted content
+        return cf.readline().decode('utf-8').rstrip('\r\n')
+    body = _read_exact(cf, length)
+    if flags & FLAG_COMPRESSED:
+        try:
+            return zlib.decompress(body)
+        except zlib.error as err:
+            raise ValueError(
+                f"corrupt record body {getattr(cf, 'name', '')}"
+            ) from err
+    return body
 
 
-def read(pth: Path) -> dict:
+def read(pth: Path, with_body: bool = True) -> dict:
     """
     Read the file at default_path, return a dict with uniform keys
     :param pth:
+    :param with_body: False to read only the fields before the body
+        (the body isn't read from the file, and there's no `body` key)
     :return:
     """
     if not pth.exists():
         raise FileNotFoundError(
             f"Item file {pth} not found"
         )
-    ret_val = dict()
-    with pth.open('r') as cf:
-        # the salt was stored as a hexadecimal string
-        ret_val['salt'] = cf.readline().strip('\n')
-        # the next line is a unique crypt implementation ID
-        ret_val['crypt_id'] = cf.readline().strip('\n')
-        # the next line is an encrypted datetime stamp
-        ret_val['timestamp'] = cf.readline().strip('\n')
-        # the next line is the encrypted content
-        ret_val['body'] = cf.readline().strip('\n')
+    with pth.open('rb') as cf:
+        ret_val, length, flags = _read_fields(cf)
+        if with_body:
+            ret_val['body'] = _read_body(cf, length, flags)
     return ret_val
 
 
+class LazyRecord(Mapping):
+    """
+    A record as `read` returns it, but with the body only read from the
+    file when it's first accessed; if the file has changed by then,
+    the whole record is read again, so that it stays consistent
+    """
+
+    def __init__(self, pth: Path):
+        self._pth = pth
+        with pth.open('rb') as cf:
+            self._fields, self._body_length, self._flags = _read_fields(cf)
+            self._body_at = cf.tell()
+            self._version = _file_version(cf)
+
+    @property
+    def body_loaded(self) -> bool:
+        return 'body' in self._fields
+
+    def __getitem__(self, key: str):
+        if key == 'body' and not self.body_loaded:
+            with self._pth.open('rb') as cf:
+                if _file_version(cf) == self._version:
+                    cf.seek(self._body_at)
+                else:
+                    (
+                        self._fields, self._body_length, self._flags
+                    ) = _read_fields(cf)
+                self._fields['body'] = _read_body(
+                    cf, self._body_length, self._flags
+                )
+        return self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return chain(
+            RECORD_FIELDS, ['version'] if 'version' in self._fields else []
+        )
+
+    def __len__(self) -> int:
+        return len(RECORD_FIELDS) + ('version' in self._fields)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self._pth}, {self._fields})"
+
+
+def _file_version(cf: BinaryIO) -> tuple:
+    stat = os.fstat(cf.fileno())
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def read_lazy(pth: Path) -> LazyRecord:
+    """
+    Read the file at pth, except for the body, which is read on demand
+    :param pth:
+    :return: record, see `LazyRecord`
+    """
+    if not pth.exists():
+        raise FileNotFoundError(
+            f"Item file {pth} not found"
+        )
+    return LazyRecord(pth)
+
+
 def write(
         pth: Path,
         salt: str,
         crypt_id: str,
         timestamp: str,
-        body: str,
+        body: Union[str, bytes, memoryview],
         overwrite: bool = False,
-        allow_empty: bool = False
-) -> None:
+        allow_empty: bool = False,
+        compress: bool = False,
+        replace: bool = False,
+        expect_version: Optional[int] = None
+) -> int:
     """
     Write the salt, timestamp, and body to the specified default_path file
     :param pth: Path object to write
     :param salt: salt value
     :param crypt_id: ID of crypt handler
     :param timestamp: timestamp
-    :param body: body
+    :param body: body, bytes-like for the binary layout
     :param overwrite: whether to overwrite an existing file
     :param allow_empty: whether to allow writing file with no/empty body
-    :return: None
+    :param compress: whether to compress a bytes-like body, see `pack`
+    :param replace: whether the file must already exist, to be overwritten
+        (FileNotFoundError if not)
+    :param expect_version: version the file must have (0 for none) to be
+        overwritten, PhibesConflictError if it hasn't
+    :return: version of the record written (0 for the text layout)
     """
-    if pth.exists() and not overwrite:
-        raise FileExistsError(
-            f"file {pth} already exists, and overwrite is False"
-        )
     if not body and not allow_empty:
         raise AttributeError("Record has no content!")
+    if isinstance(body, (bytes, bytearray, memoryview)):
+        with _writing(pth, overwrite, replace, expect_version) as (
+                cipher_file, version
+        ):
+            for part in pack(
+                    salt, crypt_id, timestamp, body, compress, version
+            ):
+                cipher_file.write(part)
+        return version
     if (
             ("\n" in salt or "\n" in timestamp) or (body and "\n" in body)
     ):
@@ -80,11 +691,194 @@ def write(
             f"timestamp: [{timestamp}]\n"
             f"body: [{body}]\n"
         )
-    with pth.open("w") as cipher_file:
+    with _writing(pth, overwrite, replace, expect_version) as (
+            cipher_file, _version
+    ):
         cipher_file.write(
-            f"{salt}\n{crypt_id}\n{timestamp}\n{body}\n"
+            f"{salt}\n{crypt_id}\n{timestamp}\n{body}\n".encode('utf-8')
+        )
+    return 0
+
+
+def write_chunks(
+        pth: Path,
+        salt: str,
+        crypt_id: str,
+        timestamp: str,
+        chunks: Iterable[bytes],
+        overwrite: bool = False,
+        replace: bool = False
+) -> int:
+    """
+    Write a record in the binary layout, its body from an iterable of
+    bytes-likes, so that the whole body is never held in memory
+    :param pth: Path object to write
+    :param salt: salt value
+    :param crypt_id: ID of crypt handler
+    :param timestamp: timestamp
+    :param chunks: successive parts of the body
+    :param overwrite: whether to overwrite an existing file
+    :param replace: whether the file must already exist, see `write`
+    :return: length of the body written
+    """
+    if "\n" in salt or "\n" in timestamp:
+        raise ValueError(
+            f"File fields can not contain newline char\n"
+            f"salt: [{salt}]\n"
+            f"timestamp: [{timestamp}]\n"
         )
-    return
+    chunks = iter(chunks)
+    first = next((chunk for chunk in chunks if len(chunk)), None)
+    if first is None:
+        raise AttributeError("Record has no content!")
+    length = 0
+    with _writing(pth, overwrite, replace) as (cipher_file, version):
+        header = _binary_header(salt, crypt_id, timestamp, version=version)
+        cipher_file.write(header)
+        # the length isn't known until the end
+        cipher_file.write(BODY_LEN.pack(0))
+        for chunk in chain([first], chunks):
+            length += cipher_file.write(chunk)
+        cipher_file.seek(len(header))
+        cipher_file.write(BODY_LEN.pack(length))
+    return length
+
+
+def read_chunks(
+        pth: Path, chunk_size: int = CHUNK_BYTES
+) -> Tuple[dict, Optional[Iterator[bytes]]]:
+    """
+    Read the record at pth, with its body as an iterator of chunks
+    The file is only read as the chunks are consumed, but it's kept open
+    for them, so they're the body of the record read here, even if the
+    file is replaced meanwhile.
+    :param pth: Path object to read
+    :param chunk_size: most bytes per chunk
+    :return: record without body & iterator of body chunks,
+        or, for a text-layout or compressed one, the complete record & None
+    """
+    if not pth.exists():
+        raise FileNotFoundError(
+            f"Item file {pth} not found"
+        )
+    cf = pth.open('rb')
+    try:
+        header = read_header(cf)
+        if header is not None:
+            ret_val, length = header
+            return ret_val, iter_body(cf, cf.tell(), length, chunk_size)
+        cf.seek(0)
+        ret_val, length, flags = _read_fields(cf)
+        ret_val['body'] = _read_body(cf, length, flags)
+    except BaseException:
+        cf.close()
+        raise
+    cf.close()
+    return ret_val, None
+
+
+def read_range(
+        pth: Path, offset: int, length: int
+) -> Tuple[dict, Optional[bytes]]:
+    """
+    Read the record at pth, with only part of its body
+    :param pth: Path object to read
+    :param offset: position in the body of the first byte to read
+    :param length: most bytes to read, fewer past the end of the body
+    :return: record without body & the body bytes in range,
+        or, for a text-layout or compressed one, the complete record & None
+    """
+    if offset < 0 or length < 0:
+        raise ValueError(f"invalid range {offset=} {length=}")
+    if not pth.exists():
+        raise FileNotFoundError(
+            f"Item file {pth} not found"
+        )
+    with pth.open('rb') as cf:
+        header = read_header(cf)
+        if header is None:
+            return read(pth), None
+        ret_val, body_length = header
+        if offset >= body_length:
+            return ret_val, b""
+        cf.seek(offset, 1)
+        return ret_val, _read_exact(cf, min(length, body_length - offset))
+
+
+def append(
+        pth: Path, encrypt_at: Callable[[int], bytes], timestamp: str
+) -> Optional[int]:
+    """
+    Append to the body of the binary-layout record at pth, in place
+    :param pth: Path object to update
+    :param encrypt_at: given the current body length, returns the bytes
+        to append (e.g. content encrypted at that keystream offset)
+    :param timestamp: replacement timestamp
+    :return: new body length, or None for a text-layout or compressed
+        one, which can't be appended to
+    """
+    if "\n" in timestamp:
+        raise ValueError(
+            f"File fields can not contain newline char\n"
+            f"timestamp: [{timestamp}]\n"
+        )
+    with _locked(pth, 'r+b') as cf:
+        if cf is None:
+            raise FileNotFoundError(
+                f"Item file {pth} not found"
+            )
+        header = read_header(cf)
+        if header is None:
+            return None
+        rec, length = header
+        body_offset = cf.tell()
+        data = encrypt_at(length)
+        encoded = timestamp.encode('utf-8')
+        version = rec.get('version')
+        if version is not None:
+            version += 1
+        if len(encoded) != len(rec['timestamp'].encode('utf-8')):
+            # header changes size, so the record is rewritten whole
+            with _replacing(pth) as new_file:
+                new_file.write(_binary_header(
+                    rec['salt'], rec['crypt_id'], timestamp, version=version
+                ))
+                new_file.write(BODY_LEN.pack(length + len(data)))
+                remaining = length
+                while remaining:
+                    chunk = _read_exact(cf, min(CHUNK_BYTES, remaining))
+                    remaining -= new_file.write(chunk)
+                new_file.write(data)
+            return length + len(data)
+        # body first: until the length is updated, readers ignore it;
+        # and on disk first, so a crash doesn't leave the length without it
+        cf.seek(body_offset + length)
+        cf.write(data)
+        cf.flush()
+        os.fsync(cf.fileno())
+        # then the fields before the body, all at once (the same size)
+        cf.seek(0)
+        cf.write(_binary_header(
+            rec['salt'], rec['crypt_id'], timestamp, version=version
+        ) + BODY_LEN.pack(length + len(data)))
+    get_fsync_policy().written(pth)
+    return length + len(data)
+
+
+def iter_body(
+        cf: BinaryIO, offset: int, length: int, chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Chunks of the `length` bytes at `offset` in the open file,
+    read as they're consumed (from the file as it was opened, even if
+    it's since been replaced), closing it after
+    """
+    with cf:
+        cf.seek(offset)
+        while length:
+            chunk = _read_exact(cf, min(chunk_size, length))
+            length -= len(chunk)
+            yield chunk
 
 
 class PhibesRecordHandler(object):
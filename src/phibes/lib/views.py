@@ -2,12 +2,164 @@
 Phibes operation functions that are decorated to allow return type
 to be specified by caller (e.g. JSON, Object, Text, HTML)
 Hence, provides a common entry point for various client types.
+
+Every function that operates on an existing locker accepts an optional
+`locker_inst`: a Locker already unlocked by the caller (see `open_locker`).
+Passing it lets a caller perform several operations for one unlock.
+Callers making many operations should hold a `LockerSession` instead.
 """
 
 # core library modules
+from __future__ import annotations
+from typing import BinaryIO, Union
+
 # third party packages
 # in-project modules
-from phibes.model import Locker
+from phibes.lib.errors import PhibesError
+from phibes.model import Item, Locker
+
+
+def set_content(item: Item, content: Union[str, bytes]) -> None:
+    """
+    Set item content from text, or from bytes that need not be text
+    """
+    if isinstance(content, str):
+        item.content = content
+    else:
+        item.content_bytes = content
+
+
+def open_locker(password: str, locker_name: str, **kwargs) -> Locker:
+    """
+    Unlock a locker, for use with the `locker_inst` param of other views
+    """
+    return Locker.get(password=password, locker_name=locker_name)
+
+
+class LockerSession(object):
+    """
+    A locker unlocked once, for any number of item operations
+
+    Usable as a context manager; on exit, the session lets go of
+    the unlocked locker and refuses further operations.
+    """
+
+    def __init__(
+            self,
+            password: str = None,
+            locker_name: str = None,
+            locker_inst: Locker = None
+    ):
+        """
+        Unlock the locker, unless the caller passes one already unlocked
+        :param password: Password for the locker
+        :param locker_name: The optional name of the locker
+        :param locker_inst: Locker already unlocked by the caller
+        """
+        if locker_inst is None:
+            locker_inst = open_locker(
+                password=password, locker_name=locker_name
+            )
+        self._locker = locker_inst
+
+    def __enter__(self) -> LockerSession:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        self._locker = None
+
+    @property
+    def locker(self) -> Locker:
+        if self._locker is None:
+            raise PhibesError("LockerSession is closed")
+        return self._locker
+
+    def get_locker(self) -> dict:
+        return self.locker.to_dict()
+
+    def delete_locker(self):
+        ret_val = self.locker.data_model.delete()
+        self.close()
+        return ret_val
+
+    def create_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> dict:
+        item = self.locker.create_item(item_name=item_name)
+        set_content(item, content)
+        self.locker.add_item(item)
+        return item.as_dict()
+
+    def update_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> dict:
+        item = self.locker.get_item(item_name)
+        set_content(item, content)
+        self.locker.update_item(item)
+        return item.as_dict()
+
+    def get_item(self, item_name: str) -> dict:
+        return self.locker.get_item(item_name=item_name).as_dict()
+
+    def get_item_info(self, item_name: str) -> dict:
+        """
+        Item metadata (name, timestamp, crypt_id), not reading its content
+        """
+        return self.locker.get_item_info(item_name=item_name)
+
+    def get_item_bytes(self, item_name: str) -> bytes:
+        """
+        Item content as bytes, for content that need not be text
+        """
+        return self.locker.get_item(item_name=item_name).content_bytes
+
+    def append_item(
+            self, item_name: str, content: Union[str, bytes]
+    ) -> int:
+        """
+        Add to the end of an item, writing only the addition
+        """
+        return self.locker.append_item(item_name, content)
+
+    def read_item_range(
+            self, item_name: str, offset: int, length: int
+    ) -> bytes:
+        """
+        Part of an item's content, reading & decrypting only that part
+        """
+        return self.locker.read_item_range(item_name, offset, length)
+
+    def create_item_from_stream(self, item_name: str, src: BinaryIO) -> int:
+        """
+        Create an item from a binary stream (e.g. a file attachment),
+        without holding all of its content in memory
+        """
+        return self.locker.save_item_from_stream(item_name, src)
+
+    def update_item_from_stream(self, item_name: str, src: BinaryIO) -> int:
+        return self.locker.save_item_from_stream(item_name, src, replace=True)
+
+    def read_item_to_stream(self, item_name: str, dest: BinaryIO) -> int:
+        """
+        Write an item's content to a binary stream,
+        without holding all of it in memory
+        """
+        return self.locker.read_item_to_stream(item_name, dest)
+
+    def list_items(self) -> list:
+        return [item.as_dict() for item in self.locker.list_items()]
+
+    def list_item_names(self) -> list:
+        """
+        Just the names of the items, which doesn't read their content
+        """
+        return self.locker.list_item_names()
+
+    def delete_item(self, item_name: str):
+        return self.locker.delete_item(item_name=item_name)
 
 
 def create_locker(
@@ -21,50 +173,77 @@ def create_locker(
     ).to_dict()
 
 
-def get_locker(password: str, locker_name: str, **kwargs):
-    return Locker.get(password=password, locker_name=locker_name).to_dict()
+def get_locker(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.get_locker()
 
 
-def delete_locker(password: str, locker_name: str, **kwargs):
-    return Locker.delete(password=password, locker_name=locker_name)
+def delete_locker(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    if locker_inst is None:
+        return Locker.delete(password=password, locker_name=locker_name)
+    with LockerSession(locker_inst=locker_inst) as session:
+        return session.delete_locker()
 
 
 def create_item(
-        password: str, locker_name: str, item_name: str, content: str, **kwargs
+        password: str,
+        locker_name: str,
+        item_name: str,
+        content: str,
+        locker_inst: Locker = None,
+        **kwargs
 ):
-    locker = Locker.get(password=password, locker_name=locker_name)
-    item = locker.create_item(item_name=item_name)
-    item.content = content
-    locker.add_item(item)
-    return get_item(
-        password=password, locker_name=locker_name, item_name=item_name
-    )
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.create_item(item_name=item_name, content=content)
 
 
 def update_item(
-        password: str, locker_name: str, item_name: str, content: str, **kwargs
+        password: str,
+        locker_name: str,
+        item_name: str,
+        content: str,
+        locker_inst: Locker = None,
+        **kwargs
 ):
-    locker = Locker.get(password=password, locker_name=locker_name)
-    item = locker.get_item(item_name)
-    item.content = content
-    locker.update_item(item)
-    return get_item(
-        password=password, locker_name=locker_name, item_name=item_name
-    )
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.update_item(item_name=item_name, content=content)
 
 
-def get_item(password: str, locker_name: str, item_name: str, **kwargs):
-    locker = Locker.get(password=password, locker_name=locker_name)
-    return locker.get_item(item_name=item_name).as_dict()
+def get_item(
+        password: str,
+        locker_name: str,
+        item_name: str,
+        locker_inst: Locker = None,
+        **kwargs
+):
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.get_item(item_name=item_name)
+
+
+def get_items(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.list_items()
 
 
-def get_items(password: str, locker_name: str, **kwargs):
-    locker = Locker.get(password=password, locker_name=locker_name)
-    return [item.as_dict() for item in locker.list_items()]
+def get_item_names(
+        password: str, locker_name: str, locker_inst: Locker = None, **kwargs
+):
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.list_item_names()
 
 
 def delete_item(
-        password: str, locker_name: str, item_name: str, **kwargs
+        password: str,
+        locker_name: str,
+        item_name: str,
+        locker_inst: Locker = None,
+        **kwargs
 ):
-    locker = Locker.get(password=password, locker_name=locker_name)
-    return locker.delete_item(item_name=item_name)
+    with LockerSession(password, locker_name, locker_inst) as session:
+        return session.delete_item(item_name=item_name)
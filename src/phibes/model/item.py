@@ -6,9 +6,10 @@ Item is a base class for things to be stored in a Locker.
 
 # Built-in library packages
 from __future__ import annotations
+import base64
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Mapping, Optional, Union
 
 # Third party packages
 
@@ -23,6 +24,13 @@ FILE_EXT = "cry"
 class Item(object):
     """
     Storage content of a Locker
+
+    Content is held encrypted as bytes, and is stored that way.
+    Items read from text-layout files (see `phibes_file`) hold the
+    encrypted text instead, until their content is next set.
+    An item made from a stored record doesn't take the body from the
+    record until it's needed, so a record that reads its body lazily
+    (`phibes_file.LazyRecord`) serves metadata without reading it.
     """
 
     def __init__(
@@ -34,7 +42,12 @@ class Item(object):
         self.name = name
         self.crypt_impl = crypt_obj
         self._ciphertext = None
+        # stored record, if the body hasn't been taken from it yet
+        self._record = None
+        self._plaintext = None
         self.timestamp = str(datetime.now())
+        # version of the stored item, None if it hasn't been stored
+        self.version = None
         if content:
             self.content = content
         return
@@ -45,7 +58,7 @@ class Item(object):
             salt=self.salt,
             crypt_id=self.crypt_impl.crypt_id,
             timestamp=self.timestamp,
-            body=self._ciphertext,
+            body=self.ciphertext,
             overwrite=overwrite
         )
         return
@@ -72,27 +85,43 @@ class Item(object):
     def make_item_from_dict(
             cls, crypt_obj: CryptIfc,
             name: str,
-            item_dict: dict,
-            item_inst: Item = None
+            item_dict: Mapping,
+            item_inst: Item = None,
+            plaintext: Optional[bytes] = None
     ) -> Item:
+        """
+        Populate an Item from a stored record
+        `plaintext` may be passed by a caller that already decrypted the body
+        """
         if item_inst is None:
             item_inst = Item(crypt_obj=crypt_obj, name=name)
         item_inst._salt = item_dict['salt']
         item_inst.timestamp = item_dict['timestamp']
-        item_inst._ciphertext = item_dict['body']
+        item_inst.version = item_dict.get('version', 0)
+        item_inst._ciphertext = None
+        item_inst._record = item_dict
+        item_inst._plaintext = plaintext
         # crypt_impl will have generated a random salt,
         # need to set it to the correct one for this item
         item_inst.crypt_impl.salt = item_inst._salt
         return item_inst
 
     def as_dict(self):
+        """
+        Text representation of the item
+        `body` is None for content that isn't text, see `content_bytes`
+        """
+        try:
+            body = self.content
+        except UnicodeDecodeError:
+            body = None
         ret_val = {
             'salt': self.salt,
             'crypt_id': self.crypt_impl.crypt_id,
             'timestamp': self.timestamp,
-            'body': self.content,
+            'body': body,
             'name': self.name,
-            '_ciphertext': self._ciphertext
+            '_ciphertext': self.ciphertext_text
         }
         return ret_val
 
@@ -100,10 +129,10 @@ class Item(object):
     def content(self):
         """
         Method to get plain text content
-        Cipher text is decrypted when this method is invoked.
+        Cipher text is decrypted the first time this method is invoked.
         :return: Plain text content
         """
-        return self.crypt_impl.decrypt(self._ciphertext)
+        return self.content_bytes.decode('utf-8')
 
     @content.setter
     def content(self, content):
@@ -112,13 +141,78 @@ class Item(object):
         :param content: Plain text
         :return:
         """
-        self._ciphertext = self.crypt_impl.encrypt(content)
+        self.content_bytes = content.encode('utf-8')
         return
 
     @property
-    def ciphertext(self):
+    def content_bytes(self) -> bytes:
+        """
+        Method to get the content as bytes
+        Cipher text is decrypted the first time this method is invoked.
+        :return: Plain content
+        """
+        if self._plaintext is None:
+            if isinstance(self.ciphertext, str):
+                self._plaintext = self.crypt_impl.decrypt(
+                    self.ciphertext
+                ).encode('utf-8')
+            else:
+                self._plaintext = self.crypt_impl.decrypt_bytes(
+                    self.ciphertext
+                )
+        return self._plaintext
+
+    def read_range(self, offset: int, length: int) -> bytes:
+        """
+        Part of the content, decrypting only the bytes in range
+        (CTR keystream can start at any position)
+        :param offset: position in the content of the first byte
+        :param length: most bytes to return, fewer past the end
+        :return: plain content bytes
+        """
+        if offset < 0 or length < 0:
+            raise ValueError(f"invalid range {offset=} {length=}")
+        if self._plaintext is not None or isinstance(self.ciphertext, str) or (
+                not self.crypt_impl.supports_bytes
+        ):
+            return self.content_bytes[offset:offset + length]
+        in_range = memoryview(self.ciphertext)[offset:offset + length]
+        return self.crypt_impl.bytes_stream(offset)(in_range)
+
+    @content_bytes.setter
+    def content_bytes(self, content: Union[bytes, memoryview]):
+        """
+        Method to pass content that will be encrypted on the crypt object
+        :param content: bytes-like content, need not be text
+            (unless the crypt can only produce encrypted text)
+        :return:
+        """
+        if self.crypt_impl.supports_bytes:
+            self._ciphertext = self.crypt_impl.encrypt_bytes(content)
+        else:
+            self._ciphertext = self.crypt_impl.encrypt(
+                bytes(content).decode('utf-8')
+            )
+        self._record = None
+        self._plaintext = bytes(content)
+        return
+
+    @property
+    def ciphertext(self) -> Union[bytes, str]:
+        if self._record is not None:
+            self._ciphertext = self._record['body']
+            self._record = None
         return self._ciphertext
 
+    @property
+    def ciphertext_text(self) -> Optional[str]:
+        """
+        The encrypted content as text, for presentation
+        """
+        if isinstance(self.ciphertext, (bytes, bytearray)):
+            return base64.urlsafe_b64encode(self.ciphertext).decode('utf-8')
+        return self.ciphertext
+
     @property
     def salt(self):
         """
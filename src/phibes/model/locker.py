@@ -7,13 +7,15 @@ A Locker has other data on the file system, but that file
 
 # Built-in library packages
 from __future__ import annotations
+from datetime import datetime
 from json import dumps
-from typing import List
+from typing import BinaryIO, List, Union
 
 # Third party packages
 # In-project modules
 from phibes.crypto import create_crypt, get_crypt
 from phibes.crypto.crypt_ifc import CryptIfc
+from phibes.lib.phibes_file import CHUNK_BYTES
 from phibes.lib.config import ConfigModel
 from phibes.lib.errors import PhibesNotFoundError, PhibesUnknownError
 from phibes.lib.utils import encode_name
@@ -66,9 +68,17 @@ class Locker(object):
         @param locker_name: The optional name of the locker
         @return: Locker instance
         """
+        # imported when used, as only the model's clients may need it
+        from phibes.lib import agent
         lid = Locker.get_locker_id(locker_name=locker_name)
         locker = LockerModel(locker_id=lid)
-        crypt_inst = get_crypt(password=password, **locker.__dict__)
+        # an agent (if running) may already hold this locker unlocked
+        crypt_inst = agent.get_cached_crypt(
+            password=password, **locker.__dict__
+        )
+        if crypt_inst is None:
+            crypt_inst = get_crypt(password=password, **locker.__dict__)
+            agent.cache_crypt(password=password, crypt=crypt_inst)
         inst = Locker(
             crypt_impl=crypt_inst, locker_name=locker_name, **locker.__dict__
         )
@@ -143,24 +153,36 @@ class Locker(object):
     def save_item(self, item: Item, replace: bool) -> Item:
         """
         Saves the new item to the locker
+        An item that was read from the locker replaces the stored one
+        only if that's still the version it was read from,
+        PhibesConflictError is raised if it's been saved since.
         @param item: item to save
         @param replace: whether this is replacing a stored item
-        @return: None
+        @return: the item, at its saved version
         """
         if replace:
-            self.data_model.update_item(
+            item.version = self.data_model.update_item(
                 item_id=self.crypt_impl.encrypt(item.name),
-                content=self.crypt_impl.encrypt(item.content),
-                timestamp=item.timestamp
+                content=item.ciphertext,
+                timestamp=item.timestamp,
+                version=item.version
             )
         else:
-            self.data_model.create_item(
+            item.version = self.data_model.create_item(
                 item_id=self.crypt_impl.encrypt(item.name),
-                content=self.crypt_impl.encrypt(item.content),
+                content=item.ciphertext,
                 timestamp=item.timestamp
             )
         return item
 
+    def transaction(self):
+        """
+        Context manager grouping the locker's storage operations in its
+        `with` block, for storage that supports it; e.g. to save many
+        items with one commit
+        """
+        return self.data_model.transaction()
+
     def add_item(self, item: Item) -> Item:
         """
         Saves the new item to the locker
@@ -169,6 +191,38 @@ class Locker(object):
         """
         return self.save_item(item=item, replace=False)
 
+    def save_items(self, items: List[Item], replace: bool) -> List[Item]:
+        """
+        Saves a number of items to the locker together, as the storage
+        best can (e.g. in one transaction), see `save_item`
+        @param items: items to save
+        @param replace: whether these are replacing stored items
+        @return: the items, at their saved versions
+        """
+        item_ids = self.crypt_impl.encrypt_many([item.name for item in items])
+        versions = self.data_model.save_items(
+            {
+                item_id: {
+                    'content': item.ciphertext,
+                    'timestamp': item.timestamp,
+                    'version': item.version
+                }
+                for item_id, item in zip(item_ids, items)
+            },
+            replace=replace
+        )
+        for item_id, item in zip(item_ids, items):
+            item.version = versions[item_id]
+        return items
+
+    def add_items(self, items: List[Item]) -> List[Item]:
+        """
+        Saves new items to the locker together
+        @param items: items to save
+        @return: the items
+        """
+        return self.save_items(items=items, replace=False)
+
     def get_item(self, item_name: str) -> Item:
         """
         Attempts to find and return a named item in the locker.
@@ -193,6 +247,144 @@ class Locker(object):
             )
         return item
 
+    def get_item_info(self, item_name: str) -> dict:
+        """
+        An item's metadata, without reading or decrypting its content
+        @param item_name: name of the item
+        @return: the item's name, timestamp & crypt_id
+        """
+        rec = self.data_model.get_item_header(
+            item_id=self.crypt_impl.encrypt(item_name)
+        )
+        return {
+            'name': item_name,
+            'timestamp': rec['timestamp'],
+            'crypt_id': rec['crypt_id']
+        }
+
+    def save_item_from_stream(
+            self,
+            item_name: str,
+            src: BinaryIO,
+            replace: bool = False,
+            chunk_size: int = CHUNK_BYTES
+    ) -> int:
+        """
+        Saves an item whose content is read from a binary stream,
+        encrypting and storing it chunk by chunk
+        @param item_name: name of the item
+        @param src: readable binary stream, read to its end
+        @param replace: whether this is replacing a stored item
+        @param chunk_size: most bytes read, encrypted & written at once
+        @return: number of content bytes saved
+        """
+        if not self.crypt_impl.supports_bytes:
+            # stored as encrypted text, which can only be written whole
+            item = self.create_item(item_name)
+            item.content_bytes = src.read()
+            self.save_item(item=item, replace=replace)
+            return len(item.content_bytes)
+        transform = self.crypt_impl.bytes_stream()
+        total = 0
+
+        def encrypted_chunks():
+            nonlocal total
+            for chunk in iter(lambda: src.read(chunk_size), b""):
+                total += len(chunk)
+                yield transform(chunk)
+
+        self.data_model.save_item_chunks(
+            item_id=self.crypt_impl.encrypt(item_name),
+            chunks=encrypted_chunks(),
+            timestamp=str(datetime.now()),
+            replace=replace
+        )
+        return total
+
+    def read_item_to_stream(
+            self,
+            item_name: str,
+            dest: BinaryIO,
+            chunk_size: int = CHUNK_BYTES
+    ) -> int:
+        """
+        Writes an item's decrypted content to a binary stream,
+        reading and decrypting it chunk by chunk
+        @param item_name: name of the item
+        @param dest: writable binary stream
+        @param chunk_size: most bytes read, decrypted & written at once
+        @return: number of content bytes written
+        """
+        rec, chunks = self.data_model.get_item_chunks(
+            item_id=self.crypt_impl.encrypt(item_name), chunk_size=chunk_size
+        )
+        if chunks is None:
+            # stored as text, which can only be decrypted whole
+            item = Item.make_item_from_dict(
+                crypt_obj=self.crypt_impl, name=item_name, item_dict=rec
+            )
+            return dest.write(item.content_bytes)
+        transform = self.crypt_impl.bytes_stream()
+        total = 0
+        for chunk in chunks:
+            total += dest.write(transform(chunk))
+        return total
+
+    def append_item(self, item_name: str, content: Union[str, bytes]) -> int:
+        """
+        Adds content to the end of an item, encrypting only the new bytes
+        (at the keystream position where the item's content ends)
+        so the cost depends on the size of the addition, not the item
+        @param item_name: name of the item
+        @param content: text or bytes to add
+        @return: new length of the item's content in bytes
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        timestamp = str(datetime.now())
+        new_length = None
+        if self.crypt_impl.supports_bytes:
+            new_length = self.data_model.append_item(
+                item_id=self.crypt_impl.encrypt(item_name),
+                encrypt_at=lambda offset: self.crypt_impl.bytes_stream(
+                    offset
+                )(content),
+                timestamp=timestamp
+            )
+        if new_length is None:
+            # stored as text or compressed, rewritten whole
+            # (as plain bytes, for next time, if the crypt has them)
+            item = self.get_item(item_name)
+            item.content_bytes = item.content_bytes + content
+            item.timestamp = timestamp
+            self.update_item(item)
+            new_length = len(item.content_bytes)
+        return new_length
+
+    def read_item_range(
+            self, item_name: str, offset: int, length: int
+    ) -> bytes:
+        """
+        Part of an item's content; only the bytes in range
+        are read from storage and decrypted
+        @param item_name: name of the item
+        @param offset: position in the content of the first byte
+        @param length: most bytes to return, fewer past the end
+        @return: plain content bytes
+        """
+        rec, body = self.data_model.get_item_range(
+            item_id=self.crypt_impl.encrypt(item_name),
+            offset=offset,
+            length=length
+        )
+        if body is None:
+            # stored as text, which can only be decrypted whole
+            item = Item.make_item_from_dict(
+                crypt_obj=self.crypt_impl, name=item_name, item_dict=rec
+            )
+            return item.read_range(offset, length)
+        return self.crypt_impl.bytes_stream(offset)(body)
+
     def update_item(self, item: Item) -> Item:
         """
         Save `item`, allowing overwrite
@@ -215,17 +407,72 @@ class Locker(object):
                 f"extra info {err}"
             )
 
+    def delete_items(self, item_names: List[str]) -> None:
+        """
+        Delete items from locker together, as the storage best can
+        :param item_names: names of items to delete
+        """
+        try:
+            return self.data_model.delete_items(
+                item_ids=self.crypt_impl.encrypt_many(item_names)
+            )
+        except FileNotFoundError as err:
+            raise PhibesNotFoundError(
+                f"Items not found {item_names}"
+                f"extra info {err}"
+            )
+
     def list_items(self) -> List[Item]:
         """
         Return a list of Items of the specified type in this locker
         :return:
         """
-        items = []
-        item_ids = self.data_model.get_items()
-        for item_id in item_ids:
-            item = self.get_item(item_name=self.decrypt(item_id))
-            items.append(item)
-        return items
+        item_ids = list(self.data_model.get_items())
+        # read together, as the storage best can
+        recs = list(self.data_model.get_item_recs(item_ids).values())
+        # as `get_item` checks, before anything is decrypted
+        for item_id, rec in zip(item_ids, recs):
+            if not self.crypt_impl.salt == rec['salt']:
+                raise PhibesUnknownError(
+                    f"found item {item_id} but salt mismatch"
+                )
+        # Names & contents are each decrypted as one batch
+        names = self.crypt_impl.decrypt_many(item_ids)
+        # Bodies from text-layout files are encrypted text, others bytes
+        text_at = [
+            idx for idx, rec in enumerate(recs) if isinstance(rec['body'], str)
+        ]
+        bytes_at = [
+            idx for idx, rec in enumerate(recs)
+            if not isinstance(rec['body'], str)
+        ]
+        contents = [None] * len(recs)
+        decrypted = self.crypt_impl.decrypt_many(
+            [recs[idx]['body'] for idx in text_at]
+        )
+        for idx, content in zip(text_at, decrypted):
+            contents[idx] = content.encode('utf-8')
+        decrypted = self.crypt_impl.decrypt_bytes_many(
+            [recs[idx]['body'] for idx in bytes_at]
+        )
+        for idx, content in zip(bytes_at, decrypted):
+            contents[idx] = content
+        return [
+            Item.make_item_from_dict(
+                crypt_obj=self.crypt_impl,
+                name=name,
+                item_dict=rec,
+                plaintext=content
+            )
+            for name, rec, content in zip(names, recs, contents)
+        ]
+
+    def list_item_names(self) -> List[str]:
+        """
+        Names of the items in this locker, without reading the items
+        :return:
+        """
+        return self.crypt_impl.decrypt_many(self.data_model.get_items())
 
     def to_dict(self, **kwargs):
         """
@@ -235,6 +482,7 @@ class Locker(object):
         ret_dict = {
             'timestamp': self.timestamp,
             'crypt_id': self.crypt_impl.crypt_id,
+            'item_count': len(self.data_model.get_items()),
             'storage': dumps(
                 self.data_model.storage.__dict__, default=str
             )
@@ -4,12 +4,14 @@ Storage-only model classes
 
 # Built-in library packages
 from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
 
 # Third party packages
 # In-project modules
-from phibes.crypto import default_id
+from phibes.crypto import get_default_id
 from phibes.lib.config import ConfigModel as Config
 from phibes.lib.errors import PhibesUnknownError
+from phibes.storage.caching_storage import CachingStorage, get_cache
 from phibes.storage.types import StoreType
 
 
@@ -24,6 +26,8 @@ class Model(object):
         self.storage = store_type.impl_class(
             locker_id=locker_id, **config.store
         )
+        if get_cache() is not None:
+            self.storage = CachingStorage(self.storage)
 
 
 class LockerModel(Model):
@@ -44,7 +48,7 @@ class LockerModel(Model):
             self.storage.create(
                 pw_hash=kwargs['pw_hash'],
                 salt=kwargs['salt'],
-                crypt_id=kwargs.get('crypt_id', default_id)
+                crypt_id=kwargs.get('crypt_id') or get_default_id()
             )
         # should storage should also be "getting" in initialization?
         rec = self.storage.get()
@@ -69,7 +73,7 @@ class LockerModel(Model):
     def create_item(
             self,
             item_id: str,
-            content: str,
+            content: Union[str, bytes],
             timestamp: str = str(datetime.now())
     ):
         return ItemModel(
@@ -84,8 +88,9 @@ class LockerModel(Model):
     def update_item(
             self,
             item_id: str,
-            content: str,
-            timestamp: str = str(datetime.now())
+            content: Union[str, bytes],
+            timestamp: str = str(datetime.now()),
+            version: Optional[int] = None
     ):
         return ItemModel(
             locker_id=self.locker_id,
@@ -93,18 +98,93 @@ class LockerModel(Model):
             salt=self.salt,
             crypt_id=self.crypt_id,
             timestamp=timestamp,
-            content=content
+            content=content,
+            version=version
         ).update()
 
+    def save_items(self, items: dict, replace: bool = False) -> dict:
+        """
+        Save a number of items together, see `StorageImpl.save_items`
+        :param items: by item_id, dicts of `content`, `timestamp` &
+            for a replacement, optionally the `version` it's replacing
+        :return: versions of the saved items, by item_id
+        """
+        item_recs = {}
+        for item_id, item in items.items():
+            item_recs[item_id] = {
+                'salt': self.salt,
+                'crypt_id': self.crypt_id,
+                'timestamp': item['timestamp'],
+                '_ciphertext': item['content'],
+            }
+            if replace and item.get('version') is not None:
+                item_recs[item_id]['version'] = item['version']
+        return self.storage.save_items(item_recs=item_recs, replace=replace)
+
+    def transaction(self):
+        return self.storage.transaction()
+
     def delete_item(self, item_id: str):
         return ItemModel(locker_id=self.locker_id, item_id=item_id).delete()
 
+    def delete_items(self, item_ids: Iterable[str]):
+        return self.storage.delete_items(item_ids=item_ids)
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            chunks: Iterable[bytes],
+            timestamp: str,
+            replace: bool = False
+    ):
+        item_rec = {
+            'salt': self.salt,
+            'crypt_id': self.crypt_id,
+            'timestamp': timestamp
+        }
+        return self.storage.save_item_chunks(
+            item_id=item_id, item_rec=item_rec, chunks=chunks, replace=replace
+        )
+
+    def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        return self.storage.append_item(
+            item_id=item_id, encrypt_at=encrypt_at, timestamp=timestamp
+        )
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        return self.storage.get_item_range(
+            item_id=item_id, offset=offset, length=length
+        )
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        return self.storage.get_item_chunks(
+            item_id=item_id, chunk_size=chunk_size
+        )
+
     def get_item(self, item_id: str):
         return self.storage.get_item(item_id=item_id)
 
+    def get_item_header(self, item_id: str) -> dict:
+        return self.storage.get_item_header(item_id=item_id)
+
     def get_items(self):
         return self.storage.list_items()
 
+    def get_item_recs(self, item_ids: Iterable[str]) -> dict:
+        return self.storage.get_items(item_ids=item_ids)
+
+    def get_item_info(self) -> dict:
+        return self.storage.list_item_info()
+
 
 class ItemModel(Model):
     """
@@ -119,6 +199,8 @@ class ItemModel(Model):
         self.crypt_id = kwargs.get('crypt_id', None)
         self.timestamp = kwargs.get('timestamp', str(datetime.now()))
         self.body = kwargs.get('content', None)
+        # version of the stored item being replaced, None for any
+        self.version = kwargs.get('version', None)
 
     def save(self, update: bool):
         """
@@ -130,6 +212,8 @@ class ItemModel(Model):
             'timestamp': self.timestamp,
             '_ciphertext': self.body,
         }
+        if update and self.version is not None:
+            item_rec['version'] = self.version
         return self.storage.save_item(
             item_id=self.item_id,
             item_rec=item_rec,
@@ -0,0 +1,359 @@
+"""
+asyncio counterpart of the Storage Implementation Interface
+
+`AsyncStorageImpl` adapts any `StorageImpl` (file, memory, ...) for use
+from a coroutine: the operations of storage that waits on I/O
+(`StorageImpl.blocking`) run in a bounded thread pool shared by all
+async callers, so they don't stall the event loop, and more of them
+than the pool has threads wait their turn.
+Key derivation (unlocking) runs in a pool of its own (`run_kdf`),
+so slow unlocks don't hold up the I/O of others.
+What must stay in one thread, a transaction's operations or the reads
+of a streamed body, runs in a thread of its own (see `_one_thread`).
+"""
+# Built-in library packages
+from __future__ import annotations
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, AsyncExitStack
+import functools
+import sys
+import threading
+from typing import (
+    AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional, Tuple,
+    TypeVar
+)
+
+# Third party packages
+# In-project modules
+from phibes.storage import sqlite_storage
+from phibes.storage.storage_impl import StorageImpl
+
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_KDF_WORKERS = 2
+
+T = TypeVar('T')
+
+
+class _Pool(object):
+    """
+    A bounded thread pool, made when first needed
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.thread_name_prefix
+                )
+            return self._executor
+
+    def set_max_workers(self, max_workers: int) -> None:
+        if max_workers < 1:
+            raise ValueError(f"invalid {max_workers=}")
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.max_workers = max_workers
+        if executor is not None:
+            threading.Thread(
+                target=_retire, args=(executor,), name='phibes-retire',
+                daemon=True
+            ).start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            _retire(executor)
+
+
+# storage I/O
+_io_pool = _Pool(DEFAULT_MAX_WORKERS, 'phibes')
+# key derivation, so slow unlocks don't hold up I/O
+_kdf_pool = _Pool(DEFAULT_MAX_KDF_WORKERS, 'phibes-kdf')
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    The thread pool blocking operations run in, made when first needed
+    """
+    return _io_pool.executor
+
+
+def get_kdf_executor() -> ThreadPoolExecutor:
+    """
+    The thread pool key derivations (unlocks) run in, apart from I/O
+    """
+    return _kdf_pool.executor
+
+
+def _retire(executor: ThreadPoolExecutor) -> None:
+    """
+    Shut the pool down, after its work, and close the connections
+    its threads kept open
+    """
+    executor.shutdown(wait=True)
+    sqlite_storage.close_connections(stale=True)
+
+
+def set_max_workers(max_workers: int) -> None:
+    """
+    Set how many blocking operations run at once; the current pool,
+    if any, is shut down (after its work, without waiting for it)
+    for one of the new size
+    """
+    _io_pool.set_max_workers(max_workers)
+
+
+def set_max_kdf_workers(max_workers: int) -> None:
+    """
+    Set how many key derivations run at once, see `set_max_workers`
+    """
+    _kdf_pool.set_max_workers(max_workers)
+
+
+def shutdown() -> None:
+    """
+    Shut the pools down, after their work, and close the connections
+    their threads kept open; others are made if they're needed again
+    """
+    _kdf_pool.shutdown()
+    _io_pool.shutdown()
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Call func in the executor, returning its result when it's done
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def run_kdf(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Call func, which derives a key (e.g. unlocks a locker), in the
+    key derivation executor, returning its result when it's done
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_kdf_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+@asynccontextmanager
+async def _one_thread(name: str) -> AsyncIterator[Callable[..., Awaitable]]:
+    """
+    For the `with` block, a coroutine function that calls a function
+    in a thread of its own, the same one every time, for storage that
+    ties what it makes to the thread it's made in (e.g. a transaction,
+    or `SqliteStorage`'s connection per thread)
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+    loop = asyncio.get_running_loop()
+
+    async def run(func: Callable[..., T], *args, **kwargs) -> T:
+        return await loop.run_in_executor(
+            executor, functools.partial(func, *args, **kwargs)
+        )
+
+    try:
+        yield run
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def _chunks(
+        chunks: Iterator[bytes], run: Callable[..., Awaitable] = None
+) -> AsyncIterator[bytes]:
+    """
+    An iterator of chunks read one at a time, by `run` (see
+    `_one_thread`) if it's given, otherwise in a thread of its own:
+    all in one thread, as the iterator may use what's tied to the
+    thread it began in
+    """
+    async with AsyncExitStack() as stack:
+        if run is None:
+            run = await stack.enter_async_context(
+                _one_thread('phibes-chunks')
+            )
+        done = object()
+        try:
+            while True:
+                chunk = await run(next, chunks, done)
+                if chunk is done:
+                    return
+                yield chunk
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                await run(close)
+
+
+async def _chunks_inline(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+class AsyncStorageImpl(object):
+    """
+    A `StorageImpl`, its operations awaitable
+    """
+
+    def __init__(self, storage: StorageImpl):
+        self.storage = storage
+        # in a `transaction`, what runs its operations, see `_one_thread`
+        self._pinned = None
+
+    async def _run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        if self._pinned is not None:
+            return await self._pinned(func, *args, **kwargs)
+        if self.storage.blocking:
+            return await run_blocking(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    async def get(self) -> dict:
+        return await self._run(self.storage.get)
+
+    async def create(self, pw_hash: str, salt: str, crypt_id: str):
+        return await self._run(
+            self.storage.create, pw_hash=pw_hash, salt=salt, crypt_id=crypt_id
+        )
+
+    async def delete(self) -> None:
+        return await self._run(self.storage.delete)
+
+    async def get_item(self, item_id: str) -> dict:
+        """
+        The item dict, its body read along with it (not when it's used)
+        """
+        return await self._run(
+            lambda: dict(self.storage.get_item(item_id=item_id))
+        )
+
+    async def get_item_header(self, item_id: str) -> dict:
+        return await self._run(self.storage.get_item_header, item_id)
+
+    async def list_items(self) -> list:
+        return await self._run(lambda: list(self.storage.list_items()))
+
+    async def list_item_info(self) -> dict:
+        return await self._run(self.storage.list_item_info)
+
+    async def add_item(self, item_id: str, item_rec: dict) -> int:
+        return await self._run(self.storage.add_item, item_id, item_rec)
+
+    async def save_item(
+            self, item_id: str, item_rec: dict, replace: bool = False
+    ) -> int:
+        return await self._run(
+            self.storage.save_item, item_id, item_rec, replace=replace
+        )
+
+    async def delete_item(self, item_id: str) -> None:
+        return await self._run(self.storage.delete_item, item_id)
+
+    async def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        The item dicts, their bodies read along with them
+        """
+        return await self._run(lambda: {
+            item_id: dict(rec)
+            for item_id, rec in self.storage.get_items(list(item_ids)).items()
+        })
+
+    async def save_items(
+            self, item_recs: dict, replace: bool = False
+    ) -> dict:
+        return await self._run(
+            self.storage.save_items, item_recs, replace=replace
+        )
+
+    async def delete_items(self, item_ids: Iterable[str]) -> None:
+        return await self._run(self.storage.delete_items, list(item_ids))
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """
+        As `StorageImpl.transaction`, for the operations awaited on this
+        object in the `async with` block; they run in one thread of their
+        own, as the transaction begins & ends there, since storage ties
+        a transaction to its thread (e.g. its connection, or group commit)
+        """
+        if self._pinned is not None or not self.storage.blocking:
+            transaction = self.storage.transaction()
+            await self._run(transaction.__enter__)
+            try:
+                yield
+            except BaseException:
+                if not await self._run(transaction.__exit__, *sys.exc_info()):
+                    raise
+            else:
+                await self._run(transaction.__exit__, None, None, None)
+            return
+        async with _one_thread('phibes-transaction') as run:
+            self._pinned = run
+            try:
+                async with self.transaction():
+                    yield
+            finally:
+                self._pinned = None
+
+    async def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        """
+        As `StorageImpl.save_item_chunks`; chunks is iterated as they're
+        written, in the thread they're written in
+        """
+        return await self._run(
+            self.storage.save_item_chunks, item_id, item_rec, chunks,
+            replace=replace
+        )
+
+    async def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[AsyncIterator[bytes]]]:
+        """
+        As `StorageImpl.get_item_chunks`, each chunk read as it's awaited
+        """
+        rec, chunks = await self._run(
+            self.storage.get_item_chunks, item_id, chunk_size
+        )
+        if chunks is None:
+            return rec, None
+        if self._pinned is None and not self.storage.blocking:
+            # nothing to wait for, but the iterator is async all the same
+            return rec, _chunks_inline(chunks)
+        return rec, _chunks(chunks, self._pinned)
+
+    async def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        return await self._run(
+            self.storage.get_item_range, item_id, offset, length
+        )
+
+    async def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        return await self._run(
+            self.storage.append_item, item_id, encrypt_at, timestamp
+        )
@@ -0,0 +1,294 @@
+"""
+Read-through cache of locker & item records, for any storage
+
+`CachingStorage` wraps a `StorageImpl`, keeping the records it reads
+in a `RecordCache`, a bounded LRU shared by all the storage objects
+(one is made per operation). A cached record is used only if the
+backend's `record_stamp` for it (e.g. the file's size & mtime) is
+unchanged since it was read, so changes made some other way, by other
+processes or by hand, are seen; records of backends with no stamp
+aren't cached.
+
+The cache is off until `set_cache` is given one; then models wrap
+their storage with it.
+"""
+# Built-in library packages
+from __future__ import annotations
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+from typing import (
+    Callable, Hashable, Iterable, Iterator, Optional, Tuple
+)
+
+# Third party packages
+# In-project modules
+from phibes.storage.storage_impl import StorageImpl
+
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class RecordCache(object):
+    """
+    Records by key, with the stamp they were read at, the least recently
+    used dropped beyond `max_entries`; and counts of lookups that found
+    a current record (hits) or didn't (misses)
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError(f"invalid {max_entries=}")
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Tuple, stamp: Optional[Hashable]) -> Optional[dict]:
+        """
+        Copy of the record for key, if it's cached at stamp
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if stamp is None or entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: Tuple, stamp: Optional[Hashable], rec: dict) -> None:
+        if stamp is None:
+            return
+        with self._lock:
+            self._entries[key] = (stamp, dict(rec))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, key: Tuple) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_scope(self, scope: Tuple) -> None:
+        """
+        Drop the records of a locker, see `CachingStorage.scope`
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == scope]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries
+            }
+
+
+_cache = None
+
+
+def get_cache() -> Optional[RecordCache]:
+    return _cache
+
+
+def set_cache(cache: Optional[RecordCache]) -> Optional[RecordCache]:
+    """
+    Cache the records of the storage models make from now on in `cache`,
+    or with None, stop caching
+    :return: the cache it replaces
+    """
+    global _cache
+    previous, _cache = _cache, cache
+    return previous
+
+
+class CachingStorage(StorageImpl):
+    """
+    A `StorageImpl`, its locker & item records read through a cache
+    """
+
+    def __init__(self, storage: StorageImpl, cache: RecordCache = None):
+        self.storage = storage
+        if cache is None:
+            cache = get_cache()
+        self.cache = RecordCache() if cache is None else cache
+
+    def __getattr__(self, name: str):
+        # backend-specific attributes, e.g. `locker_path`
+        return getattr(self.storage, name)
+
+    @property
+    def blocking(self) -> bool:
+        return self.storage.blocking
+
+    @property
+    def scope(self) -> Tuple:
+        """
+        Identifies the locker, for the cache: among lockers of this
+        store type, in this store path
+        """
+        return (
+            type(self.storage).__name__,
+            str(getattr(self.storage, 'store_path', '')),
+            getattr(self.storage, 'locker_id', None)
+        )
+
+    def _read(self, item_id: Optional[str], read: Callable[[], dict]) -> dict:
+        key = (self.scope, item_id)
+        # stamped before reading, so a change meanwhile isn't missed later
+        stamp = self.storage.record_stamp(item_id)
+        rec = self.cache.get(key, stamp)
+        if rec is None:
+            rec = dict(read())
+            self.cache.put(key, stamp, rec)
+        return rec
+
+    def _evict(self, item_ids: Iterable[str]) -> None:
+        for item_id in item_ids:
+            self.cache.evict((self.scope, item_id))
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        return self.storage.record_stamp(item_id)
+
+    def get(self) -> dict:
+        return self._read(None, self.storage.get)
+
+    def create(self, pw_hash: str, salt: str, crypt_id: str):
+        self.cache.evict_scope(self.scope)
+        return self.storage.create(
+            pw_hash=pw_hash, salt=salt, crypt_id=crypt_id
+        )
+
+    def delete(self) -> None:
+        try:
+            return self.storage.delete()
+        finally:
+            self.cache.evict_scope(self.scope)
+
+    def get_item(self, item_id: str) -> dict:
+        """
+        The item dict, from the cache if it's current there
+        (read whole, including its body, to be cached)
+        """
+        return self._read(
+            item_id, lambda: self.storage.get_item(item_id=item_id)
+        )
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        The item dicts, those not current in the cache read together
+        """
+        recs = {}
+        missed = {}
+        for item_id in item_ids:
+            stamp = self.storage.record_stamp(item_id)
+            recs[item_id] = self.cache.get((self.scope, item_id), stamp)
+            if recs[item_id] is None:
+                missed[item_id] = stamp
+        if missed:
+            for item_id, rec in self.storage.get_items(missed).items():
+                recs[item_id] = dict(rec)
+                self.cache.put((self.scope, item_id), missed[item_id], rec)
+        return recs
+
+    def get_item_header(self, item_id: str) -> dict:
+        return self.storage.get_item_header(item_id=item_id)
+
+    def list_items(self) -> list:
+        return self.storage.list_items()
+
+    def list_item_info(self) -> dict:
+        return self.storage.list_item_info()
+
+    def add_item(self, item_id: str, item_rec: dict) -> int:
+        return self.save_item(item_id=item_id, item_rec=item_rec)
+
+    def save_item(
+            self, item_id: str, item_rec: dict, replace: bool = False
+    ) -> int:
+        try:
+            return self.storage.save_item(
+                item_id=item_id, item_rec=item_rec, replace=replace
+            )
+        finally:
+            self._evict([item_id])
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        try:
+            return self.storage.save_items(
+                item_recs=item_recs, replace=replace
+            )
+        finally:
+            self._evict(item_recs)
+
+    def delete_item(self, item_id: str) -> None:
+        try:
+            return self.storage.delete_item(item_id=item_id)
+        finally:
+            self._evict([item_id])
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        item_ids = list(item_ids)
+        try:
+            return self.storage.delete_items(item_ids=item_ids)
+        finally:
+            self._evict(item_ids)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self.storage.transaction():
+            yield
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        try:
+            return self.storage.save_item_chunks(
+                item_id=item_id, item_rec=item_rec, chunks=chunks,
+                replace=replace
+            )
+        finally:
+            self._evict([item_id])
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        return self.storage.get_item_chunks(
+            item_id=item_id, chunk_size=chunk_size
+        )
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        return self.storage.get_item_range(
+            item_id=item_id, offset=offset, length=length
+        )
+
+    def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        try:
+            return self.storage.append_item(
+                item_id=item_id, encrypt_at=encrypt_at, timestamp=timestamp
+            )
+        finally:
+            self._evict([item_id])
@@ -0,0 +1,250 @@
+"""
+dbm storage: each locker is a key-value file of the standard library's
+`dbm`, which uses the first of gdbm, ndbm & its own "dumb" format
+available (and whichever made an existing file)
+
+Values are records serialized by `phibes_file.pack`, so getting an item
+is one hashed lookup. The file is opened for each operation: gdbm
+allows only one writer to have it open, so it isn't held between them.
+"""
+
+# Built-in library packages
+from __future__ import annotations
+import dbm
+from datetime import datetime
+import io
+from pathlib import Path
+from typing import Hashable, Iterable, Optional
+
+# Third party packages
+
+# In-project modules
+from phibes.lib import phibes_file
+from phibes.lib.errors import PhibesExistsError
+from phibes.lib.errors import PhibesNotFoundError
+
+# In-package modules
+from .storage_impl import check_version, StorageImpl
+
+
+DBM_FILE_EXT = 'dbm'
+# locker_ids are urlsafe base64, which has no '.'
+DEFAULT_DBM_NAME = 'locker.default'
+# keys: the locker record, and the item records (by item_id)
+LOCKER_KEY = b"locker"
+ITEM_KEY_PREFIX = b"item:"
+# what the dbm implementations add to the name of the file(s) they make
+DBM_FILE_SUFFIXES = ('', '.db', '.dat', '.dir', '.pag')
+
+
+def item_key(item_id: str) -> bytes:
+    return ITEM_KEY_PREFIX + item_id.encode('utf-8')
+
+
+class DbmStorage(StorageImpl):
+    """
+    Each locker is a dbm file "<locker_id>.dbm" in the store path
+    (some dbm implementations add their own extensions to it)
+    """
+
+    # module whose `open` makes & opens the files
+    dbm_impl = dbm
+
+    def __init__(self, locker_id: str = None, **kwargs):
+        super(DbmStorage, self).__init__(**kwargs)
+        self.store_path = Path(kwargs['store_path'])
+        self.locker_id = locker_id
+
+    @property
+    def dbm_path(self) -> Path:
+        name = (self.locker_id, DEFAULT_DBM_NAME)[self.locker_id is None]
+        return self.store_path / f"{name}.{DBM_FILE_EXT}"
+
+    def exists(self) -> bool:
+        return dbm.whichdb(str(self.dbm_path)) is not None
+
+    def open(self, flag: str = 'r'):
+        """
+        Open the locker's file, see `dbm.open`
+        """
+        if not self.exists():
+            raise PhibesNotFoundError(f'file: {self.dbm_path}')
+        return self.dbm_impl.open(str(self.dbm_path), flag)
+
+    def get(self) -> dict:
+        """
+        Get a stored Locker record
+        """
+        with self.open() as db:
+            rec = phibes_file.unpack(db[LOCKER_KEY])
+        rec['path'] = self.dbm_path
+        return rec
+
+    def create(self, pw_hash: str, salt: str, crypt_id: str) -> dict:
+        """
+        Create a Locker record in storage
+
+        @param pw_hash: Hashed password, for auth, of new locker
+        @param salt: Encryption salt for locker
+        @param crypt_id: ID of the crypt_impl used by locker
+        @return: record for newly persisted locker
+        """
+        if self.exists():
+            raise PhibesExistsError(f'file: {self.dbm_path}')
+        record = phibes_file.pack(
+            salt=salt,
+            crypt_id=crypt_id,
+            timestamp=str(datetime.now()),
+            body=pw_hash
+        )
+        with self.dbm_impl.open(str(self.dbm_path), 'n') as db:
+            db[LOCKER_KEY] = b"".join(record)
+        return self.get()
+
+    def delete(self) -> None:
+        """
+        Delete a locker, removing its file(s)
+        """
+        if not self.exists():
+            raise PhibesNotFoundError(f'file: {self.dbm_path}')
+        for pth in self.store_path.glob(f"{self.dbm_path.name}*"):
+            pth.unlink()
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        The identity, size & times of change of the locker's file(s),
+        which any write changes: the stamp of every record in it
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's no file
+        """
+        stamp = []
+        for suffix in DBM_FILE_SUFFIXES:
+            try:
+                stat = Path(f"{self.dbm_path}{suffix}").stat()
+            except FileNotFoundError:
+                continue
+            stamp.append((
+                suffix, stat.st_ino, stat.st_size, stat.st_mtime_ns,
+                stat.st_ctime_ns
+            ))
+        return tuple(stamp) or None
+
+    def get_item(self, item_id: str) -> dict:
+        """
+        Attempts to find and return a named item in the locker.
+        Raises an exception of item isn't found
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict
+        """
+        with self.open() as db:
+            data = db.get(item_key(item_id))
+        if data is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        return phibes_file.unpack(data)
+
+    def list_items(self) -> list:
+        """
+        Return a list of the IDs of Items in this locker
+        :return:
+        """
+        with self.open() as db:
+            keys = db.keys()
+        return [
+            key[len(ITEM_KEY_PREFIX):].decode('utf-8') for key in keys
+            if key.startswith(ITEM_KEY_PREFIX)
+        ]
+
+    def save_item(
+            self, item_id: str, item_rec: dict, replace: bool = False
+    ) -> int:
+        """
+        Saves the item to the locker
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, and for a replacement,
+            optionally the `version` it's replacing
+        @param replace: Whether this is replacing an existing item
+        @return: version of the saved item
+        """
+        return self.save_items({item_id: item_rec}, replace=replace)[item_id]
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        """
+        Saves a number of items to the locker, with the file opened once
+        (none are saved, if any can't be)
+        @param item_recs: item dicts (see `save_item`), by item_id
+        @param replace: Whether these are replacing existing items
+        @return: versions of the saved items, by item_id
+        """
+        versions = {}
+        records = {}
+        with self.open('w') as db:
+            for item_id, item_rec in item_recs.items():
+                if not item_rec['_ciphertext']:
+                    raise AttributeError("Record has no content!")
+                data = db.get(item_key(item_id))
+                if data is not None and not replace:
+                    raise PhibesExistsError(
+                        f"{self.locker_id}:{item_id} exists"
+                    )
+                if replace and data is None:
+                    raise PhibesNotFoundError(f"{item_id} not found")
+                version = 1
+                if data is not None:
+                    current = phibes_file.record_version(io.BytesIO(data))
+                    check_version(item_id, item_rec.get('version'), current)
+                    version = current + 1
+                versions[item_id] = version
+                records[item_key(item_id)] = b"".join(phibes_file.pack(
+                    salt=item_rec['salt'],
+                    crypt_id=item_rec['crypt_id'],
+                    timestamp=item_rec['timestamp'],
+                    body=item_rec['_ciphertext'],
+                    version=version
+                ))
+            for key, data in records.items():
+                db[key] = data
+        return versions
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        Finds a number of items in the locker, with the file opened once
+        @param item_ids: IDs of items - encryptions of the item_names
+        @return: the item dicts, by item_id
+        """
+        recs = {}
+        with self.open() as db:
+            for item_id in item_ids:
+                data = db.get(item_key(item_id))
+                if data is None:
+                    raise PhibesNotFoundError(f"{item_id} not found")
+                recs[item_id] = phibes_file.unpack(data)
+        return recs
+
+    def add_item(self, item_id: str, item_rec: dict) -> int:
+        return self.save_item(item_id, item_rec)
+
+    def delete_item(self, item_id: str) -> None:
+        """
+        Deletes the item from the locker
+        @param item_id: Encrypted item locker_id
+        @return: None
+        """
+        self.delete_items([item_id])
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        """
+        Deletes a number of items from the locker, with the file opened
+        once (none are deleted, if any isn't found)
+        @param item_ids: Item locker_ids - encrypted by caller
+        @return: None
+        """
+        keys = [item_key(item_id) for item_id in dict.fromkeys(item_ids)]
+        with self.open('w') as db:
+            for key in keys:
+                if key not in db:
+                    raise PhibesNotFoundError(
+                        f"{key[len(ITEM_KEY_PREFIX):].decode('utf-8')}"
+                        " not found"
+                    )
+            for key in keys:
+                del db[key]
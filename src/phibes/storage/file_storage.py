@@ -3,32 +3,77 @@ A Locker is a storage unit for user secrets (passwords, etc.)
 A Locker is represented by a file "<locker_id>.lck" on the local file system.
 A Locker has other data on the file system, but that file
 (which contains the single access credentials) is the requisite bit.
+
+Beside the item files, a manifest records each item's metadata
+(see `storage_impl.item_info`), so the items can be listed without
+reading them. It's kept with the locker directory's inode & mtime,
+so it's used as it is while the directory's unchanged since; otherwise
+some files were added, removed or replaced some other way, and entries
+are checked against the item files (each kept with its file's inode,
+size & mtime), and only files changed since are read. Item files are
+replaced whole (see `phibes_file.write`), which changes the directory;
+a file changed in place some other way isn't noticed.
+The manifest's written only on save & delete, updating just the entries
+of the items saved or deleted (and only if it can be, it's not needed
+to read a locker), in place: it's only an index, rebuilt if a crash
+leaves it unreadable.
+
+Processes sharing a locker coordinate through locks (see `locks`) on
+a lock file: readers hold it shared, any number at once, and writers
+exclusive, one at a time. With `lock_items` set, writers of different
+items go ahead at once instead: each holds the locker shared and its
+item's lock (in a `.locks` directory) exclusive, as readers of the item
+hold it shared, and only the manifest's update is made one at a time,
+under a lock of its own there; the manifest is then updated as it
+stands, rather than checked against the directory first, so in that
+mode items are only to be changed through the locker.
+Lock files are made by `create` and by writers; readers lock only
+those that exist (and can be opened), so reading a locker never
+changes it.
 """
 
 # Built-in library packages
 from __future__ import annotations
 
 from abc import ABC
+from contextlib import contextmanager, ExitStack, nullcontext
 from datetime import datetime
+import json
+import os
 from pathlib import Path
 import shutil
+from typing import (
+    Callable, Hashable, Iterable, Iterator, List, Optional, Tuple
+)
+import zlib
 
 # Third party packages
 
 # In-project modules
+from phibes.lib import locks
 from phibes.lib import phibes_file
 from phibes.lib.errors import PhibesConfigurationError
 from phibes.lib.errors import PhibesExistsError
 from phibes.lib.errors import PhibesNotFoundError
 
 # In-package modules
-from .storage_impl import StorageImpl
+from .storage_impl import item_info, StorageImpl
 
 
 LOCKER_FILE = "locker.config"
 ITEM_FILE_EXT = 'cry'
+MANIFEST_FILE = "items.manifest"
+MANIFEST_VERSION = 3
+LOCK_FILE = "locker.lock"
+ITEM_LOCKS_DIR = ".locks"
+MANIFEST_LOCK_FILE = ".manifest.lock"
 EXEMPT_FILES = ['.phibes.cfg']
 
+# manifests last read or written by this process, by path: with the
+# manifest file's stamp, so one unchanged since isn't parsed again,
+# its entries & the directory's stamp, see `_read_manifest`
+_manifests = {}
+
 
 def can_create(locker_path: Path, remove_if_empty=True) -> bool:
     """
@@ -58,6 +103,9 @@ def can_create(locker_path: Path, remove_if_empty=True) -> bool:
 
 class LockerFileStorage(StorageImpl, ABC):
 
+    # writers of different items go ahead at once, see the module docstring
+    lock_items = False
+
     def __init__(self, locker_id: str = None, **kwargs):
         super(LockerFileStorage, self).__init__(**kwargs)
         self.store_path = Path(kwargs['store_path'])
@@ -77,17 +125,320 @@ class LockerFileStorage(StorageImpl, ABC):
     def locker_file(self):
         return self.locker_path / LOCKER_FILE
 
+    @property
+    def manifest_file(self):
+        return self.locker_path / MANIFEST_FILE
+
+    @property
+    def lock_file(self):
+        return self.locker_path / LOCK_FILE
+
+    def item_path(self, item_id: str) -> Path:
+        return self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
+
+    def item_lock_path(self, item_id: str) -> Path:
+        return self.locker_path / ITEM_LOCKS_DIR / f"{item_id}.lock"
+
+    @property
+    def manifest_lock_file(self):
+        # item_ids don't start with a dot, so it's no item's lock
+        return self.locker_path / ITEM_LOCKS_DIR / MANIFEST_LOCK_FILE
+
+    @contextmanager
+    def _locked(
+            self, pth: Path, mode: str, create: bool = False
+    ) -> Iterator[None]:
+        """
+        Hold the lock file at pth for the `with` block, see `locks.locked`;
+        there's nothing to lock if the locker's directory doesn't exist
+        :param create: make the lock file (for a writer) if it's missing
+        """
+        if not self.locker_path.is_dir():
+            yield
+            return
+        if create:
+            pth.parent.mkdir(exist_ok=True)
+        with locks.locked(pth, mode, create=create):
+            yield
+
+    @contextmanager
+    def _reading(self, item_id: str = None) -> Iterator[None]:
+        """
+        Locks held to read the locker, or (with `lock_items`) an item in it
+        """
+        with self._locked(self.lock_file, locks.SHARED):
+            if item_id is None or not self.lock_items:
+                yield
+            else:
+                with self._locked(
+                        self.item_lock_path(item_id), locks.SHARED
+                ):
+                    yield
+
+    @contextmanager
+    def _writing(self, mode: str = locks.EXCLUSIVE) -> Iterator[None]:
+        """
+        The locker's lock, held by a writer
+        """
+        with self._locked(self.lock_file, mode, create=True):
+            yield
+
+    @property
+    def _dir_stamp(self) -> List[int]:
+        """
+        The locker directory's identity & mtime, which changes as files
+        are added, removed or replaced (see `phibes_file.write`) in it
+        """
+        stat = self.locker_path.stat()
+        return [stat.st_ino, stat.st_mtime_ns]
+
+    def _read_manifest(self) -> Tuple[dict, Optional[List[int]]]:
+        """
+        The manifest's entries, (info, file stamp) by item_id, and the
+        directory's stamp when it was written; or none & None if it's
+        missing or unreadable
+        One unchanged since it was last read or written here isn't
+        parsed again, see `_manifests`
+        """
+        pth = self.manifest_file
+        try:
+            with self._reading_manifest():
+                # stamped before reading, so a change meanwhile isn't missed
+                stamp = self._file_stamp(pth)
+                kept = _manifests.get(pth)
+                if kept is None or kept[0] != stamp:
+                    manifest = json.loads(pth.read_text())
+                    if manifest['version'] != MANIFEST_VERSION:
+                        return {}, None
+                    kept = _manifests[pth] = (
+                        stamp, manifest['items'], manifest['dir']
+                    )
+            return {
+                item_id: (dict(info), stamp)
+                for item_id, (info, stamp) in kept[1].items()
+            }, kept[2]
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return {}, None
+
+    def _current_manifest(self) -> dict:
+        """
+        The manifest's entries, if the directory is unchanged since
+        it was written; otherwise, they're checked against the item
+        files, see `_scan_manifest`
+        """
+        stored, dir_stamp = self._read_manifest()
+        try:
+            if dir_stamp is not None and dir_stamp == self._dir_stamp:
+                return stored
+        except FileNotFoundError:
+            return {}
+        return self._scan_manifest(stored)
+
+    def manifest(self) -> dict:
+        """
+        Metadata of the locker's items by item_id, from the manifest
+        where it's current with the item files, see `_current_manifest`
+        """
+        return {
+            item_id: info
+            for item_id, (info, stamp) in self._current_manifest().items()
+        }
+
+    @contextmanager
+    def _reading_manifest(self) -> Iterator[None]:
+        """
+        With `lock_items`, the manifest's lock held while it's read,
+        so it's not read half written
+        """
+        if not self.lock_items:
+            yield
+            return
+        with self._locked(self.manifest_lock_file, locks.SHARED):
+            yield
+
+    def _scan_manifest(self, entries: dict) -> dict:
+        """
+        Entries of the locker's item files: those of `entries` kept where
+        the file is unchanged, the others read from the files
+        """
+        scanned = {}
+        ext_len = len(ITEM_FILE_EXT) + 1
+        for item_path in self.locker_path.glob(f"*.{ITEM_FILE_EXT}"):
+            item_id = item_path.name[0:-ext_len]
+            entry = self._item_entry(item_id, entries.get(item_id))
+            if entry is not None:
+                scanned[item_id] = entry
+        return scanned
+
+    def _item_entry(
+            self, item_id: str, entry: Tuple[dict, List[int]] = None
+    ) -> Optional[Tuple[dict, List[int]]]:
+        """
+        The item's manifest entry: `entry` if it's current with the file,
+        otherwise read from it; None if there's no file
+        """
+        item_path = self.item_path(item_id)
+        try:
+            # stamped before reading, so a change meanwhile isn't missed
+            stamp = self._file_stamp(item_path)
+            if entry is not None and list(entry[1]) == stamp:
+                return entry
+            rec, chunks = phibes_file.read_chunks(item_path)
+        except FileNotFoundError:
+            return None
+        if chunks is None:
+            info = item_info(rec['timestamp'], rec['body'])
+        else:
+            # the body is only checksummed, never held whole
+            info = item_info(rec['timestamp'], b"")
+            for chunk in chunks:
+                info['size'] += len(chunk)
+                info['checksum'] = zlib.crc32(chunk, info['checksum'])
+        return info, stamp
+
+    @staticmethod
+    def _file_stamp(pth: Path) -> List[int]:
+        stat = pth.stat()
+        return [stat.st_ino, stat.st_size, stat.st_mtime_ns]
+
+    def _write_manifest(self, entries: dict) -> None:
+        """
+        Write the manifest, if it can be written; otherwise, it's left
+        to be brought up to date when read
+        """
+        pth = self.manifest_file
+        items = {
+            item_id: [info, stamp]
+            for item_id, (info, stamp) in entries.items()
+        }
+        try:
+            # made first, so it's not a change to the directory after this;
+            # and its mtime is now, to the filesystem's clock
+            pth.touch()
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'dir': self._unchanged_since(pth.stat().st_mtime_ns),
+                'items': items
+            }
+            pth.write_text(json.dumps(manifest))
+            _manifests[pth] = (self._file_stamp(pth), items, manifest['dir'])
+        except OSError:
+            _manifests.pop(pth, None)
+
+    def _unchanged_since(self, now: int) -> Optional[List[int]]:
+        """
+        The directory's stamp, to tell if it's been changed after `now`
+        (an mtime in ns): if it was last changed at the same tick of the
+        filesystem's clock as now (a change to come may be, too),
+        its mtime is set back first, so that's told apart;
+        None if it can't be
+        """
+        stat = self.locker_path.stat()
+        if stat.st_mtime_ns < now:
+            return [stat.st_ino, stat.st_mtime_ns]
+        try:
+            os.utime(self.locker_path, ns=(stat.st_atime_ns, now - 1))
+        except OSError:
+            return None
+        return self._dir_stamp
+
+    @contextmanager
+    def _updating_manifest(
+            self, *item_ids: str, in_place: bool = False
+    ) -> Iterator[dict]:
+        """
+        The manifest's entries of the items, to be changed, or removed,
+        along with the item files in the `with` block, under the locks
+        for writing them; the manifest is written with them after it
+        (if the block raises, with the entries of those items' files,
+        as some may have been changed)
+        Only the items' files are read, unless the directory's been
+        changed some other way since the manifest was written, see
+        `_current_manifest`.
+        With `lock_items`, if `in_place`, the item is changed in place,
+        with the locker locked exclusive, so it's not read by another
+        process with the change half made
+        """
+        with ExitStack() as stack:
+            if not self.lock_items:
+                stack.enter_context(self._writing())
+                stored = self._current_manifest()
+            else:
+                stack.enter_context(self._writing(
+                    locks.EXCLUSIVE if in_place else locks.SHARED
+                ))
+                # in one order, so writers of overlapping items don't
+                # deadlock
+                for item_id in sorted(set(item_ids)):
+                    stack.enter_context(self._locked(
+                        self.item_lock_path(item_id), locks.EXCLUSIVE,
+                        create=True
+                    ))
+                stored = self._read_manifest()[0]
+            items = {}
+            for item_id in item_ids:
+                entry = self._item_entry(item_id, stored.get(item_id))
+                if entry is not None:
+                    items[item_id] = entry[0]
+            done = False
+            try:
+                yield items
+                done = True
+            finally:
+                if self.lock_items:
+                    # as other items' writers may have updated it meanwhile
+                    updating = self._locked(
+                        self.manifest_lock_file, locks.EXCLUSIVE, create=True
+                    )
+                else:
+                    updating = nullcontext()
+                with updating:
+                    if self.lock_items:
+                        stored = self._read_manifest()[0]
+                    for item_id in item_ids:
+                        stored.pop(item_id, None)
+                        if not done:
+                            entry = self._item_entry(item_id)
+                            if entry is not None:
+                                stored[item_id] = entry
+                        elif item_id in items:
+                            stored[item_id] = (
+                                items[item_id],
+                                self._file_stamp(self.item_path(item_id))
+                            )
+                    self._write_manifest(stored)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Storage operations in the `with` block are synced to disk
+        together at its end, see `phibes_file.group_commit`
+        (each is still saved as it's made), with the locker locked
+        for writing throughout
+        """
+        mode = locks.SHARED if self.lock_items else locks.EXCLUSIVE
+        with self._writing(mode), phibes_file.group_commit():
+            yield
+
+    def list_item_info(self) -> dict:
+        """
+        Metadata of the Items in this locker, by item_id, from the manifest
+        """
+        with self._reading():
+            return self.manifest()
+
     def get(self) -> dict:
         """
         Get a stored Locker from file
         @return: LockerFileStorage instance
         """
-        if not self.locker_file.exists():
-            raise PhibesNotFoundError(f'file: {self.locker_file}')
-        else:
-            rec = phibes_file.read(self.locker_file)
-            rec['lock_file'] = self.locker_file
-            rec['path'] = self.locker_path
+        with self._reading():
+            if not self.locker_file.exists():
+                raise PhibesNotFoundError(f'file: {self.locker_file}')
+            else:
+                rec = phibes_file.read(self.locker_file)
+                rec['lock_file'] = self.locker_file
+                rec['path'] = self.locker_path
         return rec
 
     def create(self, pw_hash: str, salt: str, crypt_id: str) -> dict:
@@ -108,6 +459,8 @@ class LockerFileStorage(StorageImpl, ABC):
         else:
             if not can_create(self.locker_path, remove_if_empty=False):
                 raise ValueError(f"could not create {self.locker_path}")
+        # for writers & readers alike, see the module docstring
+        self.lock_file.touch()
         try:
             self.get()
         except PhibesNotFoundError:
@@ -126,11 +479,19 @@ class LockerFileStorage(StorageImpl, ABC):
         """
         Delete a locker
         """
-        item_ids = self.list_items()
-        for id in item_ids:
-            self.delete_item(item_id=id)
-        # Delete the locker file
-        self.locker_file.unlink()
+        with self._writing():
+            item_ids = self.list_items()
+            for id in item_ids:
+                self.item_path(id).unlink()
+            if self.manifest_file.exists():
+                self.manifest_file.unlink()
+            shutil.rmtree(
+                self.locker_path / ITEM_LOCKS_DIR, ignore_errors=True
+            )
+            # Delete the locker file
+            self.locker_file.unlink()
+            # released as the file's closed, after its removal
+            self.lock_file.unlink()
         # Delete the locker folder if it is a named one for the locker
         if self.locker_id:
             shutil.rmtree(
@@ -143,55 +504,242 @@ class LockerFileStorage(StorageImpl, ABC):
         Attempts to find and return a named item in the locker.
         Raises an exception of item isn't found
         @param item_id: ID of item - encryption of the item_name
-        @return: the item dict
+        @return: the item record, a mapping
         """
         item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
-        if item_path.exists():
-            return phibes_file.read(item_path)
-        else:
-            raise PhibesNotFoundError(f"{item_id} not found")
+        with self._reading(item_id):
+            if item_path.exists():
+                # the body is only read if it's used
+                return phibes_file.read_lazy(item_path)
+            else:
+                raise PhibesNotFoundError(f"{item_id} not found")
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        Finds a number of items in the locker, under one lock
+        @param item_ids: IDs of items - encryptions of the item_names
+        @return: the item records (see `get_item`), by item_id
+        """
+        recs = {}
+        with self._reading():
+            for item_id in item_ids:
+                with self._reading(item_id):
+                    try:
+                        recs[item_id] = phibes_file.read_lazy(
+                            self.item_path(item_id)
+                        )
+                    except FileNotFoundError:
+                        raise PhibesNotFoundError(f"{item_id} not found")
+        return recs
 
     def list_items(self) -> list:
         """
         Return a list of Items of the specified type in this locker
         :return:
         """
-        items = []
-        item_gen = self.locker_path.glob(f"*.{ITEM_FILE_EXT}")
-        ext_len = len(ITEM_FILE_EXT) + 1
-        for item_path in [it for it in item_gen]:
-            stored_name = item_path.name[0:-ext_len]
-            items.append(stored_name)
-        return items
+        with self._reading():
+            return list(self.manifest())
 
     def save_item(
             self, item_id: str, item_rec: dict, replace: bool = False
-    ) -> None:
+    ) -> int:
         """
         Saves the item to the locker
+        The file is created exclusively, or replaced under a lock,
+        checking its version, see `phibes_file.write`
         @param item_id: Encrypted item locker_id
-        @param item_rec: contents of item
+        @param item_rec: contents of item, and for a replacement,
+            optionally the `version` it's replacing
         @param replace: Whether this is replacing an existing item
-        @return: None
+        @return: version of the saved item
+        """
+        with self._updating_manifest(item_id) as items:
+            return self._write_item(items, item_id, item_rec, replace)
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        """
+        Saves a number of items to the locker, under one lock,
+        with one update of the manifest, synced to disk together
+        @param item_recs: item dicts (see `save_item`), by item_id
+        @param replace: Whether these are replacing existing items
+        @return: versions of the saved items, by item_id
+        """
+        with self.transaction(), self._updating_manifest(
+                *item_recs
+        ) as items:
+            return {
+                item_id: self._write_item(items, item_id, item_rec, replace)
+                for item_id, item_rec in item_recs.items()
+            }
+
+    def _write_item(
+            self, items: dict, item_id: str, item_rec: dict, replace: bool
+    ) -> int:
+        """
+        Write the item's file, see `save_item`, and its manifest entry
+        to `items`
         """
         try:
-            self.get_item(item_id=item_id)
-            if not replace:
-                raise PhibesExistsError(f"{self.locker_id}:{item_id} exists")
-        except PhibesNotFoundError as err:
-            if replace:
-                raise err
+            version = phibes_file.write(
+                pth=self.item_path(item_id),
+                salt=item_rec['salt'],
+                crypt_id=item_rec['crypt_id'],
+                timestamp=item_rec['timestamp'],
+                body=item_rec['_ciphertext'],
+                replace=replace,
+                expect_version=item_rec.get('version') if replace else None
+            )
+        except FileExistsError:
+            raise PhibesExistsError(f"{self.locker_id}:{item_id} exists")
+        except FileNotFoundError:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        items[item_id] = item_info(
+            item_rec['timestamp'], item_rec['_ciphertext']
+        )
+        return version
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        """
+        Saves the item to the locker, writing the body chunk by chunk
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, without `_ciphertext`
+        @param chunks: successive parts of the encrypted body
+        @param replace: Whether this is replacing an existing item
+        @return: None
+        """
         item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
-        phibes_file.write(
-            pth=item_path,
-            salt=item_rec['salt'],
-            crypt_id=item_rec['crypt_id'],
-            timestamp=item_rec['timestamp'],
-            body=item_rec['_ciphertext'],
-            overwrite=replace
+        checksum = 0
+
+        def checksummed():
+            nonlocal checksum
+            for chunk in chunks:
+                checksum = zlib.crc32(chunk, checksum)
+                yield chunk
+
+        with self._updating_manifest(item_id) as items:
+            try:
+                size = phibes_file.write_chunks(
+                    pth=item_path,
+                    salt=item_rec['salt'],
+                    crypt_id=item_rec['crypt_id'],
+                    timestamp=item_rec['timestamp'],
+                    chunks=checksummed(),
+                    replace=replace
+                )
+            except FileExistsError:
+                raise PhibesExistsError(f"{self.locker_id}:{item_id} exists")
+            except FileNotFoundError:
+                raise PhibesNotFoundError(f"{item_id} not found")
+            items[item_id] = {
+                'timestamp': item_rec['timestamp'],
+                'size': size,
+                'checksum': checksum
+            }
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        The record's file's identity, size & times of change
+        (a replacement is a new file, an append changes the size)
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's no file
+        """
+        pth = self.locker_file if item_id is None else self.item_path(item_id)
+        try:
+            stat = pth.stat()
+        except FileNotFoundError:
+            return None
+        return (
+            stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
         )
 
-    def add_item(self, item_id: str, item_rec: dict) -> None:
+    def get_item_header(self, item_id: str) -> dict:
+        """
+        Finds a named item in the locker, reading only its fields
+        before the body
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict without `body`
+        """
+        item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
+        with self._reading(item_id):
+            if not item_path.exists():
+                raise PhibesNotFoundError(f"{item_id} not found")
+            return phibes_file.read(item_path, with_body=False)
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        """
+        Finds a named item in the locker, reading the body as it's consumed
+        @param item_id: ID of item - encryption of the item_name
+        @param chunk_size: most bytes per chunk
+        @return: the item dict without `body` & iterator of body chunks,
+            or, for a text-layout file, the complete dict & None
+        """
+        item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
+        with self._reading(item_id):
+            if not item_path.exists():
+                raise PhibesNotFoundError(f"{item_id} not found")
+            return phibes_file.read_chunks(item_path, chunk_size=chunk_size)
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        """
+        Finds a named item in the locker, reading only part of the body
+        @param item_id: ID of item - encryption of the item_name
+        @param offset: position in the body of the first byte to read
+        @param length: most bytes to read, fewer past the end of the body
+        @return: the item dict without `body` & the body bytes in range,
+            or, for a text-layout file, the complete dict & None
+        """
+        item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
+        with self._reading(item_id):
+            if not item_path.exists():
+                raise PhibesNotFoundError(f"{item_id} not found")
+            return phibes_file.read_range(item_path, offset, length)
+
+    def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        """
+        Appends to the body of a stored item, writing only the new bytes
+        @param item_id: Encrypted item locker_id
+        @param encrypt_at: given the current body length,
+            returns the encrypted bytes to append
+        @param timestamp: replacement timestamp
+        @return: new body length, or None for a text-layout file
+        """
+        item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
+        added = []
+
+        def encrypt_and_keep(offset: int) -> bytes:
+            added.append(encrypt_at(offset))
+            return added[-1]
+
+        with self._updating_manifest(item_id, in_place=True) as items:
+            try:
+                new_length = phibes_file.append(
+                    item_path, encrypt_and_keep, timestamp
+                )
+            except FileNotFoundError:
+                raise PhibesNotFoundError(f"{item_id} not found")
+            if new_length is not None:
+                info = items[item_id]
+                info['timestamp'] = timestamp
+                info['size'] = new_length
+                info['checksum'] = zlib.crc32(added[0], info['checksum'])
+        return new_length
+
+    def add_item(self, item_id: str, item_rec: dict) -> int:
         return self.save_item(item_id, item_rec)
 
     def delete_item(self, item_id: str) -> None:
@@ -200,5 +748,29 @@ class LockerFileStorage(StorageImpl, ABC):
         @param item_id: Encrypted item locker_id
         @return: None
         """
-        item_path = self.locker_path / f"{item_id}.{ITEM_FILE_EXT}"
-        item_path.unlink()
+        with self._updating_manifest(item_id) as items:
+            self._remove_item(items, item_id)
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        """
+        Deletes a number of items from the locker, under one lock,
+        with one update of the manifest, synced to disk together
+        @param item_ids: Item locker_ids - encrypted by caller
+        @return: None
+        """
+        item_ids = list(item_ids)
+        with self.transaction(), self._updating_manifest(
+                *item_ids
+        ) as items:
+            for item_id in item_ids:
+                self._remove_item(items, item_id)
+
+    def _remove_item(self, items: dict, item_id: str) -> None:
+        item_path = self.item_path(item_id)
+        try:
+            item_path.unlink()
+        except FileNotFoundError:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        items.pop(item_id, None)
+        # for the directory's sync
+        phibes_file.get_fsync_policy().written(item_path)
@@ -3,14 +3,20 @@ In-memory storage implementation (for demo/development only)
 """
 # Built-in library packages
 from datetime import datetime
+from itertools import count
+from typing import Hashable, Optional
 
-from phibes.crypto import default_id
+from phibes.crypto import get_default_id
 from phibes.lib.errors import PhibesExistsError
 from phibes.lib.errors import PhibesNotFoundError
-from phibes.storage.storage_impl import StorageImpl
+from phibes.storage.storage_impl import check_version, StorageImpl
 
 
 mock_lockers = {}
+# a stamp for each record, from one count, new whenever it's written:
+# by (locker_id, item_id), None for the locker's record
+mock_stamps = {}
+_writes = count(1)
 
 
 class MemoryStorage(StorageImpl):
@@ -19,6 +25,8 @@ class MemoryStorage(StorageImpl):
     in memory for the duration of a scripted run.
     """
 
+    blocking = False
+
     def __init__(self, locker_id: str = None, **kwargs):
         super(MemoryStorage, self).__init__(**kwargs)
         self.locker_id = locker_id
@@ -37,9 +45,10 @@ class MemoryStorage(StorageImpl):
         return rec
 
     def create(
-            self, pw_hash: str, salt: str, crypt_id: str = default_id
+            self, pw_hash: str, salt: str, crypt_id: str = None
     ):
         global mock_lockers
+        crypt_id = crypt_id or get_default_id()
         if self.locker_id in mock_lockers:
             raise PhibesExistsError(f'locker {self.locker_id} already exists')
         mock_lockers[self.locker_id] = {
@@ -49,6 +58,7 @@ class MemoryStorage(StorageImpl):
             "timestamp": str(datetime.now()),
             "items": {}
         }
+        mock_stamps[(self.locker_id, None)] = next(_writes)
 
     def delete(self):
         global mock_lockers
@@ -59,8 +69,24 @@ class MemoryStorage(StorageImpl):
                 f'{err=}\n'
                 f'{mock_lockers=}'
             )
+        for key in [key for key in mock_stamps if key[0] == self.locker_id]:
+            del mock_stamps[key]
         return
 
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        A count of the writes made here, taken when the record was last
+        written
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's no record
+        """
+        locker = mock_lockers.get(self.locker_id)
+        if locker is None or (
+                item_id is not None and item_id not in locker['items']
+        ):
+            return None
+        return mock_stamps.get((self.locker_id, item_id))
+
     def get_item(self, item_id: str):
         try:
             return mock_lockers[self.locker_id]['items'][item_id]
@@ -81,25 +107,31 @@ class MemoryStorage(StorageImpl):
 
     def save_item(
             self, item_id: str, item_rec: dict, replace: bool = False
-    ):
-        exists = item_id in mock_lockers[self.locker_id]['items']
-        if exists:
+    ) -> int:
+        current = mock_lockers[self.locker_id]['items'].get(item_id)
+        if current is not None:
             if not replace:
                 raise PhibesExistsError(
                     f'{item_id=} already exists in {self.locker_id=}'
                 )
+            check_version(
+                item_id, item_rec.get('version'), current['version']
+            )
         else:
             if replace:
                 raise PhibesNotFoundError(
                     f'{item_id=} does not exist in {self.locker_id=}'
                 )
+        version = 1 if current is None else current['version'] + 1
         mock_lockers[self.locker_id]['items'][item_id] = {
             'salt': item_rec['salt'],
             'crypt_id': item_rec['crypt_id'],
             'timestamp': item_rec['timestamp'],
-            'body': item_rec['_ciphertext']
+            'body': item_rec['_ciphertext'],
+            'version': version
         }
-        return mock_lockers[self.locker_id]['items'][item_id]
+        mock_stamps[(self.locker_id, item_id)] = next(_writes)
+        return version
 
     def create_item(
             self,
@@ -133,7 +165,7 @@ class MemoryStorage(StorageImpl):
         }
         return self.save_item(item_id=item_id, item_rec=rec, replace=True)
 
-    def add_item(self, item_id: str, item_rec: dict) -> None:
+    def add_item(self, item_id: str, item_rec: dict) -> int:
         return self.save_item(item_id, item_rec)
 
     def delete_item(self, item_id: str):
@@ -143,3 +175,4 @@ class MemoryStorage(StorageImpl):
                 f'{item_id=} does not exist in {self.locker_id=}'
             )
         del mock_lockers[self.locker_id]['items'][item_id]
+        mock_stamps.pop((self.locker_id, item_id), None)
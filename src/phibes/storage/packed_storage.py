@@ -0,0 +1,748 @@
+"""
+Packed-file storage: a whole locker in one append-only segment file
+
+Records (in the `phibes_file` layouts) are appended to the segment and
+never rewritten there: an update appends a newer record, a delete appends
+a tombstone, and `compact` drops the records they superseded.
+Beside the segment, an index file maps each item_id to the offset
+& length of its current record, so a get, list, add or delete takes
+the same few system calls however many items the locker holds.
+The index is append-only too, and is rebuilt from the segment whenever
+it's missing or doesn't account for all of it, so the segment is the
+only file that needs backing up.
+
+Processes sharing a locker coordinate through locks (see `locks`) on a
+lock file beside the segment: readers hold it shared, and writers
+(appends, compaction and repairs of the index) exclusive, so a read
+never sees an entry half appended, and a save's version check & append
+are made as one. A reader finding the index out of date rebuilds it in
+memory only; an entry left partly written by a crash is cut off the
+segment by the next writer.
+
+Segment: SEGMENT_MAGIC, then entries, each an ENTRY
+(op, item_id length, record length), the item_id and the record.
+Index: INDEX_MAGIC, then entries, each an INDEX_ENTRY
+(op, item_id length, record offset, record length) and the item_id.
+All lengths & offsets are unsigned big-endian.
+"""
+
+# Built-in library packages
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+import os
+from pathlib import Path
+import struct
+import threading
+from typing import BinaryIO, Hashable, Iterable, Iterator, List, Optional
+from typing import Tuple, Union
+
+# Third party packages
+
+# In-project modules
+from phibes.lib import locks
+from phibes.lib import phibes_file
+from phibes.lib.errors import PhibesExistsError
+from phibes.lib.errors import PhibesNotFoundError
+
+# In-package modules
+from .storage_impl import check_version, StorageImpl
+
+
+PACK_FILE_EXT = 'pack'
+INDEX_FILE_EXT = 'pidx'
+LOCK_FILE_EXT = 'plock'
+# locker_ids are urlsafe base64, which has no '.'
+DEFAULT_PACK_NAME = 'locker.default'
+SEGMENT_MAGIC = b"\x00PHIBESPACK\x01"
+INDEX_MAGIC = b"\x00PHIBESPIDX\x01"
+ENTRY = struct.Struct(">BHQ")
+INDEX_ENTRY = struct.Struct(">BHQQ")
+OP_LOCKER = 0
+OP_PUT = 1
+OP_DELETE = 2
+
+# Indexes already read, by index file path; see `PackedFileStorage.index`
+_indexes = {}
+# readers in different threads may bring the same index up to date
+_indexes_lock = threading.Lock()
+
+
+def _index_entry(op: int, item_id: str, offset: int, length: int) -> bytes:
+    key = item_id.encode('utf-8')
+    return INDEX_ENTRY.pack(op, len(key), offset, length) + key
+
+
+def _copy(src: BinaryIO, dest: BinaryIO, length: int) -> None:
+    while length:
+        chunk = src.read(min(phibes_file.CHUNK_BYTES, length))
+        if not chunk:
+            raise ValueError(f"truncated record {src.name}")
+        length -= dest.write(chunk)
+
+
+def _iter_open(
+        seg: BinaryIO, offset: int, length: int, chunk_size: int
+) -> Iterator[bytes]:
+    """
+    Chunks of the `length` bytes at `offset` in the open segment,
+    read as they're consumed (from the file as it was opened, even if
+    it's since been compacted), closing it after
+    """
+    with seg:
+        seg.seek(offset)
+        while length:
+            chunk = seg.read(min(chunk_size, length))
+            if not chunk:
+                raise ValueError(f"truncated record {seg.name}")
+            length -= len(chunk)
+            yield chunk
+
+
+class PackIndex(object):
+    """
+    A locker's index, as read into memory
+    """
+
+    def __init__(self):
+        # (offset, length) of the locker record
+        self.locker = None
+        # item_id: (offset, length) of its current record
+        self.items = {}
+        # size of the segment the index accounts for
+        self.end = len(SEGMENT_MAGIC)
+        # bytes of the segment holding current entries
+        self.live = 0
+        # which index file was read, and how much of it
+        self.file_id = None
+        self.size = 0
+
+    @property
+    def dead(self) -> int:
+        """
+        Bytes of the segment holding superseded entries & tombstones
+        """
+        return self.end - len(SEGMENT_MAGIC) - self.live
+
+    def apply(self, op: int, item_id: str, offset: int, length: int) -> None:
+        """
+        Account for a segment entry, its record at `offset`
+        """
+        overhead = ENTRY.size + len(item_id.encode('utf-8'))
+        if op == OP_LOCKER:
+            self.locker = (offset, length)
+            self.live += overhead + length
+        else:
+            old = self.items.pop(item_id, None)
+            if old is not None:
+                self.live -= overhead + old[1]
+            if op == OP_PUT:
+                self.items[item_id] = (offset, length)
+                self.live += overhead + length
+        self.end = offset + length
+
+    def read(self, data: bytes) -> int:
+        """
+        Apply the index entries in `data`
+        :return: bytes used, fewer than all when the last entry is partial
+        """
+        pos = 0
+        while pos + INDEX_ENTRY.size <= len(data):
+            op, key_len, offset, length = INDEX_ENTRY.unpack_from(data, pos)
+            key_start = pos + INDEX_ENTRY.size
+            if key_start + key_len > len(data):
+                break
+            item_id = data[key_start:key_start + key_len].decode('utf-8')
+            self.apply(op, item_id, offset, length)
+            pos = key_start + key_len
+        return pos
+
+
+class PackedFileStorage(StorageImpl):
+    """
+    Each locker is a segment file "<locker_id>.pack" with its index
+    "<locker_id>.pidx", both directly in the store path
+    """
+
+    # Compaction runs once superseded entries take more space
+    # than current ones, and more than this
+    compact_min_bytes = 2 ** 20
+
+    def __init__(self, locker_id: str = None, **kwargs):
+        super(PackedFileStorage, self).__init__(**kwargs)
+        self.store_path = Path(kwargs['store_path'])
+        self.locker_id = locker_id
+
+    @property
+    def pack_path(self) -> Path:
+        name = (self.locker_id, DEFAULT_PACK_NAME)[self.locker_id is None]
+        return self.store_path / f"{name}.{PACK_FILE_EXT}"
+
+    @property
+    def index_path(self) -> Path:
+        return self.pack_path.with_suffix(f".{INDEX_FILE_EXT}")
+
+    @property
+    def lock_path(self) -> Path:
+        return self.pack_path.with_suffix(f".{LOCK_FILE_EXT}")
+
+    @contextmanager
+    def _reading(self) -> Iterator[None]:
+        """
+        The locker's lock, held shared by a reader (if there's a lock
+        file: it's made by writers)
+        """
+        with locks.locked(self.lock_path, locks.SHARED, create=False):
+            yield
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """
+        The locker's lock, held exclusive by a writer
+        """
+        with locks.locked(self.lock_path, locks.EXCLUSIVE):
+            yield
+
+    @property
+    def index(self) -> PackIndex:
+        """
+        The locker's index, as a reader has it, see `_index`
+        """
+        return self._index()
+
+    def _index(self, repair: bool = False) -> PackIndex:
+        """
+        The locker's index, with any entries added to the index file since
+        it was last read; rebuilt if the file doesn't match the segment
+        :param repair: for a writer, with the locker locked exclusive:
+            a rebuilt index replaces the file, and the segment is cut
+            back to its last whole entry
+        """
+        with _indexes_lock:
+            return self._load_index(repair)
+
+    def _load_index(self, repair: bool) -> PackIndex:
+        try:
+            segment_size = self.pack_path.stat().st_size
+        except FileNotFoundError:
+            raise PhibesNotFoundError(f'file: {self.pack_path}')
+        index = _indexes.get(self.index_path)
+        try:
+            stat = self.index_path.stat()
+        except FileNotFoundError:
+            return self._rebuild_index(repair)
+        file_id = (stat.st_dev, stat.st_ino)
+        if index is None or index.file_id != file_id or (
+                index.size > stat.st_size
+        ):
+            index = PackIndex()
+            index.file_id = file_id
+        if index.size < stat.st_size:
+            with self.index_path.open('rb') as idx:
+                idx.seek(index.size)
+                data = idx.read()
+            if not index.size:
+                if not data.startswith(INDEX_MAGIC):
+                    return self._rebuild_index(repair)
+                index.size = len(INDEX_MAGIC)
+                data = data[len(INDEX_MAGIC):]
+            index.size += index.read(data)
+        if index.end != segment_size:
+            return self._rebuild_index(repair)
+        _indexes[self.index_path] = index
+        return index
+
+    def _rebuild_index(self, repair: bool = False) -> PackIndex:
+        """
+        Index the segment from its entry headers
+        An entry that was only partly written (the last) is left out, and
+        if `repair`, cut off, and the index file replaced; otherwise
+        it's kept only for this read
+        """
+        index = PackIndex()
+        entries = [INDEX_MAGIC]
+        with self.pack_path.open(('rb', 'r+b')[repair]) as seg:
+            if seg.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                raise ValueError(f"not a packed locker {self.pack_path}")
+            size = seg.seek(0, os.SEEK_END)
+            pos = len(SEGMENT_MAGIC)
+            while pos + ENTRY.size <= size:
+                seg.seek(pos)
+                op, key_len, length = ENTRY.unpack(seg.read(ENTRY.size))
+                offset = pos + ENTRY.size + key_len
+                if op not in (OP_LOCKER, OP_PUT, OP_DELETE) or (
+                        offset + length > size
+                ):
+                    break
+                item_id = seg.read(key_len).decode('utf-8')
+                entries.append(_index_entry(op, item_id, offset, length))
+                index.apply(op, item_id, offset, length)
+                pos = offset + length
+            if not repair:
+                return index
+            if pos != size:
+                seg.truncate(pos)
+        return self._replace_index(index, b"".join(entries))
+
+    def _replace_index(self, index: PackIndex, data: bytes) -> PackIndex:
+        tmp_path = Path(f"{self.index_path}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, self.index_path)
+        stat = self.index_path.stat()
+        index.file_id = (stat.st_dev, stat.st_ino)
+        index.size = len(data)
+        _indexes[self.index_path] = index
+        return index
+
+    def _append(
+            self,
+            index: PackIndex,
+            entries: List[Tuple[int, str, List[Union[bytes, memoryview]]]]
+    ) -> None:
+        """
+        Add entries (op, item_id, record) to the end of the segment,
+        then to the index
+        """
+        if not entries:
+            return
+        committed = []
+        with self.pack_path.open('r+b') as seg:
+            seg.seek(index.end)
+            for op, item_id, record in entries:
+                key = item_id.encode('utf-8')
+                length = sum(memoryview(part).nbytes for part in record)
+                seg.write(ENTRY.pack(op, len(key), length))
+                seg.write(key)
+                committed.append((op, item_id, seg.tell(), length))
+                for part in record:
+                    seg.write(part)
+        self._commit(index, committed)
+
+    def _commit(
+            self, index: PackIndex, entries: List[Tuple[int, str, int, int]]
+    ) -> None:
+        """
+        Add entries (op, item_id, offset, length), written to the segment,
+        to the index
+        """
+        # the segment is the record of changes, the index can be rebuilt
+        phibes_file.get_fsync_policy().written(self.pack_path)
+        data = b"".join(_index_entry(*entry) for entry in entries)
+        with self.index_path.open('ab') as idx:
+            idx.write(data)
+        index.size += len(data)
+        for entry in entries:
+            index.apply(*entry)
+        if index.dead > max(index.live, self.compact_min_bytes):
+            self._compact(index)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Storage operations in the `with` block are synced to disk
+        together at its end, see `phibes_file.group_commit`
+        (each is still saved as it's made), with the locker locked
+        for writing throughout
+        """
+        with self._writing(), phibes_file.group_commit():
+            yield
+
+    def _read_record(self, location: Tuple[int, int]) -> bytes:
+        offset, length = location
+        with self.pack_path.open('rb') as seg:
+            seg.seek(offset)
+            return seg.read(length)
+
+    def _locate(self, item_id: str) -> Tuple[int, int]:
+        location = self.index.items.get(item_id)
+        if location is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        return location
+
+    def compact(self) -> None:
+        """
+        Rewrite the segment with only the current entries,
+        and a new index for it
+        """
+        with self._writing():
+            self._compact(self._index(repair=True))
+
+    def _compact(self, index: PackIndex) -> None:
+        new_index = PackIndex()
+        entries = [INDEX_MAGIC]
+        current = [('', OP_LOCKER, index.locker)] + [
+            (item_id, OP_PUT, location)
+            for item_id, location in index.items.items()
+        ]
+        tmp_path = Path(f"{self.pack_path}.tmp")
+        with self.pack_path.open('rb') as seg, tmp_path.open('wb') as out:
+            out.write(SEGMENT_MAGIC)
+            for item_id, op, (offset, length) in current:
+                key = item_id.encode('utf-8')
+                out.write(ENTRY.pack(op, len(key), length))
+                out.write(key)
+                new_offset = out.tell()
+                seg.seek(offset)
+                _copy(seg, out, length)
+                entries.append(_index_entry(op, item_id, new_offset, length))
+                new_index.apply(op, item_id, new_offset, length)
+        # with no index file, a crash between the replacements
+        # means the index is rebuilt, not that it's wrong
+        self.index_path.unlink()
+        os.replace(tmp_path, self.pack_path)
+        phibes_file.get_fsync_policy().written(self.pack_path)
+        self._replace_index(new_index, b"".join(entries))
+
+    def get(self) -> dict:
+        """
+        Get a stored Locker from its segment
+        """
+        with self._reading():
+            index = self.index
+            if index.locker is None:
+                raise PhibesNotFoundError(f'file: {self.pack_path}')
+            rec = phibes_file.unpack(self._read_record(index.locker))
+        rec['path'] = self.pack_path
+        return rec
+
+    def create(self, pw_hash: str, salt: str, crypt_id: str) -> dict:
+        """
+        Create a Locker record in storage
+
+        @param pw_hash: Hashed password, for auth, of new locker
+        @param salt: Encryption salt for locker
+        @param crypt_id: ID of the crypt_impl used by locker
+        @return: record for newly persisted locker
+        """
+        record = phibes_file.pack(
+            salt=salt,
+            crypt_id=crypt_id,
+            timestamp=str(datetime.now()),
+            body=pw_hash
+        )
+        with self._writing():
+            try:
+                with self.pack_path.open('xb') as seg:
+                    seg.write(SEGMENT_MAGIC)
+                    seg.write(
+                        ENTRY.pack(OP_LOCKER, 0, sum(map(len, record)))
+                    )
+                    for part in record:
+                        seg.write(part)
+            except FileExistsError as err:
+                raise PhibesExistsError(err)
+            self._rebuild_index(repair=True)
+        return self.get()
+
+    def delete(self) -> None:
+        """
+        Delete a locker
+        """
+        with self._writing():
+            if not self.pack_path.exists():
+                raise PhibesNotFoundError(f'file: {self.pack_path}')
+            _indexes.pop(self.index_path, None)
+            if self.index_path.exists():
+                self.index_path.unlink()
+            self.pack_path.unlink()
+            # released as the file's closed, after its removal
+            self.lock_path.unlink()
+
+    def get_item(self, item_id: str) -> dict:
+        """
+        Attempts to find and return a named item in the locker.
+        Raises an exception of item isn't found
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict
+        """
+        with self._reading():
+            return phibes_file.unpack(
+                self._read_record(self._locate(item_id))
+            )
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        Finds a number of items in the locker, read in the order
+        they're in the segment, with it opened once
+        @param item_ids: IDs of items - encryptions of the item_names
+        @return: the item dicts, by item_id
+        """
+        recs = {}
+        with self._reading():
+            located = {
+                item_id: self._locate(item_id) for item_id in item_ids
+            }
+            with self.pack_path.open('rb') as seg:
+                for item_id, (offset, length) in sorted(
+                        located.items(), key=lambda found: found[1]
+                ):
+                    seg.seek(offset)
+                    recs[item_id] = phibes_file.unpack(seg.read(length))
+        return {item_id: recs[item_id] for item_id in located}
+
+    def list_items(self) -> list:
+        """
+        Return a list of the IDs of Items in this locker
+        :return:
+        """
+        with self._reading():
+            return list(self.index.items)
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        Where the record is in the segment (each save is appended),
+        and which index locates it (a compaction makes a new one)
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's no record
+        """
+        try:
+            with self._reading():
+                index = self.index
+        except PhibesNotFoundError:
+            return None
+        if item_id is None:
+            location = index.locker
+        else:
+            location = index.items.get(item_id)
+        if location is None:
+            return None
+        return index.file_id, location
+
+    def _next_version(
+            self,
+            index: PackIndex,
+            item_id: str,
+            replace: bool,
+            expected: Optional[int] = None
+    ) -> int:
+        """
+        Version for a save of the item, after checking it can be saved
+        """
+        location = index.items.get(item_id)
+        if location is not None and not replace:
+            raise PhibesExistsError(f"{self.locker_id}:{item_id} exists")
+        if replace and location is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        if location is None:
+            return 1
+        with self.pack_path.open('rb') as seg:
+            seg.seek(location[0])
+            current = phibes_file.record_version(seg)
+        check_version(item_id, expected, current)
+        return current + 1
+
+    def save_item(
+            self, item_id: str, item_rec: dict, replace: bool = False
+    ) -> int:
+        """
+        Saves the item to the locker
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, and for a replacement,
+            optionally the `version` it's replacing
+        @param replace: Whether this is replacing an existing item
+        @return: version of the saved item
+        """
+        with self._writing():
+            index = self._index(repair=True)
+            version, record = self._put_record(
+                index, item_id, item_rec, replace
+            )
+            self._append(index, [(OP_PUT, item_id, record)])
+        return version
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        """
+        Saves a number of items to the locker, appended to the segment
+        together (none are, if any can't be saved)
+        @param item_recs: item dicts (see `save_item`), by item_id
+        @param replace: Whether these are replacing existing items
+        @return: versions of the saved items, by item_id
+        """
+        versions = {}
+        entries = []
+        with self._writing():
+            index = self._index(repair=True)
+            for item_id, item_rec in item_recs.items():
+                versions[item_id], record = self._put_record(
+                    index, item_id, item_rec, replace
+                )
+                entries.append((OP_PUT, item_id, record))
+            self._append(index, entries)
+        return versions
+
+    def _put_record(
+            self, index: PackIndex, item_id: str, item_rec: dict,
+            replace: bool
+    ) -> Tuple[int, List[Union[bytes, memoryview]]]:
+        """
+        Version & packed record for a save of the item
+        """
+        version = self._next_version(
+            index, item_id, replace, item_rec.get('version')
+        )
+        if not item_rec['_ciphertext']:
+            raise AttributeError("Record has no content!")
+        return version, phibes_file.pack(
+            salt=item_rec['salt'],
+            crypt_id=item_rec['crypt_id'],
+            timestamp=item_rec['timestamp'],
+            body=item_rec['_ciphertext'],
+            version=version
+        )
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        """
+        Saves the item to the locker, writing the body chunk by chunk
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, without `_ciphertext`
+        @param chunks: successive parts of the encrypted body
+        @param replace: Whether this is replacing an existing item
+        @return: None
+        """
+        with self._writing():
+            index = self._index(repair=True)
+            version = self._next_version(index, item_id, replace)
+            chunks = iter(chunks)
+            first = next((chunk for chunk in chunks if len(chunk)), None)
+            if first is None:
+                raise AttributeError("Record has no content!")
+            # the record as `pack` would have it, less the body
+            header = phibes_file.pack(
+                salt=item_rec['salt'],
+                crypt_id=item_rec['crypt_id'],
+                timestamp=item_rec['timestamp'],
+                body=b"",
+                version=version
+            )[0]
+            key = item_id.encode('utf-8')
+            with self.pack_path.open('r+b') as seg:
+                start = seg.seek(index.end)
+                offset = start + ENTRY.size + len(key)
+                try:
+                    seg.write(ENTRY.pack(OP_PUT, len(key), 0))
+                    seg.write(key)
+                    seg.write(header)
+                    seg.write(phibes_file.BODY_LEN.pack(0))
+                    body_length = 0
+                    for chunk in chain([first], chunks):
+                        body_length += seg.write(chunk)
+                except BaseException:
+                    seg.truncate(start)
+                    raise
+                # the lengths aren't known until the end
+                length = (
+                    len(header) + phibes_file.BODY_LEN.size + body_length
+                )
+                seg.seek(start)
+                seg.write(ENTRY.pack(OP_PUT, len(key), length))
+                seg.seek(offset + len(header))
+                seg.write(phibes_file.BODY_LEN.pack(body_length))
+            self._commit(index, [(OP_PUT, item_id, offset, length)])
+
+    def get_item_header(self, item_id: str) -> dict:
+        """
+        Finds a named item in the locker, reading only its fields
+        before the body
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict without `body`
+        """
+        with self._reading():
+            location = self._locate(item_id)
+            with self.pack_path.open('rb') as seg:
+                seg.seek(location[0])
+                header = phibes_file.read_header(seg)
+            if header is None:
+                rec = phibes_file.unpack(self._read_record(location))
+                del rec['body']
+                return rec
+        return header[0]
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        """
+        Finds a named item in the locker, reading the body as it's consumed
+        @param item_id: ID of item - encryption of the item_name
+        @param chunk_size: most bytes per chunk
+        @return: the item dict without `body` & iterator of body chunks,
+            or, for a text-layout record, the complete dict & None
+        """
+        with self._reading():
+            location = self._locate(item_id)
+            seg = self.pack_path.open('rb')
+            try:
+                seg.seek(location[0])
+                header = phibes_file.read_header(seg)
+                if header is None:
+                    seg.close()
+                    return phibes_file.unpack(
+                        self._read_record(location)
+                    ), None
+            except BaseException:
+                seg.close()
+                raise
+        rec, length = header
+        # read from the segment opened under the lock
+        return rec, _iter_open(seg, seg.tell(), length, chunk_size)
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        """
+        Finds a named item in the locker, reading only part of the body
+        @param item_id: ID of item - encryption of the item_name
+        @param offset: position in the body of the first byte to read
+        @param length: most bytes to read, fewer past the end of the body
+        @return: the item dict without `body` & the body bytes in range,
+            or, for a text-layout record, the complete dict & None
+        """
+        if offset < 0 or length < 0:
+            raise ValueError(f"invalid range {offset=} {length=}")
+        with self._reading():
+            location = self._locate(item_id)
+            with self.pack_path.open('rb') as seg:
+                seg.seek(location[0])
+                header = phibes_file.read_header(seg)
+                if header is None:
+                    return phibes_file.unpack(
+                        self._read_record(location)
+                    ), None
+                rec, body_length = header
+                if offset >= body_length:
+                    return rec, b""
+                seg.seek(offset, os.SEEK_CUR)
+                return rec, seg.read(min(length, body_length - offset))
+
+    def add_item(self, item_id: str, item_rec: dict) -> int:
+        return self.save_item(item_id, item_rec)
+
+    def delete_item(self, item_id: str) -> None:
+        """
+        Deletes the item from the locker, by appending a tombstone
+        @param item_id: Encrypted item locker_id
+        @return: None
+        """
+        self.delete_items([item_id])
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        """
+        Deletes a number of items from the locker, appending their
+        tombstones together (none are, if any isn't found)
+        @param item_ids: Item locker_ids - encrypted by caller
+        @return: None
+        """
+        entries = []
+        with self._writing():
+            index = self._index(repair=True)
+            for item_id in dict.fromkeys(item_ids):
+                if item_id not in index.items:
+                    raise PhibesNotFoundError(f"{item_id} not found")
+                entries.append((OP_DELETE, item_id, []))
+            self._append(index, entries)
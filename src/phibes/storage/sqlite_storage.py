@@ -0,0 +1,557 @@
+"""
+SQLite storage: every locker in one database file in the store path
+
+The database is in WAL mode, so any number of readers (processes or
+threads) query it alongside a writer. Writes can be grouped with
+`transaction`, which commits once for the whole group.
+Where sqlite3 has incremental blob I/O (Python 3.11+), bodies are
+streamed in & out of the database rather than held whole.
+"""
+
+# Built-in library packages
+from __future__ import annotations
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+import sqlite3
+import tempfile
+import threading
+from typing import Callable, Hashable, Iterable, Iterator, Optional, Tuple
+
+# Third party packages
+
+# In-project modules
+from phibes.lib.phibes_file import CHUNK_BYTES
+from phibes.lib.errors import PhibesExistsError
+from phibes.lib.errors import PhibesNotFoundError
+
+# In-package modules
+from .storage_impl import check_version, StorageImpl
+
+
+DB_FILE_NAME = 'lockers.sqlite3'
+# most item_ids in one query, under SQLite's (older) limit of parameters
+BATCH_SIZE = 500
+# locker_ids are urlsafe base64, which has no '.'
+DEFAULT_LOCKER_ID = 'locker.default'
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockers (
+    locker_id TEXT PRIMARY KEY,
+    salt TEXT NOT NULL,
+    crypt_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    locker_id TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    crypt_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    body BLOB NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (locker_id, item_id)
+);
+CREATE INDEX IF NOT EXISTS items_timestamp ON items (locker_id, timestamp);
+CREATE INDEX IF NOT EXISTS lockers_timestamp ON lockers (timestamp);
+"""
+
+# Open connections, by database path, for each thread
+# (a storage object is made per operation, so they're kept here)
+_local = threading.local()
+# and all of them, with their threads, to be closed, see `close_connections`
+_open = []
+_open_lock = threading.Lock()
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    """
+    This thread's connection to the database at db_path,
+    which is set up on first use
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(db_path)
+    if conn is None:
+        # those of threads since ended won't be used again
+        close_connections(stale=True)
+        # transactions are begun explicitly, see `transaction`;
+        # only used by this thread, but closed by whichever finds it stale
+        conn = sqlite3.connect(
+            str(db_path), isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode, still durable at each checkpoint & crash-safe
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(items)")]
+        if 'version' not in columns:
+            # made before items were versioned
+            conn.execute(
+                "ALTER TABLE items"
+                " ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+        connections[db_path] = conn
+        with _open_lock:
+            _open.append((threading.current_thread(), db_path, conn))
+    return conn
+
+
+def close_connections(db_path: Path = None, stale: bool = False) -> int:
+    """
+    Close this thread's connections to the database at db_path
+    (to any database, if None), or with `stale`, those of threads
+    that have ended, e.g. the workers of a pool that was shut down;
+    a thread connects again when it next needs to
+    :return: how many were closed
+    """
+    current = threading.current_thread()
+    with _open_lock:
+        closing = [
+            entry for entry in _open
+            if (db_path is None or entry[1] == db_path) and (
+                not entry[0].is_alive() if stale else entry[0] is current
+            )
+        ]
+        _open[:] = [entry for entry in _open if entry not in closing]
+    connections = getattr(_local, 'connections', {})
+    for thread, pth, conn in closing:
+        if thread is current:
+            connections.pop(pth, None)
+        conn.close()
+    return len(closing)
+
+
+class SqliteStorage(StorageImpl):
+
+    def __init__(self, locker_id: str = None, **kwargs):
+        super(SqliteStorage, self).__init__(**kwargs)
+        self.store_path = Path(kwargs['store_path'])
+        self.locker_id = locker_id
+
+    @property
+    def db_path(self) -> Path:
+        return self.store_path / DB_FILE_NAME
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return connect(self.db_path)
+
+    def close(self) -> None:
+        """
+        Close this thread's connection to the database, if it has one
+        """
+        close_connections(self.db_path)
+
+    @property
+    def key(self) -> str:
+        """
+        The locker's key in the database
+        """
+        return (self.locker_id, DEFAULT_LOCKER_ID)[self.locker_id is None]
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Storage operations in the `with` block are one transaction,
+        committed at the end of the outermost block, or rolled back
+        if it raises.
+        """
+        conn = self.connection
+        if conn.in_transaction:
+            yield
+            return
+        # take the write lock now, rather than fail to upgrade to it later
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def get(self) -> dict:
+        """
+        Get a stored Locker record
+        """
+        row = self.connection.execute(
+            "SELECT salt, crypt_id, timestamp, body FROM lockers"
+            " WHERE locker_id = ?",
+            (self.key,)
+        ).fetchone()
+        if row is None:
+            raise PhibesNotFoundError(f'locker {self.key} in {self.db_path}')
+        rec = dict(zip(('salt', 'crypt_id', 'timestamp', 'body'), row))
+        rec['path'] = self.db_path
+        return rec
+
+    def create(self, pw_hash: str, salt: str, crypt_id: str) -> dict:
+        """
+        Create a Locker record in storage
+
+        @param pw_hash: Hashed password, for auth, of new locker
+        @param salt: Encryption salt for locker
+        @param crypt_id: ID of the crypt_impl used by locker
+        @return: record for newly persisted locker
+        """
+        try:
+            with self.transaction():
+                self.connection.execute(
+                    "INSERT INTO lockers VALUES (?, ?, ?, ?, ?)",
+                    (self.key, salt, crypt_id, str(datetime.now()), pw_hash)
+                )
+        except sqlite3.IntegrityError as err:
+            raise PhibesExistsError(f'locker {self.key} {err}')
+        return self.get()
+
+    def delete(self) -> None:
+        """
+        Delete a locker, and its items
+        """
+        with self.transaction():
+            deleted = self.connection.execute(
+                "DELETE FROM lockers WHERE locker_id = ?", (self.key,)
+            )
+            if not deleted.rowcount:
+                raise PhibesNotFoundError(
+                    f'locker {self.key} in {self.db_path}'
+                )
+            self.connection.execute(
+                "DELETE FROM items WHERE locker_id = ?", (self.key,)
+            )
+
+    def get_item(self, item_id: str) -> dict:
+        """
+        Attempts to find and return a named item in the locker.
+        Raises an exception of item isn't found
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict
+        """
+        row = self.connection.execute(
+            "SELECT salt, crypt_id, timestamp, body, version FROM items"
+            " WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        ).fetchone()
+        if row is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        return dict(
+            zip(('salt', 'crypt_id', 'timestamp', 'body', 'version'), row)
+        )
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        Finds a number of items in the locker, a batch of them a query
+        @param item_ids: IDs of items - encryptions of the item_names
+        @return: the item dicts, by item_id
+        """
+        item_ids = list(item_ids)
+        recs = {}
+        for start in range(0, len(item_ids), BATCH_SIZE):
+            batch = item_ids[start:start + BATCH_SIZE]
+            for row in self.connection.execute(
+                    "SELECT item_id, salt, crypt_id, timestamp, body, version"
+                    " FROM items WHERE locker_id = ?"
+                    f" AND item_id IN ({', '.join('?' * len(batch))})",
+                    [self.key] + batch
+            ):
+                recs[row[0]] = dict(zip(
+                    ('salt', 'crypt_id', 'timestamp', 'body', 'version'),
+                    row[1:]
+                ))
+        for item_id in item_ids:
+            if item_id not in recs:
+                raise PhibesNotFoundError(f"{item_id} not found")
+        return {item_id: recs[item_id] for item_id in item_ids}
+
+    def get_item_header(self, item_id: str) -> dict:
+        """
+        Finds a named item in the locker, without reading its body
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict without `body`
+        """
+        row = self.connection.execute(
+            "SELECT salt, crypt_id, timestamp, version FROM items"
+            " WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        ).fetchone()
+        if row is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        return dict(zip(('salt', 'crypt_id', 'timestamp', 'version'), row))
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        An item's version, timestamp & body length, without its body
+        (the locker record, seldom changed, has none)
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's no item
+        """
+        if item_id is None:
+            return None
+        return self.connection.execute(
+            "SELECT version, timestamp, length(body) FROM items"
+            " WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        ).fetchone()
+
+    def list_items(self) -> list:
+        """
+        Return a list of the IDs of Items in this locker
+        :return:
+        """
+        return [
+            item_id for (item_id,) in self.connection.execute(
+                "SELECT item_id FROM items WHERE locker_id = ?", (self.key,)
+            )
+        ]
+
+    def save_item(
+            self, item_id: str, item_rec: dict, replace: bool = False
+    ) -> int:
+        """
+        Saves the item to the locker
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, and for a replacement,
+            optionally the `version` it's replacing
+        @param replace: Whether this is replacing an existing item
+        @return: version of the saved item
+        """
+        body = item_rec['_ciphertext']
+        if not body:
+            raise AttributeError("Record has no content!")
+        if isinstance(body, (bytearray, memoryview)):
+            body = bytes(body)
+        with self.transaction():
+            return self._put(item_id, item_rec, "?", body, replace)
+
+    def _put(
+            self,
+            item_id: str,
+            item_rec: dict,
+            body_sql: str,
+            body,
+            replace: bool
+    ) -> int:
+        """
+        Insert or update an item row, its body the value of `body_sql`
+        (in a transaction, so that the version checked is the one replaced)
+        :return: version of the row
+        """
+        if replace:
+            row = self.connection.execute(
+                "SELECT version FROM items"
+                " WHERE locker_id = ? AND item_id = ?",
+                (self.key, item_id)
+            ).fetchone()
+            if row is None:
+                raise PhibesNotFoundError(f"{item_id} not found")
+            check_version(item_id, item_rec.get('version'), row[0])
+            version = row[0] + 1
+            self.connection.execute(
+                "UPDATE items SET salt = ?, crypt_id = ?, timestamp = ?,"
+                f" body = {body_sql}, version = ?"
+                " WHERE locker_id = ? AND item_id = ?",
+                (
+                    item_rec['salt'], item_rec['crypt_id'],
+                    item_rec['timestamp'], body, version, self.key, item_id
+                )
+            )
+            return version
+        try:
+            self.connection.execute(
+                "INSERT INTO items (salt, crypt_id, timestamp, body,"
+                " version, locker_id, item_id)"
+                f" VALUES (?, ?, ?, {body_sql}, 1, ?, ?)",
+                (
+                    item_rec['salt'], item_rec['crypt_id'],
+                    item_rec['timestamp'], body, self.key, item_id
+                )
+            )
+        except sqlite3.IntegrityError:
+            raise PhibesExistsError(f"{self.locker_id}:{item_id} exists")
+        return 1
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        """
+        Saves the item to the locker, writing the body chunk by chunk
+        The chunks are spooled to a temporary file first, as the body's
+        length is needed to make room for it in the database.
+        @param item_id: Encrypted item locker_id
+        @param item_rec: contents of item, without `_ciphertext`
+        @param chunks: successive parts of the encrypted body
+        @param replace: Whether this is replacing an existing item
+        @return: None
+        """
+        if not hasattr(sqlite3.Connection, 'blobopen'):
+            return super(SqliteStorage, self).save_item_chunks(
+                item_id=item_id, item_rec=item_rec, chunks=chunks,
+                replace=replace
+            )
+        with tempfile.TemporaryFile() as spool:
+            length = 0
+            for chunk in chunks:
+                length += spool.write(chunk)
+            if not length:
+                raise AttributeError("Record has no content!")
+            spool.seek(0)
+            with self.transaction():
+                self._put(item_id, item_rec, "zeroblob(?)", length, replace)
+                with self.connection.blobopen(
+                        'items', 'body', self._rowid(item_id)
+                ) as blob:
+                    for chunk in iter(lambda: spool.read(CHUNK_BYTES), b""):
+                        blob.write(chunk)
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        """
+        Finds a named item in the locker, reading the body as it's consumed
+        @param item_id: ID of item - encryption of the item_name
+        @param chunk_size: most bytes per chunk
+        @return: the item dict without `body` & iterator of body chunks,
+            or, for a body stored as text, the complete dict & None
+        """
+        if not hasattr(sqlite3.Connection, 'blobopen'):
+            return super(SqliteStorage, self).get_item_chunks(
+                item_id=item_id, chunk_size=chunk_size
+            )
+        row = self.connection.execute(
+            "SELECT salt, crypt_id, timestamp, typeof(body) = 'text', rowid"
+            " FROM items WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        ).fetchone()
+        if row is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        if row[3]:
+            return self.get_item(item_id), None
+        rec = dict(zip(('salt', 'crypt_id', 'timestamp'), row))
+        return rec, self._iter_body(row[4], chunk_size)
+
+    def _iter_body(self, rowid: int, chunk_size: int) -> Iterator[bytes]:
+        with self.connection.blobopen(
+                'items', 'body', rowid, readonly=True
+        ) as blob:
+            yield from iter(lambda: blob.read(chunk_size), b"")
+
+    def _rowid(self, item_id: str) -> int:
+        return self.connection.execute(
+            "SELECT rowid FROM items WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        ).fetchone()[0]
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        """
+        Finds a named item in the locker, with only part of its body
+        @param item_id: ID of item - encryption of the item_name
+        @param offset: position in the body of the first byte to read
+        @param length: most bytes to read, fewer past the end of the body
+        @return: the item dict without `body` & the body bytes in range,
+            or, for a body stored as text, the complete dict & None
+        """
+        if offset < 0 or length < 0:
+            raise ValueError(f"invalid range {offset=} {length=}")
+        row = self.connection.execute(
+            "SELECT salt, crypt_id, timestamp, typeof(body) = 'text',"
+            " substr(body, ? + 1, ?) FROM items"
+            " WHERE locker_id = ? AND item_id = ?",
+            (offset, length, self.key, item_id)
+        ).fetchone()
+        if row is None:
+            raise PhibesNotFoundError(f"{item_id} not found")
+        if row[3]:
+            return self.get_item(item_id), None
+        return dict(zip(('salt', 'crypt_id', 'timestamp'), row)), row[4]
+
+    def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        """
+        Appends to the body of a stored item, rewriting it
+        in one transaction
+        """
+        with self.transaction():
+            return super(SqliteStorage, self).append_item(
+                item_id=item_id, encrypt_at=encrypt_at, timestamp=timestamp
+            )
+
+    def add_item(self, item_id: str, item_rec: dict) -> int:
+        return self.save_item(item_id, item_rec)
+
+    def delete_item(self, item_id: str) -> None:
+        """
+        Deletes the item from the locker
+        @param item_id: Encrypted item locker_id
+        @return: None
+        """
+        deleted = self.connection.execute(
+            "DELETE FROM items WHERE locker_id = ? AND item_id = ?",
+            (self.key, item_id)
+        )
+        if not deleted.rowcount:
+            raise PhibesNotFoundError(f"{item_id} not found")
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        """
+        Saves a number of items to the locker, in one transaction;
+        new items are inserted with one statement
+        @param item_recs: item dicts (see `save_item`), by item_id
+        @param replace: Whether these are replacing existing items
+        @return: versions of the saved items, by item_id
+        """
+        if replace:
+            return super(SqliteStorage, self).save_items(
+                item_recs, replace=replace
+            )
+        rows = []
+        for item_id, item_rec in item_recs.items():
+            body = item_rec['_ciphertext']
+            if not body:
+                raise AttributeError("Record has no content!")
+            if isinstance(body, (bytearray, memoryview)):
+                body = bytes(body)
+            rows.append((
+                item_rec['salt'], item_rec['crypt_id'],
+                item_rec['timestamp'], body, self.key, item_id
+            ))
+        with self.transaction():
+            try:
+                self.connection.executemany(
+                    "INSERT INTO items (salt, crypt_id, timestamp, body,"
+                    " version, locker_id, item_id)"
+                    " VALUES (?, ?, ?, ?, 1, ?, ?)",
+                    rows
+                )
+            except sqlite3.IntegrityError as err:
+                raise PhibesExistsError(f"{self.locker_id}: {err}")
+        return {item_id: 1 for item_id in item_recs}
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        """
+        Deletes a number of items from the locker, in one transaction
+        with one statement
+        @param item_ids: Item locker_ids - encrypted by caller
+        @return: None
+        """
+        item_ids = set(item_ids)
+        with self.transaction():
+            deleted = self.connection.executemany(
+                "DELETE FROM items WHERE locker_id = ? AND item_id = ?",
+                [(self.key, item_id) for item_id in item_ids]
+            )
+            if deleted.rowcount != len(item_ids):
+                raise PhibesNotFoundError(
+                    f"{len(item_ids) - deleted.rowcount} of {item_ids}"
+                    " not found"
+                )
@@ -3,14 +3,53 @@ Storage Implementation Interface
 """
 # Built-in library packages
 import abc
-# from typing import Optional
+from contextlib import contextmanager
+from typing import (
+    Callable, Hashable, Iterable, Iterator, Optional, Tuple, Union
+)
+import zlib
 
 # Third party packages
 # In-project modules
+from phibes.lib.errors import PhibesConflictError
+
+
+def item_info(
+        timestamp: str, body: Union[str, bytes, memoryview]
+) -> dict:
+    """
+    Metadata of a stored item: its timestamp, and the size & checksum
+    (CRC-32, which can be extended as the body is appended to)
+    of its stored body
+    """
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return {
+        'timestamp': timestamp,
+        'size': memoryview(body).nbytes,
+        'checksum': zlib.crc32(body)
+    }
+
+
+def check_version(
+        item_id: str, expected: Optional[int], current: int
+) -> None:
+    """
+    Raise PhibesConflictError if a stored item isn't at the version
+    a save expects (None for any), i.e. it's been saved since it was read
+    """
+    if expected is not None and expected != current:
+        raise PhibesConflictError(
+            f"{item_id} expected at version {expected}, it's {current}"
+        )
 
 
 class StorageImpl(abc.ABC):
 
+    # whether operations wait on I/O, so async callers run them
+    # in an executor (see `async_storage`) rather than on the event loop
+    blocking = True
+
     @abc.abstractmethod
     def __init__(self, locker_id: str = None, **kwargs):
         pass
@@ -46,7 +85,8 @@ class StorageImpl(abc.ABC):
         Attempts to find and return a named item in the locker.
         Raises an exception of item isn't found
         @param item_id: ID of item - encryption of the item_name
-        @return: the item dict
+        @return: the item dict (or other mapping), its `body` bytes
+            (or str, if stored as text)
         """
         pass
 
@@ -58,13 +98,53 @@ class StorageImpl(abc.ABC):
         """
         pass
 
+    def get_item_header(self, item_id: str) -> dict:
+        """
+        Finds a named item in the locker, without its body
+        Implementations that can read the other fields alone override this,
+        the default gets the whole item
+        @param item_id: ID of item - encryption of the item_name
+        @return: the item dict without `body`
+        """
+        rec = dict(self.get_item(item_id=item_id))
+        del rec['body']
+        return rec
+
+    def list_item_info(self) -> dict:
+        """
+        Metadata (see `item_info`) of the Items in this locker, by item_id
+        Implementations that keep it apart from the items override this,
+        the default reads every item
+        """
+        ret_val = {}
+        for item_id in self.list_items():
+            rec = self.get_item(item_id=item_id)
+            ret_val[item_id] = item_info(rec['timestamp'], rec['body'])
+        return ret_val
+
+    def record_stamp(self, item_id: str = None) -> Optional[Hashable]:
+        """
+        A value that changes whenever the stored record (the locker's,
+        or with item_id, the item's) does, and is quicker to get than
+        the record, e.g. for a cache to check its copy against
+        Implementations that have one override this, the default has none
+        @param item_id: ID of item - encryption of the item_name
+        @return: the stamp, or None if there's none (or no record)
+        """
+        return None
+
     @abc.abstractmethod
-    def add_item(self, item_id: str, item_rec: dict) -> None:
+    def add_item(self, item_id: str, item_rec: dict) -> int:
         """
         Saves the item to the locker
+        Items are versioned, from 1 when added, and each save of an item
+        (`save_item` with `replace`) is of the next version; given the
+        item's `version` as it was read, the save is a compare-and-swap,
+        see `check_version`.
         @param item_id: Item name - encrypted by caller
-        @param item_rec: dict representation of item
-        @return: None
+        @param item_rec: dict representation of item,
+            with encrypted `_ciphertext` bytes (or str)
+        @return: version of the saved item
         """
         pass
 
@@ -76,3 +156,144 @@ class StorageImpl(abc.ABC):
         @return: None
         """
         pass
+
+    def get_items(self, item_ids: Iterable[str]) -> dict:
+        """
+        Finds a number of items in the locker
+        Raises an exception if any isn't found
+        Implementations that can read items together override this,
+        the default gets each item
+        @param item_ids: IDs of items - encryptions of the item_names
+        @return: the item dicts (see `get_item`), by item_id
+        """
+        return {
+            item_id: self.get_item(item_id=item_id) for item_id in item_ids
+        }
+
+    def save_items(self, item_recs: dict, replace: bool = False) -> dict:
+        """
+        Saves a number of items to the locker, in one `transaction`
+        Implementations that can write items together override this,
+        the default saves each item
+        @param item_recs: item dicts (see `add_item`), by item_id
+        @param replace: Whether these are replacing existing items
+        @return: versions of the saved items, by item_id
+        """
+        with self.transaction():
+            return {
+                item_id: self.save_item(
+                    item_id=item_id, item_rec=item_rec, replace=replace
+                )
+                for item_id, item_rec in item_recs.items()
+            }
+
+    def delete_items(self, item_ids: Iterable[str]) -> None:
+        """
+        Deletes a number of items from the locker, in one `transaction`
+        Raises an exception if any isn't found
+        Implementations that can delete items together override this,
+        the default deletes each item
+        @param item_ids: Item locker_ids - encrypted by caller
+        @return: None
+        """
+        with self.transaction():
+            for item_id in item_ids:
+                self.delete_item(item_id=item_id)
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Groups the storage operations in a `with` block, so they're
+        saved together (or not at all, if the block raises)
+        Implementations with transactions override this,
+        by default each operation is saved as it's made
+        """
+        yield
+
+    def save_item_chunks(
+            self,
+            item_id: str,
+            item_rec: dict,
+            chunks: Iterable[bytes],
+            replace: bool = False
+    ) -> None:
+        """
+        Saves the item to the locker, its body from an iterable of chunks
+        Implementations that can write a body piecemeal override this,
+        the default collects the chunks & calls `save_item`
+        @param item_id: Item name - encrypted by caller
+        @param item_rec: dict representation of item, without `_ciphertext`
+        @param chunks: successive parts of the encrypted body
+        @param replace: Whether this is replacing an existing item
+        @return: None
+        """
+        rec = dict(item_rec)
+        rec['_ciphertext'] = b"".join(chunks)
+        return self.save_item(item_id=item_id, item_rec=rec, replace=replace)
+
+    def get_item_chunks(
+            self, item_id: str, chunk_size: int
+    ) -> Tuple[dict, Optional[Iterator[bytes]]]:
+        """
+        Finds a named item in the locker, its body as an iterator of chunks
+        Implementations that can read a body piecemeal override this,
+        the default gets the whole item
+        @param item_id: ID of item - encryption of the item_name
+        @param chunk_size: most bytes per chunk
+        @return: the item dict without `body` & iterator of body chunks,
+            or, for a body stored as text, the complete dict & None
+        """
+        rec = dict(self.get_item(item_id=item_id))
+        if isinstance(rec['body'], str):
+            return rec, None
+        body = memoryview(rec.pop('body'))
+        return rec, (
+            bytes(body[pos:pos + chunk_size])
+            for pos in range(0, len(body), chunk_size)
+        )
+
+    def get_item_range(
+            self, item_id: str, offset: int, length: int
+    ) -> Tuple[dict, Optional[bytes]]:
+        """
+        Finds a named item in the locker, with only part of its body
+        Implementations that can read part of a body override this,
+        the default gets the whole item
+        @param item_id: ID of item - encryption of the item_name
+        @param offset: position in the body of the first byte to read
+        @param length: most bytes to read, fewer past the end of the body
+        @return: the item dict without `body` & the body bytes in range,
+            or, for a body stored as text, the complete dict & None
+        """
+        if offset < 0 or length < 0:
+            raise ValueError(f"invalid range {offset=} {length=}")
+        rec = dict(self.get_item(item_id=item_id))
+        if isinstance(rec['body'], str):
+            return rec, None
+        return rec, bytes(memoryview(rec.pop('body'))[offset:offset + length])
+
+    def append_item(
+            self,
+            item_id: str,
+            encrypt_at: Callable[[int], bytes],
+            timestamp: str
+    ) -> Optional[int]:
+        """
+        Appends to the body of a stored item
+        Implementations that can append in place override this,
+        the default rewrites the whole item
+        @param item_id: ID of item - encryption of the item_name
+        @param encrypt_at: given the current body length,
+            returns the encrypted bytes to append
+        @param timestamp: replacement timestamp
+        @return: new body length, or None for a body stored as text,
+            which can't be appended to
+        """
+        rec = dict(self.get_item(item_id=item_id))
+        if isinstance(rec['body'], str):
+            return None
+        body = rec.pop('body')
+        rec['_ciphertext'] = body + encrypt_at(len(body))
+        rec['timestamp'] = timestamp
+        self.save_item(item_id=item_id, item_rec=rec, replace=True)
+        return len(rec['_ciphertext'])
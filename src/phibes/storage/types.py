@@ -4,8 +4,11 @@ Provides access to available storage types
 
 import enum
 
+from phibes.storage.dbm_storage import DbmStorage
 from phibes.storage.file_storage import LockerFileStorage
 from phibes.storage.memory_storage import MemoryStorage
+from phibes.storage.packed_storage import PackedFileStorage
+from phibes.storage.sqlite_storage import SqliteStorage
 
 
 class StoreType(enum.Enum):
@@ -20,6 +23,9 @@ class StoreType(enum.Enum):
 
     FileSystem = 'FileSystem', LockerFileStorage
     Memory = 'Memory', MemoryStorage
+    PackedFile = 'PackedFile', PackedFileStorage
+    Sqlite = 'Sqlite', SqliteStorage
+    Dbm = 'Dbm', DbmStorage
 
 
 DEFAULT_STORE_TYPE = StoreType.FileSystem
@@ -20,7 +20,7 @@ from phibes.model import Locker, LOCKER_FILE
 from tests.cli.click_test_helpers import GroupProvider
 from tests.cli.click_test_helpers import update_config_option_default
 from tests.lib.test_helpers import ConfigLoadingTestClass
-from tests.lib.test_helpers import PopulatedLocker
+from tests.lib.test_helpers import count_key_derivations, PopulatedLocker
 
 
 class MixinItemCreate(GroupProvider):
@@ -239,6 +239,25 @@ class TestCreateNew(TestCreateBase):
         self.common_pos_asserts(result, 'good_template:secrethappyclappy\n')
         return
 
+    @pytest.mark.positive
+    def test_single_unlock(self, monkeypatch, setup_and_teardown):
+        """
+        Existence check, template load and creation share one unlock
+        :param monkeypatch: pytest plugin injected
+        :return:
+        """
+        for name in self.lockers.keys():
+            derivations = count_key_derivations(monkeypatch)
+            result = self.invoke(self.good_template_name, locker_name=name)
+            self.common_pos_asserts(
+                result,
+                'good_template:secrethappyclappy\n',
+                self.lockers[name]
+            )
+            assert len(derivations) == 1, f"{name=} {derivations=}"
+            monkeypatch.undo()
+        return
+
     @pytest.mark.negative
     def test_badtemplate(self, tmp_path, setup_and_teardown):
         """
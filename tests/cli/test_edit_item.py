@@ -19,7 +19,7 @@ from phibes.model import Locker
 from tests.cli.click_test_helpers import GroupProvider
 from tests.cli.click_test_helpers import update_config_option_default
 from tests.lib.test_helpers import ConfigLoadingTestClass
-from tests.lib.test_helpers import PopulatedLocker
+from tests.lib.test_helpers import count_key_derivations, PopulatedLocker
 
 
 class MixinItemEdit(GroupProvider):
@@ -243,3 +243,18 @@ class TestEditExists(TestEditBase):
         assert inst
         assert 'happyclappy' in inst.content
         assert before.content in inst.content
+
+    @pytest.mark.positive
+    def test_single_unlock(self, monkeypatch, setup_and_teardown):
+        """
+        Loading the current content and updating share one unlock
+        :param monkeypatch: pytest plugin injected
+        :return:
+        """
+        derivations = count_key_derivations(monkeypatch)
+        result = self.invoke()
+        assert result.exit_code == 0, (
+            f"{result.exception=}"
+            f"{result.output=}"
+        )
+        assert len(derivations) == 1, f"{derivations=}"
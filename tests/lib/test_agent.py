@@ -0,0 +1,100 @@
+"""
+pytest module for lib.agent
+"""
+
+# Standard library imports
+import tempfile
+import threading
+from pathlib import Path
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.crypto import list_crypts
+from phibes.lib import agent
+from phibes.lib.errors import PhibesAuthError, PhibesConfigurationError
+from phibes.model import Locker
+
+# Local test imports
+from tests.lib.test_helpers import count_key_derivations, PopulatedLocker
+
+
+class TestAgent(PopulatedLocker):
+
+    server = None
+    thread = None
+
+    def custom_setup(self, tmp_path):
+        super(TestAgent, self).custom_setup(tmp_path)
+        # Unix socket paths are length-limited, so avoid deep tmp_path
+        self.sock_dir = tempfile.TemporaryDirectory()
+        self.sock_path = Path(self.sock_dir.name) / "agent.sock"
+        self.server = agent.AgentServer(socket_path=self.sock_path, ttl=60)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={'poll_interval': 0.05}
+        )
+        self.thread.start()
+
+    def custom_teardown(self, tmp_path):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.sock_dir.cleanup()
+        super(TestAgent, self).custom_teardown(tmp_path)
+
+    @pytest.mark.positive
+    def test_repeat_get_skips_derivation(
+            self, monkeypatch, setup_and_teardown
+    ):
+        monkeypatch.setenv(agent.AGENT_SOCK_ENV, str(self.sock_path))
+        derivations = count_key_derivations(monkeypatch)
+        all_names = list(self.lockers.keys()) + [self.locker_name]
+        for name in all_names:
+            first = Locker.get(password=self.password, locker_name=name)
+        derived_once = len(derivations)
+        for name in all_names:
+            again = Locker.get(password=self.password, locker_name=name)
+            item = again.get_item(self.common_item_name)
+            assert item.content == self.content
+        assert len(derivations) == derived_once
+        assert again.crypt_impl.key == first.crypt_impl.key
+
+    @pytest.mark.negative
+    def test_wrong_password_misses(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setenv(agent.AGENT_SOCK_ENV, str(self.sock_path))
+        Locker.get(password=self.password, locker_name=self.locker_name)
+        with pytest.raises(PhibesAuthError):
+            Locker.get(password="NotThePassword", locker_name=self.locker_name)
+
+    @pytest.mark.positive
+    def test_status_and_clear(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setenv(agent.AGENT_SOCK_ENV, str(self.sock_path))
+        for name in self.lockers:
+            Locker.get(password=self.password, locker_name=name)
+        resp = agent.request({'op': 'status'})
+        assert resp['entries'] == len(list_crypts())
+        agent.request({'op': 'clear'})
+        assert agent.request({'op': 'status'})['entries'] == 0
+
+    @pytest.mark.positive
+    def test_idle_expiry(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setenv(agent.AGENT_SOCK_ENV, str(self.sock_path))
+        self.server.ttl = 0
+        Locker.get(password=self.password, locker_name=self.locker_name)
+        assert agent.request({'op': 'status'})['entries'] == 0
+
+    @pytest.mark.positive
+    def test_no_agent(self, monkeypatch, setup_and_teardown):
+        monkeypatch.delenv(agent.AGENT_SOCK_ENV, raising=False)
+        assert agent.request({'op': 'status'}) is None
+        assert Locker.get(password=self.password, locker_name=self.locker_name)
+
+    @pytest.mark.negative
+    def test_unavailable(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setenv(agent.AGENT_SOCK_ENV, str(self.sock_path))
+        monkeypatch.setattr(agent, 'AVAILABLE', False)
+        assert agent.request({'op': 'status'}) is None
+        assert Locker.get(password=self.password, locker_name=self.locker_name)
+        with pytest.raises(PhibesConfigurationError):
+            agent.AgentServer(socket_path=self.sock_path)
@@ -0,0 +1,236 @@
+"""
+pytest module for storage.async_storage
+"""
+
+# Standard library imports
+import asyncio
+import threading
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib.errors import PhibesNotFoundError
+from phibes.storage import async_storage, memory_storage, sqlite_storage
+from phibes.storage.async_storage import AsyncStorageImpl
+from phibes.storage.types import StoreType
+
+# Local test imports
+from tests.lib.test_helpers import PopulatedLocker
+
+
+class AsyncStorageOps(PopulatedLocker):
+
+    def run_item_ops(self, storage: AsyncStorageImpl) -> list:
+        rec = dict(self.my_locker.data_model.storage.get_item(
+            self.my_locker.crypt_impl.encrypt(self.common_item_name)
+        ))
+        rec['_ciphertext'] = rec.pop('body')
+        threads = []
+
+        async def ops():
+            threads.append(await storage._run(threading.get_ident))
+            assert await storage.add_item("new", dict(rec)) == 1
+            assert sorted(await storage.list_items()) == sorted(
+                ["new", self.my_locker.crypt_impl.encrypt(
+                    self.common_item_name
+                )]
+            )
+            got = await storage.get_item("new")
+            assert got['body'] == rec['_ciphertext']
+            header = await storage.get_item_header("new")
+            assert 'body' not in header
+            assert set(await storage.list_item_info()) == set(
+                await storage.list_items()
+            )
+            got, chunks = await storage.get_item_chunks("new", 4)
+            assert b"".join([chunk async for chunk in chunks]) == (
+                rec['_ciphertext']
+            )
+            got, part = await storage.get_item_range("new", 2, 3)
+            assert part == rec['_ciphertext'][2:5]
+            await storage.delete_item("new")
+            with pytest.raises(PhibesNotFoundError):
+                await storage.get_item("new")
+            assert (await storage.get())['salt']
+
+        asyncio.run(ops())
+        return threads
+
+    def run_bulk_ops(self, storage: AsyncStorageImpl) -> list:
+        rec = {'salt': "salt", 'crypt_id': "crypt_id", 'timestamp': "ts"}
+        recs = {
+            f"bulk{num}": dict(rec, _ciphertext=f"body{num}".encode())
+            for num in range(5)
+        }
+        threads = []
+
+        async def ops():
+            async with storage.transaction():
+                threads.append(await storage._run(threading.get_ident))
+                await storage.save_items(dict(recs))
+                await storage.save_item_chunks(
+                    "chunked", dict(rec), iter([b"chunk", b"ed"])
+                )
+                threads.append(await storage._run(threading.get_ident))
+            got = await storage.get_items(["bulk1", "chunked"])
+            assert list(got) == ["bulk1", "chunked"]
+            assert got['bulk1']['body'] == b"body1"
+            assert got['chunked']['body'] == b"chunked"
+            await storage.delete_items([f"bulk{num}" for num in range(4)])
+            assert sorted(await storage.list_items()) == sorted(
+                ["bulk4", "chunked", self.my_locker.crypt_impl.encrypt(
+                    self.common_item_name
+                )]
+            )
+
+        asyncio.run(ops())
+        return threads
+
+
+class TestAsyncStorage(AsyncStorageOps):
+
+    @pytest.mark.positive
+    def test_file_offloaded(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        threads = self.run_item_ops(storage)
+        assert threads[0] != threading.get_ident()
+
+    @pytest.mark.positive
+    def test_bulk(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        threads = self.run_bulk_ops(storage)
+        # the transaction's operations, in one thread
+        assert threads[0] == threads[1] != threading.get_ident()
+
+
+class TestAsyncMemoryStorage(AsyncStorageOps):
+
+    store_type = StoreType.Memory
+
+    def custom_teardown(self, tmp_path):
+        super(TestAsyncMemoryStorage, self).custom_teardown(tmp_path)
+        memory_storage.mock_lockers.clear()
+
+    @pytest.mark.positive
+    def test_memory_inline(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        assert not storage.storage.blocking
+        threads = self.run_item_ops(storage)
+        assert threads[0] == threading.get_ident()
+
+    @pytest.mark.positive
+    def test_memory_bulk(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        threads = self.run_bulk_ops(storage)
+        assert threads == [threading.get_ident()] * 2
+
+
+class TestAsyncSqliteStorage(AsyncStorageOps):
+
+    store_type = StoreType.Sqlite
+
+    @pytest.mark.positive
+    def test_connections_closed(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        threads = self.run_item_ops(storage)
+        assert threads[0] in [
+            thread.ident for thread, *_ in sqlite_storage._open
+        ]
+        async_storage.shutdown()
+        assert threads[0] not in [
+            thread.ident for thread, *_ in sqlite_storage._open
+        ]
+        # and another pool is made when it's needed
+        assert self.run_item_ops(storage)
+
+    @pytest.mark.positive
+    def test_bulk(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        threads = self.run_bulk_ops(storage)
+        assert threads[0] == threads[1] != threading.get_ident()
+
+    @pytest.mark.negative
+    def test_transaction_rolled_back(self, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        rec = {'salt': "salt", 'crypt_id': "crypt_id", 'timestamp': "ts"}
+
+        async def failing():
+            async with storage.transaction():
+                await storage.save_items(
+                    {"rolled": dict(rec, _ciphertext=b"body")}
+                )
+                raise ValueError("abandoned")
+
+        with pytest.raises(ValueError):
+            asyncio.run(failing())
+        assert "rolled" not in asyncio.run(storage.list_items())
+
+    @pytest.mark.positive
+    def test_chunks_one_thread(self, monkeypatch, setup_and_teardown):
+        storage = AsyncStorageImpl(self.my_locker.data_model.storage)
+        item = self.my_locker.create_item("streamed")
+        item.content = "streamed body " * 100
+        self.my_locker.add_item(item)
+        item_id = self.my_locker.crypt_impl.encrypt("streamed")
+        read_in = []
+        iter_body = sqlite_storage.SqliteStorage._iter_body
+
+        def recording(*args):
+            for chunk in iter_body(*args):
+                read_in.append(threading.get_ident())
+                yield chunk
+
+        monkeypatch.setattr(
+            sqlite_storage.SqliteStorage, '_iter_body', recording
+        )
+
+        async def read_while_busy():
+            rec, chunks = await storage.get_item_chunks(item_id, 16)
+            body = []
+            async for chunk in chunks:
+                body.append(chunk)
+                # other work in the pool meanwhile
+                await asyncio.gather(
+                    *[storage.list_items() for _ in range(4)]
+                )
+            return b"".join(body)
+
+        body = asyncio.run(read_while_busy())
+        assert body == self.my_locker.data_model.storage.get_item(
+            item_id
+        )['body']
+        assert len(read_in) > 1
+        assert len(set(read_in)) == 1
+
+
+class TestExecutor(object):
+
+    @pytest.mark.positive
+    def test_bounded(self):
+        async_storage.set_max_workers(2)
+        running = []
+        most = []
+        lock = threading.Lock()
+        gate = threading.Event()
+
+        def work():
+            with lock:
+                running.append(1)
+                most.append(len(running))
+            gate.wait(0.05)
+            with lock:
+                running.pop()
+
+        async def many():
+            await asyncio.gather(
+                *[async_storage.run_blocking(work) for _ in range(8)]
+            )
+
+        try:
+            asyncio.run(many())
+        finally:
+            async_storage.set_max_workers(async_storage.DEFAULT_MAX_WORKERS)
+        assert max(most) == 2
+        with pytest.raises(ValueError):
+            async_storage.set_max_workers(0)
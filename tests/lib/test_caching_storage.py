@@ -0,0 +1,121 @@
+"""
+pytest module for storage.caching_storage
+"""
+
+# Standard library imports
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.model import Locker
+from phibes.storage import caching_storage, memory_storage
+from phibes.storage.caching_storage import CachingStorage, RecordCache
+from phibes.storage.types import StoreType
+
+# Local test imports
+from tests.lib.test_helpers import PopulatedLocker
+
+
+class TestCaching(PopulatedLocker):
+
+    def custom_setup(self, tmp_path):
+        super(TestCaching, self).custom_setup(tmp_path)
+        self.cache = RecordCache(max_entries=100)
+        caching_storage.set_cache(self.cache)
+
+    def custom_teardown(self, tmp_path):
+        caching_storage.set_cache(None)
+        super(TestCaching, self).custom_teardown(tmp_path)
+
+    def uncached(self, lck: Locker):
+        storage = lck.data_model.storage
+        if isinstance(storage, CachingStorage):
+            storage = storage.storage
+        return storage
+
+    @pytest.mark.positive
+    def test_hits(self, setup_and_teardown):
+        lck = Locker.get(self.password, self.locker_name)
+        assert isinstance(lck.data_model.storage, CachingStorage)
+        assert lck.get_item(self.common_item_name).content == self.content
+        before = self.cache.stats()
+        lck = Locker.get(self.password, self.locker_name)
+        assert lck.get_item(self.common_item_name).content == self.content
+        after = self.cache.stats()
+        # the locker & the item read from the cache, nothing from storage
+        assert after['hits'] >= before['hits'] + 2
+        assert after['misses'] == before['misses']
+
+    @pytest.mark.positive
+    def test_changed_out_of_band(self, setup_and_teardown):
+        lck = Locker.get(self.password, self.locker_name)
+        item = lck.get_item(self.common_item_name)
+        # changed through storage the cache doesn't see
+        rec = dict(self.uncached(lck).get_item(
+            lck.crypt_impl.encrypt(self.common_item_name)
+        ))
+        item.content = "changed elsewhere"
+        rec['_ciphertext'] = item.ciphertext
+        rec['timestamp'] = "a later time"
+        self.uncached(lck).save_item(
+            lck.crypt_impl.encrypt(self.common_item_name), rec, replace=True
+        )
+        misses = self.cache.stats()['misses']
+        found = lck.get_item(self.common_item_name)
+        assert found.content == "changed elsewhere"
+        assert self.cache.stats()['misses'] == misses + 1
+        # and through the cache
+        found.content = "changed here"
+        lck.update_item(found)
+        assert lck.get_item(self.common_item_name).content == "changed here"
+        lck.append_item(self.common_item_name, " and more")
+        assert [item.content for item in lck.list_items()] == [
+            "changed here and more"
+        ]
+        lck.delete_item(self.common_item_name)
+        assert lck.list_items() == []
+
+    @pytest.mark.positive
+    def test_bounded(self, setup_and_teardown):
+        self.cache.max_entries = 3
+        lck = Locker.get(self.password, self.locker_name)
+        for num in range(5):
+            item = lck.create_item(f"item{num}")
+            item.content = f"body{num}"
+            lck.add_item(item)
+        assert sorted(item.content for item in lck.list_items()) == sorted(
+            [f"body{num}" for num in range(5)] + [self.content]
+        )
+        assert len(self.cache) == 3
+        with pytest.raises(ValueError):
+            RecordCache(max_entries=0)
+
+
+class TestPackedCaching(TestCaching):
+    store_type = StoreType.PackedFile
+
+
+class TestSqliteCaching(TestCaching):
+    store_type = StoreType.Sqlite
+
+    @pytest.mark.positive
+    def test_hits(self, setup_and_teardown):
+        # the locker record has no stamp, only items are cached
+        lck = Locker.get(self.password, self.locker_name)
+        lck.get_item(self.common_item_name)
+        hits = self.cache.stats()['hits']
+        assert lck.get_item(self.common_item_name).content == self.content
+        assert self.cache.stats()['hits'] == hits + 1
+
+
+class TestDbmCaching(TestCaching):
+    store_type = StoreType.Dbm
+
+
+class TestMemoryCaching(TestCaching):
+    store_type = StoreType.Memory
+
+    def custom_teardown(self, tmp_path):
+        super(TestMemoryCaching, self).custom_teardown(tmp_path)
+        memory_storage.mock_lockers.clear()
@@ -0,0 +1,160 @@
+"""
+pytest module for crypto.calibrate
+"""
+
+# Standard library imports
+import hashlib
+import json
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes import crypto
+from phibes.crypto import calibrate, create_crypt, default_id, get_crypt
+from phibes.crypto import crypt_aes_ctr_sha
+from phibes.crypto.factory import CryptFactory
+from phibes.crypto.hash_pbkdf2 import HashAlg, pbkdf2
+from phibes.lib.errors import PhibesAuthError, PhibesConfigurationError
+
+
+class TestCalibrate(object):
+
+    pw = "s00p3rsekrit"
+
+    @pytest.fixture
+    def cal_file(self, tmp_path, monkeypatch):
+        path = tmp_path / calibrate.CALIBRATION_FILE_NAME
+        monkeypatch.setenv(calibrate.CALIBRATION_ENV, str(path))
+        return path
+
+    @pytest.fixture
+    def factory(self, monkeypatch):
+        # Registrations made by the test must not outlive it
+        factory = CryptFactory()
+        monkeypatch.setattr(factory, '_objects', dict(factory._objects))
+        monkeypatch.setattr(factory, '_fallbacks', dict(factory._fallbacks))
+        monkeypatch.setattr(
+            factory, '_default_crypt_id', factory._default_crypt_id
+        )
+        return factory
+
+    @pytest.mark.positive
+    def test_rounds_scale_with_target(self, monkeypatch):
+        # 1 microsecond per round
+        monkeypatch.setattr(
+            calibrate, 'time_pbkdf2', lambda alg, rounds: rounds / 1e6
+        )
+        assert calibrate.calibrate_rounds(HashAlg.SHA512, 250) == 250000
+        assert calibrate.calibrate_rounds(HashAlg.SHA512, 1000) == 1000000
+
+    @pytest.mark.parametrize("hash_alg", list(HashAlg))
+    @pytest.mark.positive
+    def test_timed_as_unlocked(self, hash_alg, monkeypatch):
+        lengths = []
+        monkeypatch.setattr(
+            calibrate, 'pbkdf2', lambda *args: lengths.append(args[4])
+        )
+        calibrate.time_pbkdf2(hash_alg, 1000, repeat=1)
+        assert lengths == [
+            calibrate.CALIBRATED_CLASSES[hash_alg].derived_length()
+        ]
+
+    @pytest.mark.positive
+    def test_rounds_floor(self):
+        rounds = calibrate.calibrate_rounds(HashAlg.SHA256, 1)
+        assert rounds == calibrate.MIN_KEY_ROUNDS
+
+    @pytest.mark.positive
+    def test_save_keeps_history(self, cal_file):
+        calibrate.save_calibration(HashAlg.SHA512, 200000, 200)
+        calibrate.save_calibration(HashAlg.SHA256, 300000, 300)
+        crypt_id = calibrate.save_calibration(HashAlg.SHA512, 200000, 250)
+        assert crypt_id == "Aes256CtrPbkdf2Sha512Splitkey_rounds200000"
+        recs = calibrate.read_calibrations()
+        assert [r['key_rounds'] for r in recs] == [300000, 200000]
+        assert recs[-1]['target_ms'] == 250
+
+    @pytest.mark.positive
+    def test_load_registers_default(self, cal_file, factory):
+        calibrate.save_calibration(HashAlg.SHA256, 200000, 200)
+        crypt_id = calibrate.save_calibration(HashAlg.SHA512, 200000, 200)
+        loaded = calibrate.load_calibrations(fallback_id=default_id)
+        assert loaded == crypt_id
+        assert factory._default_crypt_id == crypt_id
+        assert "Aes256CtrPbkdf2Sha256Splitkey_rounds200000" in (
+            factory.list_wrappers()
+        )
+        crypt = create_crypt(self.pw, crypt_id)
+        assert crypt.key_rounds == 200000
+        found = get_crypt(crypt_id, self.pw, crypt.pw_hash, crypt.salt)
+        assert found.key == crypt.key
+        # loading again is harmless
+        assert calibrate.load_calibrations(fallback_id=default_id) == crypt_id
+
+    @pytest.mark.positive
+    def test_no_calibration(self, cal_file, factory):
+        assert calibrate.load_calibrations(fallback_id=default_id) is None
+        assert factory._default_crypt_id == default_id
+
+    @pytest.mark.negative
+    def test_invalid_file(self, cal_file):
+        cal_file.write_text(json.dumps({'not': 'crypts'}))
+        with pytest.raises(PhibesConfigurationError):
+            calibrate.read_calibrations()
+
+    @pytest.mark.positive
+    def test_registered_on_demand(self, cal_file, factory):
+        crypt_id = calibrate.calibrated_crypt_id(HashAlg.SHA256, 123000)
+        assert crypt_id not in factory.list_wrappers()
+        crypt = create_crypt(self.pw, crypt_id)
+        assert crypt.key_rounds == 123000
+        assert crypt_id in factory.list_wrappers()
+        found = get_crypt(crypt_id, self.pw, crypt.pw_hash, crypt.salt)
+        assert found.key == crypt.key
+
+    @pytest.mark.parametrize("hash_alg", list(HashAlg))
+    @pytest.mark.positive
+    def test_one_block_derived(self, hash_alg, cal_file, factory, monkeypatch):
+        # more than a digest's output would run the rounds again
+        crypt_class = calibrate.CALIBRATED_CLASSES[hash_alg]
+        digest_size = hashlib.new(hash_alg.value.lower()).digest_size
+        assert crypt_class.derived_length() <= digest_size
+        lengths = []
+
+        def counting(*args):
+            lengths.append(args[4])
+            return pbkdf2(*args)
+
+        monkeypatch.setattr(crypt_aes_ctr_sha, 'pbkdf2', counting)
+        crypt_id = calibrate.calibrated_crypt_id(hash_alg, 123000)
+        crypt = create_crypt(self.pw, crypt_id)
+        assert lengths == [crypt_class.derived_length()]
+        found = get_crypt(crypt_id, self.pw, crypt.pw_hash, crypt.salt)
+        assert found.key == crypt.key
+        with pytest.raises(PhibesAuthError):
+            get_crypt(crypt_id, "not it", crypt.pw_hash, crypt.salt)
+
+    @pytest.mark.negative
+    def test_not_registered_below_floor(self, cal_file, factory):
+        crypt_id = calibrate.calibrated_crypt_id(HashAlg.SHA512, 1000)
+        assert calibrate.parse_crypt_id(crypt_id) is None
+        assert calibrate.parse_crypt_id("CryptPlainPlainkey_rounds200000") is (
+            None
+        )
+        with pytest.raises(ValueError):
+            get_crypt(crypt_id, self.pw, "pw_hash", "salt")
+
+    @pytest.mark.positive
+    def test_default_loaded_lazily(self, cal_file, factory, monkeypatch):
+        monkeypatch.setattr(crypto, '_calibrations_loaded', False)
+        crypt_id = calibrate.save_calibration(HashAlg.SHA512, 200000, 200)
+        assert factory._default_crypt_id == default_id
+        assert crypto.get_default_id() == crypt_id
+
+    @pytest.mark.negative
+    def test_invalid_file_falls_back(self, cal_file, factory, monkeypatch):
+        monkeypatch.setattr(crypto, '_calibrations_loaded', False)
+        cal_file.write_text("{not json")
+        with pytest.warns(UserWarning):
+            assert crypto.get_default_id() == default_id
@@ -4,13 +4,20 @@ pytest module for lib.crypto
 
 # Standard library imports
 import random
+import secrets
 
 # Related third party imports
+from Cryptodome.Cipher import AES
+from Cryptodome.Util import Counter
 import pytest
 
 # Local application/library specific imports
 from phibes.crypto import create_crypt, default_id, get_crypt, list_crypts
 from phibes.crypto import register_crypt
+from phibes.crypto import aes_cipher
+from phibes.crypto import crypt_aes_ctr_sha
+from phibes.crypto.crypt_aes_ctr_scrypt import Aes256CtrScrypt
+from phibes.crypto.hash_scrypt import scrypt, scrypt_memory
 from phibes.crypto.factory import CryptFactory
 from phibes.crypto.crypt_aes_ctr_sha import AesCtrPbkdf2Sha
 from phibes.lib.errors import PhibesAuthError
@@ -67,6 +74,17 @@ class TestCryptImpl(object):
                     f"{CryptFactory()._objects[cid]}"
                 )
 
+    @pytest.mark.positive
+    def test_encrypt_decrypt_many(self):
+        values = plain_texts + ["", "x" * 5000, "\u00e9\u4e2d" * 30]
+        for cid, rec in self.crypts.items():
+            crypt = rec['crypt_impl']
+            encrypted = crypt.encrypt_many(values)
+            assert encrypted == [crypt.encrypt(val) for val in values], cid
+            assert crypt.decrypt_many(encrypted) == values, cid
+            assert crypt.decrypt_many(iter(encrypted)) == values, cid
+            assert crypt.encrypt_many([]) == []
+
 
     @pytest.mark.positive
     def test_multiple_cycles(self):
@@ -146,3 +164,140 @@ class TestCryptFallback(object):
             crypt_id = "BadCryptkey_rounds100100"
         crypt = create_crypt(self.pw, crypt_id)
         assert crypt.decrypt(crypt.encrypt(plaintext)) == plaintext
+
+
+class TestSinglePassKdf(object):
+
+    pw = "s00p3rsekrit"
+
+    def count_pbkdf2(self, monkeypatch) -> list:
+        calls = []
+        original = crypt_aes_ctr_sha.pbkdf2
+
+        def counting_pbkdf2(*args, **kwargs):
+            calls.append(args)
+            return original(*args, **kwargs)
+        monkeypatch.setattr(crypt_aes_ctr_sha, 'pbkdf2', counting_pbkdf2)
+        return calls
+
+    @pytest.mark.positive
+    def test_one_derivation_per_unlock(self, monkeypatch):
+        calls = self.count_pbkdf2(monkeypatch)
+        crypt = create_crypt(self.pw, default_id)
+        assert len(calls) == 1
+        found = get_crypt(default_id, self.pw, crypt.pw_hash, crypt.salt)
+        assert len(calls) == 2
+        assert found.key == crypt.key
+        assert found.decrypt(crypt.encrypt("secret")) == "secret"
+
+    @pytest.mark.positive
+    def test_two_pass_still_two(self, monkeypatch):
+        crypt_id = "Aes256CtrPbkdf2Sha512key_rounds100100"
+        calls = self.count_pbkdf2(monkeypatch)
+        crypt = create_crypt(self.pw, crypt_id)
+        assert len(calls) == 2
+        assert get_crypt(crypt_id, self.pw, crypt.pw_hash, crypt.salt)
+
+    @pytest.mark.negative
+    def test_fail_auth(self):
+        crypt = create_crypt(self.pw, default_id)
+        with pytest.raises(PhibesAuthError):
+            get_crypt(default_id, "not" + self.pw, crypt.pw_hash, crypt.salt)
+
+
+class TestScrypt(object):
+
+    pw = "s00p3rsekrit"
+
+    @pytest.mark.positive
+    def test_hash(self):
+        salt = "00" * 16
+        first = scrypt(self.pw, salt, n=2**10, r=8, p=1, key_length=36)
+        assert len(bytes.fromhex(first)) == 36
+        assert first == scrypt(self.pw, salt, n=2**10, r=8, p=1, key_length=36)
+        assert first != scrypt(self.pw, salt, n=2**11, r=8, p=1, key_length=36)
+
+    @pytest.mark.positive
+    def test_memory_beyond_default_limit(self):
+        # 64 MiB is over OpenSSL's default scrypt memory limit
+        assert scrypt_memory(n=2**16, r=8, p=1) > 32 * 2**20
+        assert scrypt(self.pw, "00" * 16, n=2**16, r=8, p=1)
+
+    @pytest.mark.positive
+    def test_registered_params(self):
+        crypt_ids = [
+            c for c in list_crypts() if c.startswith('Aes256CtrScrypt')
+        ]
+        assert crypt_ids
+        for crypt_id in crypt_ids:
+            crypt = create_crypt(self.pw, crypt_id)
+            assert isinstance(crypt, Aes256CtrScrypt)
+            assert crypt_id == f"Aes256CtrScryptn{crypt.n}r{crypt.r}p{crypt.p}"
+            found = get_crypt(crypt_id, self.pw, crypt.pw_hash, crypt.salt)
+            assert found.key == crypt.key
+
+    @pytest.mark.negative
+    def test_fail_auth(self):
+        crypt_id = "Aes256CtrScryptn16384r8p1"
+        crypt = create_crypt(self.pw, crypt_id)
+        with pytest.raises(PhibesAuthError):
+            get_crypt(crypt_id, "not" + self.pw, crypt.pw_hash, crypt.salt)
+
+
+class TestCtrCipher(object):
+
+    pw = "s00p3rsekrit"
+
+    @pytest.mark.positive
+    @pytest.mark.parametrize("key_length", [16, 24, 32])
+    def test_matches_counter_mode(self, key_length):
+        sizes = list(range(40)) + [
+            aes_cipher.CtrCipher.small_message_bytes,
+            aes_cipher.CtrCipher.small_message_bytes + 1
+        ]
+        for iv in ["00" * 16, "ff" * 16, "a5" * 16]:
+            key = secrets.token_bytes(key_length).hex()
+            cipher = aes_cipher.CtrCipher(key, iv)
+            for size in sizes:
+                data = secrets.token_bytes(size)
+                expected = AES.new(
+                    key=bytes.fromhex(key),
+                    mode=AES.MODE_CTR,
+                    counter=Counter.new(128, initial_value=int(iv, 16))
+                ).encrypt(data)
+                assert cipher.apply(data) == expected
+                assert cipher.apply(expected) == data
+
+    @pytest.mark.positive
+    def test_crypt_reuses_cipher(self):
+        crypt = create_crypt(self.pw, default_id)
+        ciphertext = crypt.encrypt("some content")
+        cipher = crypt.cipher
+        assert crypt.decrypt(ciphertext) == "some content"
+        assert crypt.cipher is cipher
+        # a different key gets a different cipher
+        crypt.key = secrets.token_bytes(crypt.key_length_bytes).hex()
+        assert crypt.cipher is not cipher
+        assert crypt.decrypt(crypt.encrypt("more")) == "more"
+        assert crypt.encrypt("some content") != ciphertext
+
+    @pytest.mark.positive
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_apply_many(self, use_numpy, monkeypatch):
+        if use_numpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(aes_cipher, 'numpy', None)
+        cipher = aes_cipher.CtrCipher(
+            secrets.token_bytes(32).hex(), secrets.token_bytes(16).hex()
+        )
+        sizes = [0, 1, 15, 16, 17, 300, 5000, 0, 33]
+        values = [secrets.token_bytes(size) for size in sizes]
+        assert cipher.apply_many(values) == [cipher.apply(v) for v in values]
+        assert cipher.apply_many([]) == []
+        assert cipher.apply_many([b"", b""]) == [b"", b""]
+
+    @pytest.mark.negative
+    def test_bad_key_length(self):
+        with pytest.raises(ValueError):
+            aes_cipher.CtrCipher("00" * 20, "00" * 16)
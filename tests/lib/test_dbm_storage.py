@@ -0,0 +1,90 @@
+"""
+pytest module for storage.dbm_storage
+"""
+
+# Standard library imports
+import dbm
+import importlib
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib.errors import PhibesExistsError, PhibesNotFoundError
+from phibes.model import Locker
+from phibes.storage.dbm_storage import DbmStorage
+from phibes.storage.types import StoreType
+
+# Local test imports
+from tests.lib import test_locker
+from tests.lib.test_helpers import PopulatedLocker
+
+
+def available_dbm_impls() -> list:
+    found = []
+    for name in ['dbm.gnu', 'dbm.ndbm', 'dbm.dumb']:
+        try:
+            found.append(importlib.import_module(name))
+        except ImportError:
+            pass
+    return found
+
+
+class TestDbmItemStuff(test_locker.TestItemStuff):
+    store_type = StoreType.Dbm
+
+
+class TestDbmReadRange(test_locker.TestReadRange):
+    store_type = StoreType.Dbm
+
+
+class TestDbm(PopulatedLocker):
+
+    store_type = StoreType.Dbm
+
+    @pytest.mark.parametrize("dbm_impl", available_dbm_impls())
+    @pytest.mark.positive
+    def test_update_delete(self, dbm_impl, monkeypatch, setup_and_teardown):
+        monkeypatch.setattr(DbmStorage, 'dbm_impl', dbm_impl)
+        lck = Locker.create(
+            password=self.password,
+            crypt_id=self.my_locker.crypt_impl.crypt_id,
+            locker_name=dbm_impl.__name__
+        )
+        storage = lck.data_model.storage
+        assert dbm.whichdb(str(storage.dbm_path)) == dbm_impl.__name__
+        for num in range(10):
+            item = lck.create_item(f"item{num}")
+            item.content = f"body{num}"
+            lck.add_item(item)
+        with pytest.raises(PhibesExistsError):
+            lck.add_item(item)
+        for num in range(0, 10, 2):
+            item = lck.get_item(f"item{num}")
+            item.content = "changed"
+            lck.update_item(item)
+        for num in range(1, 10, 2):
+            lck.delete_item(f"item{num}")
+        with pytest.raises(PhibesNotFoundError):
+            lck.get_item("item1")
+        with pytest.raises(PhibesNotFoundError):
+            lck.delete_item("item1")
+        item = lck.create_item("item1")
+        item.content = "gone"
+        with pytest.raises(PhibesNotFoundError):
+            lck.update_item(item)
+        assert sorted(item.name for item in lck.list_items()) == sorted(
+            f"item{num}" for num in range(0, 10, 2)
+        )
+        assert lck.get_item("item4").content == "changed"
+        Locker.delete(self.password, dbm_impl.__name__)
+        assert not list(self.test_path.glob(f"{storage.dbm_path.name}*"))
+        with pytest.raises(PhibesNotFoundError):
+            Locker.get(self.password, dbm_impl.__name__)
+
+    @pytest.mark.negative
+    def test_duplicate_locker(self, setup_and_teardown):
+        with pytest.raises(PhibesExistsError):
+            self.my_locker.data_model.storage.create(
+                pw_hash="hash", salt="salt", crypt_id="crypt"
+            )
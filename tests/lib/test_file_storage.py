@@ -0,0 +1,413 @@
+"""
+pytest module for storage.file_storage
+"""
+
+# Standard library imports
+import io
+import json
+import os
+import shutil
+import threading
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib import locks
+from phibes.lib import phibes_file
+from phibes.lib.errors import PhibesExistsError
+from phibes.model import Locker
+from phibes.storage.file_storage import LockerFileStorage
+
+# Local test imports
+from tests.lib.test_helpers import PopulatedLocker
+
+
+class TestManifest(PopulatedLocker):
+
+    def storage(self, lck: Locker) -> LockerFileStorage:
+        return lck.data_model.storage
+
+    def assert_manifest_current(self, lck: Locker):
+        storage = self.storage(lck)
+        kept = storage.manifest()
+        storage.manifest_file.unlink()
+        assert kept == storage.manifest()
+
+    @pytest.mark.positive
+    def test_kept_current(self, setup_and_teardown):
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            for num in range(5):
+                item = lck.create_item(f"item{num}")
+                item.content = f"body{num}"
+                lck.add_item(item)
+            self.assert_manifest_current(lck)
+            item = lck.get_item("item1")
+            item.content = "changed"
+            lck.update_item(item)
+            lck.delete_item("item2")
+            lck.save_item_from_stream(
+                "streamed", io.BytesIO(b"streamed" * 10000), chunk_size=1000
+            )
+            lck.append_item("item3", " and more")
+            self.assert_manifest_current(lck)
+            assert sorted(lck.list_item_names()) == sorted([
+                "item0", "item1", "item3", "item4", "streamed",
+                self.common_item_name
+            ])
+            assert lck.to_dict()['item_count'] == 6
+
+    @pytest.mark.positive
+    def test_list_reads_manifest(self, monkeypatch, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        storage.manifest()
+
+        def no_reading(*args, **kwargs):
+            raise AssertionError("item file read")
+
+        monkeypatch.setattr(phibes_file, 'read', no_reading)
+        assert self.my_locker.list_item_names() == [self.common_item_name]
+        info = storage.list_item_info()
+        item_id = self.my_locker.crypt_impl.encrypt(self.common_item_name)
+        assert set(info[item_id]) == {'timestamp', 'size', 'checksum'}
+
+    @pytest.mark.positive
+    def test_rebuilt_when_stale(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        item = self.my_locker.create_item("second")
+        item.content = "second body"
+        self.my_locker.add_item(item)
+        # items copied in or removed without the manifest being updated
+        source = storage.item_path(self.my_locker.crypt_impl.encrypt("second"))
+        shutil.copy(
+            source,
+            storage.item_path(self.my_locker.crypt_impl.encrypt("third"))
+        )
+        source.unlink()
+        assert sorted(self.my_locker.list_item_names()) == [
+            self.common_item_name, "third"
+        ]
+
+    @pytest.mark.positive
+    def test_changed_in_place(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        item_id = self.my_locker.crypt_impl.encrypt(self.common_item_name)
+        kept = storage.manifest()[item_id]
+        # an item file rewritten some other way, in the same directory
+        item_path = storage.item_path(item_id)
+        rec = phibes_file.read(item_path)
+        phibes_file.write(
+            pth=item_path, salt=rec['salt'], crypt_id=rec['crypt_id'],
+            timestamp="changed", body=rec['body'] + b"more",
+            overwrite=True
+        )
+        info = storage.manifest()[item_id]
+        assert info['timestamp'] == "changed"
+        assert info['size'] == kept['size'] + 4
+
+    @pytest.mark.negative
+    def test_rebuilt_when_unreadable(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        storage.manifest_file.write_text("{not json")
+        assert self.my_locker.list_item_names() == [self.common_item_name]
+        # only rewritten by a save or delete
+        assert storage.manifest_file.read_text() == "{not json"
+        item = self.my_locker.create_item("second")
+        item.content = "second body"
+        self.my_locker.add_item(item)
+        assert len(json.loads(storage.manifest_file.read_text())['items']) == 2
+
+    @pytest.mark.positive
+    def test_not_written_on_read(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        storage.manifest_file.unlink()
+        lck = Locker.get(password=self.password, locker_name=self.locker_name)
+        assert lck.list_item_names() == [self.common_item_name]
+        assert not storage.manifest_file.exists()
+
+    @pytest.mark.negative
+    def test_write_best_effort(self, monkeypatch, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+
+        def unwritable(*args, **kwargs):
+            raise PermissionError("read-only")
+
+        monkeypatch.setattr(
+            type(storage.manifest_file), 'write_text', unwritable
+        )
+        item = self.my_locker.create_item("second")
+        item.content = "second body"
+        self.my_locker.add_item(item)
+        monkeypatch.undo()
+        assert sorted(self.my_locker.list_item_names()) == [
+            self.common_item_name, "second"
+        ]
+
+    @pytest.mark.parametrize("lock_items", [False, True])
+    @pytest.mark.positive
+    def test_bulk_written_once(
+            self, lock_items, monkeypatch, setup_and_teardown
+    ):
+        monkeypatch.setattr(LockerFileStorage, 'lock_items', lock_items)
+        storage = self.storage(self.my_locker)
+        storage.manifest()
+        writes = []
+        write_manifest = storage._write_manifest
+        monkeypatch.setattr(
+            storage, '_write_manifest',
+            lambda entries: writes.append(1) or write_manifest(entries)
+        )
+        rec = {'salt': "salt", 'crypt_id': "crypt_id", 'timestamp': "ts"}
+        storage.save_items({
+            f"item{num}": dict(rec, _ciphertext=f"body{num}".encode())
+            for num in range(10)
+        })
+        storage.delete_items([f"item{num}" for num in range(5)])
+        assert len(writes) == 2
+        assert sorted(storage.manifest()) == sorted(
+            [f"item{num}" for num in range(5, 10)]
+            + [self.my_locker.crypt_impl.encrypt(self.common_item_name)]
+        )
+        monkeypatch.undo()
+        self.assert_manifest_current(self.my_locker)
+
+    @pytest.mark.positive
+    def test_other_items_not_checked(self, monkeypatch, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        for num in range(10):
+            item = self.my_locker.create_item(f"item{num}")
+            item.content = f"body{num}"
+            self.my_locker.add_item(item)
+        checked = []
+        item_entry = LockerFileStorage._item_entry
+        monkeypatch.setattr(
+            LockerFileStorage, '_item_entry',
+            lambda *args: checked.append(args[1]) or item_entry(*args)
+        )
+        assert len(self.my_locker.list_item_names()) == 11
+        assert checked == []
+        item = self.my_locker.get_item("item3")
+        item.content = "changed"
+        self.my_locker.update_item(item)
+        self.my_locker.delete_item("item4")
+        assert checked == self.my_locker.crypt_impl.encrypt_many(
+            ["item3", "item4"]
+        )
+        assert len(storage.manifest()) == 10
+        assert len(checked) == 2
+        # a file added some other way, at once, is still noticed
+        source = storage.item_path(self.my_locker.crypt_impl.encrypt("item5"))
+        shutil.copy(
+            source,
+            storage.item_path(self.my_locker.crypt_impl.encrypt("copied"))
+        )
+        assert "copied" in self.my_locker.list_item_names()
+        monkeypatch.undo()
+        self.assert_manifest_current(self.my_locker)
+
+    @pytest.mark.positive
+    def test_same_tick_told_apart(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        now = storage.locker_path.stat().st_mtime_ns
+        stamp = storage._unchanged_since(now)
+        assert stamp[1] == now - 1
+        # as a change made at the same tick of a coarse clock would
+        os.utime(storage.locker_path, ns=(now, now))
+        assert storage._dir_stamp != stamp
+        assert storage._unchanged_since(now + 1) == storage._dir_stamp
+
+    @pytest.mark.positive
+    def test_deleted_with_locker(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        storage.manifest()
+        Locker.delete(self.password, self.locker_name)
+        assert not storage.locker_path.exists()
+
+
+class TestLazyBody(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_body_read_on_use(self, monkeypatch, setup_and_teardown):
+        item = self.my_locker.get_item(self.common_item_name)
+        assert not item._record.body_loaded
+        assert item.timestamp
+        assert not item._record.body_loaded
+        monkeypatch.setattr(
+            phibes_file, '_read_body', lambda *args: pytest.fail("body read")
+        )
+        header = self.my_locker.data_model.get_item_header(
+            self.my_locker.crypt_impl.encrypt(self.common_item_name)
+        )
+        assert header['timestamp'] == item.timestamp
+        assert 'body' not in header
+        monkeypatch.undo()
+        assert item.content
+        assert item._record is None
+
+
+class TestStreamReplaced(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_chunks_of_record_read(self, setup_and_teardown):
+        storage = self.my_locker.data_model.storage
+        item = self.my_locker.create_item("streamed")
+        item.content = "first" * 100
+        self.my_locker.add_item(item)
+        item_id = self.my_locker.crypt_impl.encrypt("streamed")
+        body = storage.get_item(item_id)['body']
+        rec, chunks = storage.get_item_chunks(item_id, 64)
+        # replaced, with a longer timestamp, before any chunk is read
+        replaced = dict(storage.get_item(item_id))
+        replaced['_ciphertext'] = b"B" * len(body)
+        replaced['timestamp'] = "a longer timestamp than before"
+        storage.save_item(item_id, replaced, replace=True)
+        assert b"".join(chunks) == body
+        assert storage.get_item(item_id)['body'] == b"B" * len(body)
+
+
+class TestDurability(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_transaction_group_commit(self, setup_and_teardown):
+        policy = phibes_file.FsyncPolicy(writes=1)
+        phibes_file.set_fsync_policy(policy)
+        try:
+            with self.my_locker.transaction():
+                group = phibes_file.get_fsync_policy()
+                for num in range(10):
+                    item = self.my_locker.create_item(f"item{num}")
+                    item.content = f"body{num}"
+                    self.my_locker.add_item(item)
+                self.my_locker.delete_item("item0")
+            item = self.my_locker.create_item("after")
+            item.content = "synced alone"
+            self.my_locker.add_item(item)
+        finally:
+            phibes_file.set_fsync_policy(phibes_file.FsyncPolicy())
+        assert group is not policy
+        # the transaction's writes synced together, at its end
+        # (but not item0's, deleted by then)
+        assert (group.file_syncs, group.dir_syncs) == (9, 1)
+        assert (policy.file_syncs, policy.dir_syncs) == (1, 1)
+        assert sorted(self.my_locker.list_item_names()) == sorted(
+            [f"item{num}" for num in range(1, 10)]
+            + ["after", self.common_item_name]
+        )
+        temp_name = f"*{phibes_file.TEMP_SUFFIX}"
+        assert not list(
+            self.my_locker.data_model.storage.locker_path.glob(temp_name)
+        )
+
+
+class TestSaveWithoutReading(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_no_item_read(self, monkeypatch, setup_and_teardown):
+        item = self.my_locker.get_item(self.common_item_name)
+
+        def no_reading(*args, **kwargs):
+            raise AssertionError("item file read")
+
+        monkeypatch.setattr(phibes_file, 'read', no_reading)
+        monkeypatch.setattr(phibes_file, 'read_lazy', no_reading)
+        new_item = self.my_locker.create_item("new")
+        new_item.content = "new body"
+        self.my_locker.add_item(new_item)
+        assert new_item.version == 1
+        with pytest.raises(PhibesExistsError):
+            self.my_locker.add_item(new_item)
+        item.content = "changed"
+        self.my_locker.update_item(item)
+        monkeypatch.undo()
+        assert self.my_locker.get_item(self.common_item_name).version == (
+            item.version
+        )
+
+
+@pytest.mark.skipif(locks.fcntl is None, reason="no fcntl, nothing is locked")
+class TestLocking(PopulatedLocker):
+
+    def write_concurrently(self, lck: Locker, writers: int = 8):
+        errors = []
+
+        def writer(num: int):
+            try:
+                for count in range(3):
+                    item = lck.create_item(f"item{num}.{count}")
+                    item.content = f"body{num}"
+                    lck.add_item(item)
+                    item.content = "changed"
+                    lck.update_item(item)
+                    lck.append_item(item.name, " and more")
+                lck.delete_item(f"item{num}.0")
+            except Exception as err:
+                errors.append(err)
+
+        threads = [
+            threading.Thread(target=writer, args=(num,))
+            for num in range(writers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        storage = lck.data_model.storage
+        kept = storage.manifest()
+        storage.manifest_file.unlink()
+        assert kept == storage.manifest()
+        assert sorted(lck.list_item_names()) == sorted(
+            [f"item{num}.{count}" for num in range(writers)
+             for count in (1, 2)] + [self.common_item_name]
+        )
+        assert lck.get_item("item3.2").content == "changed and more"
+
+    @pytest.mark.positive
+    def test_concurrent_writers(self, setup_and_teardown):
+        self.write_concurrently(self.my_locker)
+
+    @pytest.mark.positive
+    def test_concurrent_item_writers(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setattr(LockerFileStorage, 'lock_items', True)
+        self.write_concurrently(self.my_locker)
+        storage = self.my_locker.data_model.storage
+        assert (storage.locker_path / ".locks").is_dir()
+        Locker.delete(self.password, self.locker_name)
+        assert not storage.locker_path.exists()
+
+    @pytest.mark.positive
+    def test_readers_wait_for_writer(self, setup_and_teardown):
+        storage = self.my_locker.data_model.storage
+        entered, release = threading.Event(), threading.Event()
+
+        def writer():
+            with locks.locked(storage.lock_file, locks.EXCLUSIVE):
+                entered.set()
+                release.wait(5)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert entered.wait(5)
+        locks.reset_wait_stats()
+        timer = threading.Timer(0.1, release.set)
+        timer.start()
+        assert self.my_locker.list_item_names() == [self.common_item_name]
+        assert release.is_set()
+        thread.join()
+        stats = locks.wait_stats()[locks.SHARED]
+        assert stats['contended'] == 1
+        assert stats['wait_seconds'] > 0
+
+    @pytest.mark.positive
+    def test_readers_make_no_lock_files(self, setup_and_teardown):
+        storage = self.my_locker.data_model.storage
+        storage.lock_file.unlink()
+        lck = Locker.get(password=self.password, locker_name=self.locker_name)
+        assert lck.list_item_names() == [self.common_item_name]
+        assert lck.get_item(self.common_item_name)
+        assert not storage.lock_file.exists()
+        assert not (storage.locker_path / ".locks").exists()
+        item = lck.create_item("written")
+        item.content = "body"
+        lck.add_item(item)
+        assert storage.lock_file.exists()
@@ -12,6 +12,7 @@ from typing import Dict
 
 # Local application/library specific imports
 from phibes import crypto
+from phibes.crypto.factory import CryptFactory
 from phibes.cli.cli_config import CLI_CONFIG_FILE_NAME, set_home_dir
 from phibes.lib.config import ConfigModel
 from phibes.lib.config import load_config_file, write_config_file
@@ -44,6 +45,26 @@ plain_texts = [
 ]
 
 
+def count_key_derivations(monkeypatch) -> list:
+    """
+    Instrument every crypt's `create_key` (the costly part of an unlock)
+    Returns a list that gets the crypt_id appended on each call.
+    """
+    derivations = []
+    crypt_classes = {
+        wrapper.crypt_class for wrapper in CryptFactory()._objects.values()
+    }
+    for crypt_class in crypt_classes:
+        def counting_create_key(
+                crypt_self, password, salt,
+                original=crypt_class.create_key
+        ):
+            derivations.append(crypt_self.crypt_id)
+            return original(crypt_self, password, salt)
+        monkeypatch.setattr(crypt_class, 'create_key', counting_create_key)
+    return derivations
+
+
 class ParametrizeArgs(object):
     def __init__(self, params: Dict):
         """
@@ -70,13 +91,14 @@ class BaseTestClass(object):
 class ConfigLoadingTestClass(BaseTestClass):
 
     editor = "vim"
+    store_type = StoreType.FileSystem
 
     def custom_setup(self, tmp_path):
         super(ConfigLoadingTestClass, self).custom_setup(tmp_path)
         set_home_dir(tmp_path)
         conf = ConfigModel(
             store={
-                'store_type': StoreType.FileSystem.name,
+                'store_type': self.store_type.name,
                 'store_path': tmp_path
             },
             store_path=tmp_path
@@ -4,6 +4,7 @@ pytest module for lib.item
 
 # Standard library imports
 from datetime import datetime
+import io
 
 # Related third party imports
 import pytest
@@ -159,3 +160,21 @@ class TestItems(EmptyLocker):
             lck.update_item(s2)
             s3 = lck.get_item("facebook")
             assert s3.content == f"initial content - {plaintext}"
+
+
+class TestTextOnlyCrypt(EmptyLocker):
+
+    @pytest.mark.positive
+    def test_stored_as_text(self, monkeypatch, setup_and_teardown):
+        lck = self.my_locker
+        # as if the crypt had no bytes encryption
+        monkeypatch.setattr(lck.crypt_impl, 'supports_bytes', False)
+        item = lck.create_item("text_only")
+        item.content = "initial content"
+        assert isinstance(item.ciphertext, str)
+        lck.add_item(item)
+        assert lck.get_item("text_only").content == "initial content"
+        assert lck.append_item("text_only", " and more") == 24
+        assert lck.read_item_range("text_only", 8, 7) == b"content"
+        lck.save_item_from_stream("streamed", io.BytesIO(b"streamed"))
+        assert lck.get_item("streamed").content == "streamed"
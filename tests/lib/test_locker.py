@@ -4,15 +4,21 @@ pytest module for lib.locker
 
 # Standard library imports
 from copy import copy
+import io
+import os
+import tracemalloc
 
 # Related third party imports
 import pytest
 
 # Local application/library specific imports
 from phibes import crypto
+from phibes.lib import phibes_file
 from phibes.lib.errors import PhibesAuthError
+from phibes.lib.errors import PhibesConflictError
 from phibes.lib.errors import PhibesExistsError
 from phibes.lib.errors import PhibesNotFoundError
+from phibes.lib.errors import PhibesUnknownError
 from phibes.model import Locker
 
 # Local test imports
@@ -131,6 +137,41 @@ class TestItemStuff(PopulatedLocker):
             assert len(all) == 1
             return
 
+    @pytest.mark.positive
+    def test_list_decrypts_in_batch(self, monkeypatch, setup_and_teardown):
+        all_lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in all_lockers:
+            for num in range(5):
+                item = lck.create_item(item_name=f"batch_item_{num}")
+                item.content = f"batch content {num}"
+                lck.add_item(item)
+            monkeypatch.setattr(
+                lck.crypt_impl, 'decrypt', lambda val: pytest.fail("single")
+            )
+            found = {item.name: item.content for item in lck.list_items()}
+            assert len(found) == 6
+            for num in range(5):
+                assert found[f"batch_item_{num}"] == f"batch content {num}"
+            monkeypatch.undo()
+
+    @pytest.mark.negative
+    def test_list_salt_mismatch(self, monkeypatch, setup_and_teardown):
+        all_lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in all_lockers:
+            storage = lck.data_model.storage
+            item_id = lck.crypt_impl.encrypt(self.common_item_name)
+            rec = dict(storage.get_item(item_id))
+            rec['_ciphertext'] = rec.pop('body')
+            rec['salt'] = "not the locker's salt"
+            storage.save_item(item_id, rec, replace=True)
+            monkeypatch.setattr(
+                lck.crypt_impl, 'decrypt_many',
+                lambda vals: pytest.fail("decrypted")
+            )
+            with pytest.raises(PhibesUnknownError):
+                lck.list_items()
+            monkeypatch.undo()
+
     @pytest.mark.negative
     def test_get_missing_item(self, tmp_path, datadir, setup_and_teardown):
         all_lockers = list(self.lockers.values()) + [self.my_locker]
@@ -139,6 +180,79 @@ class TestItemStuff(PopulatedLocker):
                 lck.get_item("never")
         return
 
+    @pytest.mark.positive
+    def test_get_item_info(self, monkeypatch, setup_and_teardown):
+        all_lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in all_lockers:
+            found = lck.get_item(self.common_item_name)
+            monkeypatch.setattr(
+                lck.crypt_impl, 'decrypt', lambda val: pytest.fail("decrypt")
+            )
+            info = lck.get_item_info(self.common_item_name)
+            monkeypatch.undo()
+            assert info == {
+                'name': self.common_item_name,
+                'timestamp': found.timestamp,
+                'crypt_id': lck.crypt_impl.crypt_id
+            }
+            with pytest.raises(PhibesNotFoundError):
+                lck.get_item_info("never")
+
+    @pytest.mark.negative
+    def test_update_conflict(self, setup_and_teardown):
+        all_lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in all_lockers:
+            first = lck.get_item(self.common_item_name)
+            second = lck.get_item(self.common_item_name)
+            first.content = "first edit"
+            lck.update_item(first)
+            assert first.version == second.version + 1
+            second.content = "second edit, from the old version"
+            with pytest.raises(PhibesConflictError):
+                lck.update_item(second)
+            found = lck.get_item(self.common_item_name)
+            assert found.content == "first edit"
+            assert found.version == first.version
+            # re-read, it can be saved
+            found.content = "second edit"
+            lck.update_item(found)
+            assert lck.get_item(self.common_item_name).version == (
+                first.version + 1
+            )
+
+    @pytest.mark.positive
+    def test_bulk(self, setup_and_teardown):
+        all_lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in all_lockers:
+            items = []
+            for num in range(12):
+                item = lck.create_item(f"bulk{num}")
+                item.content = f"body{num}"
+                items.append(item)
+            lck.add_items(items)
+            assert [item.version for item in items] == [1] * 12
+            with pytest.raises(PhibesExistsError):
+                lck.add_items(items[:2])
+            for item in items[::2]:
+                item.content = "changed"
+            lck.save_items(items[::2], replace=True)
+            assert items[0].version == 2
+            lck.delete_items([f"bulk{num}" for num in range(1, 12, 2)])
+            with pytest.raises(PhibesNotFoundError):
+                lck.delete_items(["bulk1"])
+            found = {item.name: item.content for item in lck.list_items()}
+            assert found == dict(
+                [(f"bulk{num}", "changed") for num in range(0, 12, 2)]
+                + [(self.common_item_name, self.content)]
+            )
+            storage = lck.data_model.storage
+            item_ids = lck.crypt_impl.encrypt_many(["bulk4", "bulk0"])
+            recs = storage.get_items(item_ids)
+            assert list(recs) == item_ids
+            assert recs[item_ids[0]]['timestamp']
+            with pytest.raises(PhibesNotFoundError):
+                storage.get_items(lck.crypt_impl.encrypt_many(["bulk1"]))
+
     @pytest.mark.positive
     @pytest.mark.parametrize("plaintext", plain_texts)
     def test_update_item(self, plaintext, setup_and_teardown):
@@ -185,3 +299,175 @@ class TestAuth(EmptyLocker):
 
     def custom_teardown(self, tmp_path):
         super(TestAuth, self).custom_teardown(tmp_path)
+
+
+class TestStreaming(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_stream_round_trip(self, setup_and_teardown):
+        content = os.urandom(300000)
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            saved = lck.save_item_from_stream(
+                "attachment", io.BytesIO(content), chunk_size=1000
+            )
+            assert saved == len(content)
+            assert lck.get_item("attachment").content_bytes == content
+            dest = io.BytesIO()
+            assert lck.read_item_to_stream(
+                "attachment", dest, chunk_size=777
+            ) == len(content)
+            assert dest.getvalue() == content
+            lck.save_item_from_stream(
+                "attachment", io.BytesIO(content[::-1]), replace=True
+            )
+            dest = io.BytesIO()
+            lck.read_item_to_stream("attachment", dest)
+            assert dest.getvalue() == content[::-1]
+            # items saved whole stream out too
+            dest = io.BytesIO()
+            lck.read_item_to_stream(self.common_item_name, dest)
+            assert dest.getvalue() == self.content.encode('utf-8')
+
+    @pytest.mark.positive
+    def test_constant_memory(self, tmp_path, setup_and_teardown):
+        size = 16 * 2 ** 20
+        src_path = tmp_path / "big_src"
+        with src_path.open('wb') as src:
+            for _ in range(size // 2 ** 20):
+                src.write(os.urandom(2 ** 20))
+        dest_path = tmp_path / "big_dest"
+        tracemalloc.start()
+        try:
+            with src_path.open('rb') as src:
+                self.my_locker.save_item_from_stream("big", src)
+            with dest_path.open('wb') as dest:
+                self.my_locker.read_item_to_stream("big", dest)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak < 2 ** 20
+        assert src_path.read_bytes() == dest_path.read_bytes()
+
+    @pytest.mark.negative
+    def test_stream_exists(self, setup_and_teardown):
+        with pytest.raises(PhibesExistsError):
+            self.my_locker.save_item_from_stream(
+                self.common_item_name, io.BytesIO(b"content")
+            )
+        with pytest.raises(PhibesNotFoundError):
+            self.my_locker.save_item_from_stream(
+                "never", io.BytesIO(b"content"), replace=True
+            )
+        with pytest.raises(AttributeError):
+            self.my_locker.save_item_from_stream("empty", io.BytesIO())
+
+
+class TestReadRange(PopulatedLocker):
+
+    ranges = [
+        (0, 10), (5, 1), (15, 17), (16, 16), (1000, 3000), (0, 0),
+        (299990, 100), (300000, 5), (400000, 5)
+    ]
+
+    @pytest.mark.positive
+    def test_read_range(self, setup_and_teardown):
+        content = os.urandom(300000)
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            item = lck.create_item("ranged")
+            item.content_bytes = content
+            lck.add_item(item)
+            found = lck.get_item("ranged")
+            for offset, length in self.ranges:
+                expected = content[offset:offset + length]
+                assert lck.read_item_range("ranged", offset, length) == (
+                    expected
+                )
+                assert found.read_range(offset, length) == expected
+            text = self.content.encode('utf-8')
+            assert lck.read_item_range(self.common_item_name, 5, 9) == (
+                text[5:14]
+            )
+
+    @pytest.mark.negative
+    def test_bad_range(self, setup_and_teardown):
+        with pytest.raises(ValueError):
+            self.my_locker.read_item_range(self.common_item_name, -1, 5)
+        with pytest.raises(PhibesNotFoundError):
+            self.my_locker.read_item_range("never", 0, 5)
+
+
+class TestAppend(PopulatedLocker):
+
+    @pytest.mark.positive
+    def test_append(self, setup_and_teardown):
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            expected = self.content.encode('utf-8')
+            for num in range(20):
+                line = f"recovery code {num}\n"
+                new_length = lck.append_item(self.common_item_name, line)
+                expected += line.encode('utf-8')
+                assert new_length == len(expected)
+            new_length = lck.append_item(self.common_item_name, b"\x00\xff")
+            expected += b"\x00\xff"
+            assert lck.get_item(self.common_item_name).content_bytes == (
+                expected
+            )
+
+    @pytest.mark.positive
+    def test_append_writes_only_delta(self, monkeypatch, setup_and_teardown):
+        lck = self.my_locker
+        lck.append_item(self.common_item_name, "first")
+        item_id = lck.crypt_impl.encrypt(self.common_item_name)
+        before = phibes_file.read(
+            lck.data_model.storage.locker_path / f"{item_id}.cry"
+        )['body']
+        encrypted = []
+        real_stream = lck.crypt_impl.bytes_stream
+
+        def spy_stream(offset=0):
+            transform = real_stream(offset)
+
+            def spy(chunk):
+                encrypted.append((offset, len(chunk)))
+                return transform(chunk)
+            return spy
+
+        monkeypatch.setattr(lck.crypt_impl, 'bytes_stream', spy_stream)
+        lck.append_item(self.common_item_name, "second")
+        assert encrypted == [(len(before), len("second"))]
+        after = phibes_file.read(
+            lck.data_model.storage.locker_path / f"{item_id}.cry"
+        )['body']
+        assert after.startswith(before)
+
+    @pytest.mark.positive
+    def test_append_timestamp_length_change(self, setup_and_teardown):
+        lck = self.my_locker
+        item = lck.get_item(self.common_item_name)
+        item.timestamp = "short"
+        lck.update_item(item)
+        lck.append_item(self.common_item_name, "more")
+        found = lck.get_item(self.common_item_name)
+        assert found.content == self.content + "more"
+        assert found.timestamp != "short"
+
+    @pytest.mark.positive
+    def test_append_text_layout(self, setup_and_teardown):
+        lck = self.my_locker
+        lck.data_model.create_item(
+            item_id=lck.crypt_impl.encrypt("old_style"),
+            content=lck.crypt_impl.encrypt("old content"),
+            timestamp="then"
+        )
+        assert lck.append_item("old_style", " and new") == len(
+            "old content and new"
+        )
+        assert lck.get_item("old_style").content == "old content and new"
+        assert lck.append_item("old_style", "!") == len(
+            "old content and new!"
+        )
+
+    @pytest.mark.negative
+    def test_append_missing(self, setup_and_teardown):
+        with pytest.raises(PhibesNotFoundError):
+            self.my_locker.append_item("never", "content")
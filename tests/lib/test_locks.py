@@ -0,0 +1,104 @@
+"""
+pytest module for lib.locks
+"""
+
+# Standard library imports
+import threading
+import time
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib import locks
+
+pytestmark = pytest.mark.skipif(
+    locks.fcntl is None, reason="no fcntl, nothing is locked"
+)
+
+
+def hold(pth, mode, entered: threading.Event, release: threading.Event):
+    with locks.locked(pth, mode):
+        entered.set()
+        release.wait(5)
+
+
+class TestLocks(object):
+
+    def start_holder(self, pth, mode):
+        entered, release = threading.Event(), threading.Event()
+        thread = threading.Thread(
+            target=hold, args=(pth, mode, entered, release)
+        )
+        thread.start()
+        assert entered.wait(5)
+        return thread, release
+
+    @pytest.mark.positive
+    def test_shared_together(self, tmp_path):
+        pth = tmp_path / "test.lock"
+        thread, release = self.start_holder(pth, locks.SHARED)
+        locks.reset_wait_stats()
+        try:
+            with locks.locked(pth, locks.SHARED):
+                pass
+        finally:
+            release.set()
+            thread.join()
+        assert locks.wait_stats()[locks.SHARED]['contended'] == 0
+
+    @pytest.mark.positive
+    def test_exclusive_waits(self, tmp_path):
+        pth = tmp_path / "test.lock"
+        thread, release = self.start_holder(pth, locks.SHARED)
+        locks.reset_wait_stats()
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        start = time.perf_counter()
+        with locks.locked(pth, locks.EXCLUSIVE):
+            assert release.is_set()
+        waited = time.perf_counter() - start
+        thread.join()
+        stats = locks.wait_stats()[locks.EXCLUSIVE]
+        assert stats['acquired'] == 1
+        assert stats['contended'] == 1
+        assert 0 < stats['wait_seconds'] <= waited
+        assert stats['max_wait_seconds'] == stats['wait_seconds']
+
+    @pytest.mark.positive
+    def test_reentrant(self, tmp_path):
+        pth = tmp_path / "test.lock"
+        locks.reset_wait_stats()
+        with locks.locked(pth, locks.EXCLUSIVE):
+            with locks.locked(pth, locks.EXCLUSIVE):
+                with locks.locked(pth, locks.SHARED):
+                    pass
+        assert locks.wait_stats()[locks.EXCLUSIVE]['acquired'] == 1
+        # released
+        thread, release = self.start_holder(pth, locks.EXCLUSIVE)
+        release.set()
+        thread.join()
+
+    @pytest.mark.negative
+    def test_no_upgrade(self, tmp_path):
+        pth = tmp_path / "test.lock"
+        with locks.locked(pth, locks.SHARED):
+            with pytest.raises(RuntimeError):
+                with locks.locked(pth, locks.EXCLUSIVE):
+                    pass
+        with pytest.raises(ValueError):
+            with locks.locked(pth, "neither"):
+                pass
+
+    @pytest.mark.positive
+    def test_not_created(self, tmp_path):
+        pth = tmp_path / "test.lock"
+        locks.reset_wait_stats()
+        with locks.locked(pth, locks.SHARED, create=False):
+            pass
+        assert not pth.exists()
+        assert locks.wait_stats()[locks.SHARED]['acquired'] == 0
+        pth.touch(mode=0o400)
+        with locks.locked(pth, locks.SHARED, create=False):
+            pass
+        assert locks.wait_stats()[locks.SHARED]['acquired'] == 1
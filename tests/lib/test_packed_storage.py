@@ -0,0 +1,190 @@
+"""
+pytest module for storage.packed_storage
+"""
+
+# Standard library imports
+import io
+import threading
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib import locks
+from phibes.lib.errors import PhibesNotFoundError
+from phibes.model import Locker
+from phibes.storage import packed_storage
+from phibes.storage.packed_storage import PackedFileStorage
+from phibes.storage.types import StoreType
+
+# Local test imports
+from tests.lib import test_locker
+from tests.lib.test_helpers import PopulatedLocker
+
+
+class TestPackedItemStuff(test_locker.TestItemStuff):
+    store_type = StoreType.PackedFile
+
+
+class TestPackedStreaming(test_locker.TestStreaming):
+    store_type = StoreType.PackedFile
+
+
+class TestPackedReadRange(test_locker.TestReadRange):
+    store_type = StoreType.PackedFile
+
+
+class TestPackedFile(PopulatedLocker):
+
+    store_type = StoreType.PackedFile
+
+    def storage(self, lck: Locker) -> PackedFileStorage:
+        return lck.data_model.storage
+
+    @pytest.mark.positive
+    def test_one_file_per_locker(self, setup_and_teardown):
+        lockers = list(self.lockers.values()) + [self.my_locker]
+        for lck in lockers:
+            for num in range(20):
+                item = lck.create_item(f"item{num}")
+                item.content = f"body{num}"
+                lck.add_item(item)
+        found = {
+            pth.name for pth in self.test_path.iterdir()
+            if pth.suffix == f".{packed_storage.PACK_FILE_EXT}"
+        }
+        assert found == {self.storage(lck).pack_path.name for lck in lockers}
+        assert not [pth for pth in self.test_path.iterdir() if pth.is_dir()]
+
+    @pytest.mark.positive
+    def test_update_delete(self, setup_and_teardown):
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            for num in range(10):
+                item = lck.create_item(f"item{num}")
+                item.content = f"body{num}"
+                lck.add_item(item)
+            for num in range(0, 10, 2):
+                item = lck.get_item(f"item{num}")
+                item.content = "changed"
+                lck.update_item(item)
+            for num in range(1, 10, 2):
+                lck.delete_item(f"item{num}")
+            with pytest.raises(PhibesNotFoundError):
+                lck.get_item("item1")
+            with pytest.raises(PhibesNotFoundError):
+                lck.delete_item("item1")
+            assert sorted(item.name for item in lck.list_items()) == sorted(
+                [f"item{num}" for num in range(0, 10, 2)]
+                + [self.common_item_name]
+            )
+            assert lck.get_item("item4").content == "changed"
+
+    @pytest.mark.positive
+    def test_index_rebuilt(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        item = self.my_locker.create_item("second")
+        item.content = "second body"
+        self.my_locker.add_item(item)
+        packed_storage._indexes.clear()
+        storage.index_path.unlink()
+        assert self.my_locker.get_item("second").content == "second body"
+        # by a reader, only in memory
+        assert not storage.index_path.exists()
+        # a record only partly written is left out, and cut off by a writer
+        with storage.pack_path.open('ab') as seg:
+            seg.write(packed_storage.ENTRY.pack(packed_storage.OP_PUT, 3, 99))
+        size = storage.pack_path.stat().st_size
+        assert len(self.my_locker.list_items()) == 2
+        assert storage.pack_path.stat().st_size == size
+        self.my_locker.delete_item("second")
+        assert storage.index_path.exists()
+        assert storage.pack_path.stat().st_size == storage.index.end
+        # another writer's entries are picked up from the index file
+        other = Locker.get(self.password, self.locker_name)
+        item = other.create_item("third")
+        item.content = "third body"
+        other.add_item(item)
+        assert self.my_locker.get_item("third").content == "third body"
+
+    @pytest.mark.negative
+    def test_failed_stream_leaves_no_entry(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        size = storage.pack_path.stat().st_size
+
+        class Failing(io.BytesIO):
+            def read(self, *args):
+                if self.tell():
+                    raise OSError("source failed")
+                return super(Failing, self).read(*args)
+
+        with pytest.raises(OSError):
+            self.my_locker.save_item_from_stream(
+                "partial", Failing(b"content" * 100), chunk_size=10
+            )
+        assert storage.pack_path.stat().st_size == size
+        with pytest.raises(PhibesNotFoundError):
+            self.my_locker.get_item("partial")
+
+    @pytest.mark.positive
+    def test_compact(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setattr(PackedFileStorage, 'compact_min_bytes', 0)
+        storage = self.storage(self.my_locker)
+        for num in range(50):
+            item = self.my_locker.get_item(self.common_item_name)
+            item.content = f"version {num}"
+            self.my_locker.update_item(item)
+        index = storage.index
+        assert index.dead <= index.live
+        assert storage.pack_path.stat().st_size == index.end
+        assert self.my_locker.get_item(self.common_item_name).content == (
+            "version 49"
+        )
+        packed_storage._indexes.clear()
+        locker = Locker.get(self.password, self.locker_name)
+        assert locker.get_item(self.common_item_name).content == "version 49"
+
+    @pytest.mark.positive
+    def test_delete_locker(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        Locker.delete(self.password, self.locker_name)
+        assert not storage.pack_path.exists()
+        assert not storage.index_path.exists()
+        with pytest.raises(PhibesNotFoundError):
+            Locker.get(self.password, self.locker_name)
+
+    @pytest.mark.skipif(
+        locks.fcntl is None, reason="no fcntl, nothing is locked"
+    )
+    @pytest.mark.positive
+    def test_concurrent_writers(self, monkeypatch, setup_and_teardown):
+        monkeypatch.setattr(PackedFileStorage, 'compact_min_bytes', 0)
+        errors = []
+
+        def writer(num: int):
+            try:
+                lck = Locker.get(self.password, self.locker_name)
+                for count in range(5):
+                    item = lck.create_item(f"item{num}.{count}")
+                    item.content = f"body{num}"
+                    lck.add_item(item)
+                    item.content = "changed"
+                    lck.update_item(item)
+                lck.delete_item(f"item{num}.0")
+            except Exception as err:
+                errors.append(err)
+
+        threads = [
+            threading.Thread(target=writer, args=(num,)) for num in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        packed_storage._indexes.clear()
+        lck = Locker.get(self.password, self.locker_name)
+        assert sorted(lck.list_item_names()) == sorted(
+            [f"item{num}.{count}" for num in range(8)
+             for count in range(1, 5)] + [self.common_item_name]
+        )
+        assert lck.get_item("item3.4").content == "changed"
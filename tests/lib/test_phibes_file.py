@@ -3,13 +3,20 @@ pytest module for lib.phibes_file
 """
 
 # Standard library imports
+import os
 from pathlib import Path
+import threading
+import zlib
 
 # Related third party imports
 import pytest
 
 # Local application/library specific imports
 from phibes.lib import phibes_file
+from phibes.lib.errors import PhibesConflictError
+
+
+DATA_PATH = Path(__file__).parent.parent / 'data'
 
 
 class TestPhibesFile(object):
@@ -138,3 +145,497 @@ class TestPhibesFile(object):
         assert result['crypt_id'] == self.test_crypt_id
         assert result['timestamp'] == self.test_timestamp
         assert result['body'] == ''
+
+    @pytest.mark.positive
+    def test_write_read_bytes(self):
+        body = bytes(range(256)) * 4
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=memoryview(body)
+        )
+        assert self.pth.read_bytes().startswith(phibes_file.MAGIC)
+        result = phibes_file.read(self.pth)
+        assert result['body'] == body
+        assert result['salt'] == self.test_salt
+        assert result['crypt_id'] == self.test_crypt_id
+        assert result['timestamp'] == self.test_timestamp
+        # the body is stored raw, with no text encoding
+        assert self.pth.stat().st_size < len(body) + 100
+
+    @pytest.mark.negative
+    def test_truncated_bytes(self):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=self.test_body.encode('utf-8')
+        )
+        self.pth.write_bytes(self.pth.read_bytes()[:-1])
+        with pytest.raises(ValueError):
+            phibes_file.read(self.pth)
+
+    @pytest.mark.positive
+    def test_write_read_chunks(self):
+        chunks = [b"", b"first", b"", b"second" * 1000, b"third"]
+        length = phibes_file.write_chunks(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            chunks=iter(chunks)
+        )
+        assert length == len(b"".join(chunks))
+        assert phibes_file.read(self.pth)['body'] == b"".join(chunks)
+        rec, body = phibes_file.read_chunks(self.pth, chunk_size=100)
+        assert 'body' not in rec
+        assert rec['timestamp'] == self.test_timestamp
+        read_chunks = list(body)
+        assert max(len(chunk) for chunk in read_chunks) == 100
+        assert b"".join(read_chunks) == b"".join(chunks)
+
+    @pytest.mark.positive
+    def test_read_chunks_text(self):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=self.test_body
+        )
+        rec, body = phibes_file.read_chunks(self.pth)
+        assert body is None
+        assert rec['body'] == self.test_body
+
+    @pytest.mark.positive
+    def test_read_range(self):
+        body = bytes(range(256))
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=body
+        )
+        rec, part = phibes_file.read_range(self.pth, 10, 20)
+        assert part == body[10:30]
+        assert rec['salt'] == self.test_salt
+        assert phibes_file.read_range(self.pth, 250, 20)[1] == body[250:]
+        assert phibes_file.read_range(self.pth, 256, 20)[1] == b""
+        with pytest.raises(ValueError):
+            phibes_file.read_range(self.pth, -1, 20)
+
+    @pytest.mark.parametrize(
+        "body", [test_body, test_body.encode('utf-8')]
+    )
+    @pytest.mark.positive
+    def test_pack_unpack(self, body):
+        fields = {
+            'salt': self.test_salt,
+            'crypt_id': self.test_crypt_id,
+            'timestamp': self.test_timestamp
+        }
+        data = b"".join(phibes_file.pack(body=body, version=1, **fields))
+        # only the binary layout has a version
+        version = {'version': 1} if isinstance(body, bytes) else {}
+        assert phibes_file.unpack(data) == dict(fields, body=body, **version)
+        # the same bytes `write` puts in a new file
+        phibes_file.write(self.pth, body=body, **fields)
+        assert self.pth.read_bytes() == data
+
+    @pytest.mark.parametrize(
+        "body", [test_body, test_body.encode('utf-8')]
+    )
+    @pytest.mark.positive
+    def test_read_header_only(self, body):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=body
+        )
+        header = {
+            'salt': self.test_salt,
+            'crypt_id': self.test_crypt_id,
+            'timestamp': self.test_timestamp
+        }
+        if isinstance(body, bytes):
+            header['version'] = 1
+        assert phibes_file.read(self.pth, with_body=False) == header
+
+    @pytest.mark.parametrize(
+        "body", [test_body, test_body.encode('utf-8')]
+    )
+    @pytest.mark.positive
+    def test_read_lazy(self, body):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=body
+        )
+        rec = phibes_file.read_lazy(self.pth)
+        assert rec['timestamp'] == self.test_timestamp
+        assert not rec.body_loaded
+        assert rec['body'] == body
+        assert rec.body_loaded
+        assert dict(rec) == phibes_file.read(self.pth)
+
+    @pytest.mark.positive
+    def test_read_lazy_changed(self):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=self.test_body.encode('utf-8')
+        )
+        rec = phibes_file.read_lazy(self.pth)
+        # replaced before the body is read: fields & body read together
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp="later",
+            body=b"new body",
+            overwrite=True
+        )
+        assert rec['body'] == b"new body"
+        assert rec['timestamp'] == "later"
+
+    @pytest.mark.positive
+    def test_compressed(self):
+        body = b"compressible " * 1000
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=body,
+            compress=True
+        )
+        data = self.pth.read_bytes()
+        assert data[len(phibes_file.MAGIC) + 1] & phibes_file.FLAG_COMPRESSED
+        assert len(data) < len(body) // 10
+        assert phibes_file.read(self.pth)['body'] == body
+        assert phibes_file.read_lazy(self.pth)['body'] == body
+        assert phibes_file.unpack(data)['body'] == body
+        # whole-record fallbacks, as for the text layout
+        assert phibes_file.read_chunks(self.pth)[1] is None
+        assert phibes_file.read_chunks(self.pth)[0]['body'] == body
+        assert phibes_file.read_range(self.pth, 0, 10)[1] is None
+        assert phibes_file.append(self.pth, bytes, "later") is None
+        assert phibes_file.read(self.pth)['body'] == body
+
+    @pytest.mark.positive
+    def test_incompressible_stored_as_is(self):
+        body = bytes(range(256))
+        data = b"".join(phibes_file.pack(
+            self.test_salt, self.test_crypt_id, self.test_timestamp,
+            body, compress=True
+        ))
+        assert data[len(phibes_file.MAGIC) + 1] == 0
+        assert phibes_file.unpack(data)['body'] == body
+
+    @pytest.mark.negative
+    def test_unknown_flags(self):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=b"body"
+        )
+        data = bytearray(self.pth.read_bytes())
+        data[len(phibes_file.MAGIC) + 1] = 0x80
+        self.pth.write_bytes(data)
+        with pytest.raises(ValueError):
+            phibes_file.read(self.pth)
+
+    @pytest.mark.negative
+    def test_corrupt_compressed(self):
+        data = b"".join(phibes_file.pack(
+            self.test_salt, self.test_crypt_id, self.test_timestamp,
+            zlib.compress(b"x" * 100)[:-1]
+        ))
+        data = bytearray(data)
+        data[len(phibes_file.MAGIC) + 1] = phibes_file.FLAG_COMPRESSED
+        with pytest.raises(ValueError):
+            phibes_file.unpack(bytes(data))
+
+    @pytest.mark.parametrize(
+        "pth", sorted(DATA_PATH.glob("*/*/*.cry")), ids=lambda pth: pth.name
+    )
+    @pytest.mark.positive
+    def test_read_fixtures(self, pth):
+        rec = phibes_file.read(pth)
+        assert set(rec) == set(phibes_file.RECORD_FIELDS)
+        assert rec['body']
+        assert phibes_file.read(pth, with_body=False) == {
+            key: val for key, val in rec.items() if key != 'body'
+        }
+
+    @pytest.mark.negative
+    def test_failed_write_keeps_old(self):
+        phibes_file.write(
+            self.pth,
+            salt=self.test_salt,
+            crypt_id=self.test_crypt_id,
+            timestamp=self.test_timestamp,
+            body=b"old body"
+        )
+
+        def failing():
+            yield b"new"
+            raise OSError("disk full")
+
+        with pytest.raises(OSError):
+            phibes_file.write_chunks(
+                self.pth,
+                salt=self.test_salt,
+                crypt_id=self.test_crypt_id,
+                timestamp=self.test_timestamp,
+                chunks=failing(),
+                overwrite=True
+            )
+        assert phibes_file.read(self.pth)['body'] == b"old body"
+        temp_name = f".{self.pth.name}.*{phibes_file.TEMP_SUFFIX}"
+        assert not list(self.pth.parent.glob(temp_name))
+
+
+class TestFsyncPolicy(object):
+
+    def write_items(self, dir_path: Path, count: int):
+        for num in range(count):
+            phibes_file.write(
+                dir_path / f"item{num}.cry",
+                salt="salt",
+                crypt_id="crypt_id",
+                timestamp="timestamp",
+                body=b"body",
+                overwrite=True
+            )
+
+    @pytest.fixture
+    def synced(self, monkeypatch):
+        """
+        fds fsynced, in order
+        """
+        synced = []
+        fsync = os.fsync
+
+        def counting(fd):
+            synced.append(fd)
+            fsync(fd)
+
+        monkeypatch.setattr(os, 'fsync', counting)
+        yield synced
+        phibes_file.set_fsync_policy(phibes_file.FsyncPolicy())
+
+    @pytest.mark.positive
+    def test_never(self, tmp_path, synced):
+        self.write_items(tmp_path, 3)
+        phibes_file.sync()
+        assert synced == []
+
+    @pytest.mark.positive
+    def test_per_write(self, tmp_path, synced):
+        policy = phibes_file.FsyncPolicy(writes=1)
+        phibes_file.set_fsync_policy(policy)
+        self.write_items(tmp_path, 3)
+        assert (policy.file_syncs, policy.dir_syncs) == (3, 3)
+        assert len(synced) == 6
+
+    @pytest.mark.positive
+    def test_group_by_writes(self, tmp_path, synced):
+        policy = phibes_file.FsyncPolicy(writes=4)
+        phibes_file.set_fsync_policy(policy)
+        self.write_items(tmp_path, 10)
+        assert (policy.file_syncs, policy.dir_syncs) == (8, 2)
+        phibes_file.sync()
+        assert (policy.file_syncs, policy.dir_syncs) == (10, 3)
+
+    @pytest.mark.positive
+    def test_group_by_interval(self, tmp_path, synced):
+        policy = phibes_file.FsyncPolicy(interval_ms=0)
+        phibes_file.set_fsync_policy(policy)
+        self.write_items(tmp_path, 2)
+        assert (policy.file_syncs, policy.dir_syncs) == (2, 2)
+
+    @pytest.mark.positive
+    def test_group_commit(self, tmp_path, synced):
+        phibes_file.set_fsync_policy(phibes_file.FsyncPolicy(writes=1))
+        with phibes_file.group_commit() as group:
+            self.write_items(tmp_path, 10)
+            assert synced == []
+        assert (group.file_syncs, group.dir_syncs) == (10, 1)
+        assert phibes_file.get_fsync_policy().per_write
+
+    @pytest.mark.positive
+    def test_group_commit_this_thread(self, tmp_path, synced):
+        policy = phibes_file.FsyncPolicy(writes=1)
+        phibes_file.set_fsync_policy(policy)
+        other_path = tmp_path / "other"
+        other_path.mkdir()
+        with phibes_file.group_commit() as group:
+            # another thread's writes are still synced as they're made
+            thread = threading.Thread(
+                target=self.write_items, args=(other_path, 2)
+            )
+            thread.start()
+            thread.join()
+            assert (policy.file_syncs, policy.dir_syncs) == (2, 2)
+            self.write_items(tmp_path, 3)
+            assert policy.file_syncs == 2
+        assert (group.file_syncs, group.dir_syncs) == (3, 1)
+
+    @pytest.mark.positive
+    def test_group_commit_grouped_policy(self, tmp_path, synced):
+        policy = phibes_file.FsyncPolicy(writes=100)
+        phibes_file.set_fsync_policy(policy)
+        with phibes_file.group_commit() as group:
+            self.write_items(tmp_path, 3)
+            with phibes_file.group_commit():
+                (tmp_path / "inner").mkdir()
+                self.write_items(tmp_path / "inner", 2)
+            # the outer block's end syncs, not the inner one's
+            assert synced == []
+        assert group is policy
+        assert not policy._pending
+        assert (policy.file_syncs, policy.dir_syncs) == (5, 2)
+
+    @pytest.mark.positive
+    def test_group_commit_never(self, tmp_path, synced):
+        with phibes_file.group_commit():
+            self.write_items(tmp_path, 3)
+        assert synced == []
+
+
+class TestVersions(object):
+
+    fields = {'salt': "salt", 'crypt_id': "crypt_id", 'timestamp': "ts"}
+
+    @pytest.mark.positive
+    def test_counted(self, tmp_path):
+        pth = tmp_path / "item.cry"
+        assert phibes_file.write(pth, body=b"one", **self.fields) == 1
+        assert phibes_file.write(
+            pth, body=b"two", overwrite=True, **self.fields
+        ) == 2
+        phibes_file.append(pth, lambda offset: b" more", "ts")
+        assert phibes_file.read(pth)['version'] == 3
+        # the header changes length
+        phibes_file.append(pth, lambda offset: b" more", "later")
+        assert phibes_file.read(pth)['version'] == 4
+        assert phibes_file.write(
+            pth, body=b"five", replace=True, expect_version=4, **self.fields
+        ) == 5
+
+    @pytest.mark.positive
+    def test_append_header_after_body(self, tmp_path, monkeypatch):
+        pth = tmp_path / "item.cry"
+        phibes_file.write(pth, body=b"one", **self.fields)
+        seen = []
+        fsync = os.fsync
+
+        def reading(fd):
+            # the body is synced before any of the fields change
+            fsync(fd)
+            seen.append(phibes_file.read(pth))
+
+        monkeypatch.setattr(os, 'fsync', reading)
+        phibes_file.append(pth, lambda offset: b" more", "TS")
+        assert [(rec['version'], rec['timestamp'], rec['body'])
+                for rec in seen] == [(1, "ts", b"one")]
+        rec = phibes_file.read(pth)
+        assert (rec['version'], rec['timestamp'], rec['body']) == (
+            2, "TS", b"one more"
+        )
+
+    @pytest.mark.negative
+    def test_conflict(self, tmp_path):
+        pth = tmp_path / "item.cry"
+        phibes_file.write(pth, body=b"one", **self.fields)
+        phibes_file.write(pth, body=b"two", overwrite=True, **self.fields)
+        with pytest.raises(PhibesConflictError):
+            phibes_file.write(
+                pth, body=b"stale", overwrite=True, expect_version=1,
+                **self.fields
+            )
+        assert phibes_file.read(pth)['body'] == b"two"
+        with pytest.raises(FileNotFoundError):
+            phibes_file.write(
+                tmp_path / "missing.cry", body=b"new", replace=True,
+                **self.fields
+            )
+        assert not list(tmp_path.glob(f"*{phibes_file.TEMP_SUFFIX}"))
+
+    @pytest.mark.positive
+    def test_concurrent_writers(self, tmp_path):
+        pth = tmp_path / "item.cry"
+        phibes_file.write(pth, body=b"start", **self.fields)
+        results = []
+
+        def writer(num: int):
+            try:
+                phibes_file.write(
+                    pth, body=f"writer {num}".encode(), replace=True,
+                    expect_version=1, **self.fields
+                )
+                results.append(num)
+            except PhibesConflictError:
+                pass
+
+        threads = [
+            threading.Thread(target=writer, args=(num,)) for num in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # only one saw version 1
+        assert len(results) == 1
+        rec = phibes_file.read(pth)
+        assert rec['version'] == 2
+        assert rec['body'] == f"writer {results[0]}".encode()
+
+    @pytest.mark.positive
+    def test_concurrent_creates(self, tmp_path):
+        pth = tmp_path / "item.cry"
+        created = []
+
+        def creator(num: int):
+            try:
+                phibes_file.write(pth, body=f"{num}".encode(), **self.fields)
+                created.append(num)
+            except FileExistsError:
+                pass
+
+        threads = [
+            threading.Thread(target=creator, args=(num,)) for num in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(created) == 1
+        assert phibes_file.read(pth)['body'] == f"{created[0]}".encode()
+
+    @pytest.mark.positive
+    def test_create_without_hard_links(self, tmp_path, monkeypatch):
+        def no_link(*args, **kwargs):
+            raise PermissionError("no hard links here")
+
+        monkeypatch.setattr(phibes_file.os, 'link', no_link)
+        pth = tmp_path / "item.cry"
+        assert phibes_file.write(pth, body=b"one", **self.fields) == 1
+        assert phibes_file.read(pth)['body'] == b"one"
+        with pytest.raises(FileExistsError):
+            phibes_file.write(pth, body=b"two", **self.fields)
+        assert phibes_file.read(pth)['body'] == b"one"
+        assert not list(tmp_path.glob(f"*{phibes_file.TEMP_SUFFIX}"))
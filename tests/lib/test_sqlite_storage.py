@@ -0,0 +1,197 @@
+"""
+pytest module for storage.sqlite_storage
+"""
+
+# Standard library imports
+import sqlite3
+import threading
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib.errors import PhibesExistsError, PhibesNotFoundError
+from phibes.model import Locker
+from phibes.storage import sqlite_storage
+from phibes.storage.sqlite_storage import SqliteStorage
+from phibes.storage.types import StoreType
+
+# Local test imports
+from tests.lib import test_locker
+from tests.lib.test_helpers import PopulatedLocker
+
+
+class TestSqliteItemStuff(test_locker.TestItemStuff):
+    store_type = StoreType.Sqlite
+
+
+class TestSqliteStreaming(test_locker.TestStreaming):
+    store_type = StoreType.Sqlite
+
+    @pytest.mark.skipif(
+        not hasattr(sqlite3.Connection, 'blobopen'),
+        reason="bodies are held whole without incremental blob I/O"
+    )
+    @pytest.mark.positive
+    def test_constant_memory(self, tmp_path, setup_and_teardown):
+        super(TestSqliteStreaming, self).test_constant_memory(
+            tmp_path, setup_and_teardown
+        )
+
+
+class TestSqliteReadRange(test_locker.TestReadRange):
+    store_type = StoreType.Sqlite
+
+
+class TestSqlite(PopulatedLocker):
+
+    store_type = StoreType.Sqlite
+
+    def storage(self, lck: Locker) -> SqliteStorage:
+        return lck.data_model.storage
+
+    @pytest.mark.positive
+    def test_one_store_file(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        assert storage.connection.execute(
+            "PRAGMA journal_mode"
+        ).fetchone()[0] == 'wal'
+        assert storage.connection.execute(
+            "SELECT count(*) FROM lockers"
+        ).fetchone()[0] == len(self.lockers) + 1
+        assert not [pth for pth in self.test_path.iterdir() if pth.is_dir()]
+
+    @pytest.mark.positive
+    def test_update_delete(self, setup_and_teardown):
+        for lck in list(self.lockers.values()) + [self.my_locker]:
+            for num in range(10):
+                item = lck.create_item(f"item{num}")
+                item.content = f"body{num}"
+                lck.add_item(item)
+            with pytest.raises(PhibesExistsError):
+                lck.add_item(item)
+            for num in range(0, 10, 2):
+                item = lck.get_item(f"item{num}")
+                item.content = "changed"
+                lck.update_item(item)
+            for num in range(1, 10, 2):
+                lck.delete_item(f"item{num}")
+            with pytest.raises(PhibesNotFoundError):
+                lck.get_item("item1")
+            with pytest.raises(PhibesNotFoundError):
+                lck.delete_item("item1")
+            item = lck.create_item("item1")
+            item.content = "gone"
+            with pytest.raises(PhibesNotFoundError):
+                lck.update_item(item)
+            assert sorted(item.name for item in lck.list_items()) == sorted(
+                [f"item{num}" for num in range(0, 10, 2)]
+                + [self.common_item_name]
+            )
+            assert lck.get_item("item4").content == "changed"
+            assert lck.append_item("item4", "!") == len("changed!")
+            assert lck.get_item("item4").content == "changed!"
+
+    @pytest.mark.positive
+    def test_transaction(self, setup_and_teardown):
+        commits = []
+        self.storage(self.my_locker).connection.set_trace_callback(
+            lambda statement: commits.append(statement)
+            if statement == 'COMMIT' else None
+        )
+        try:
+            with self.my_locker.transaction():
+                for num in range(20):
+                    item = self.my_locker.create_item(f"batch{num}")
+                    item.content = f"body{num}"
+                    self.my_locker.add_item(item)
+        finally:
+            self.storage(self.my_locker).connection.set_trace_callback(None)
+        assert len(commits) == 1
+        assert len(self.my_locker.list_items()) == 21
+
+    @pytest.mark.negative
+    def test_transaction_rollback(self, setup_and_teardown):
+        with pytest.raises(PhibesExistsError):
+            with self.my_locker.transaction():
+                item = self.my_locker.create_item("batched")
+                item.content = "body"
+                self.my_locker.add_item(item)
+                self.my_locker.add_item(item)
+        with pytest.raises(PhibesNotFoundError):
+            self.my_locker.get_item("batched")
+
+    @pytest.mark.positive
+    def test_readers_not_blocked(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        found = []
+
+        def read():
+            # another thread has a connection of its own
+            found.append(
+                sorted(SqliteStorage(
+                    locker_id=storage.locker_id, store_path=self.test_path
+                ).list_items())
+            )
+
+        with self.my_locker.transaction():
+            item = self.my_locker.create_item("uncommitted")
+            item.content = "body"
+            self.my_locker.add_item(item)
+            reader = threading.Thread(target=read)
+            reader.start()
+            reader.join(timeout=10)
+        assert found == [sorted(
+            [self.my_locker.crypt_impl.encrypt(self.common_item_name)]
+        )]
+        assert len(self.my_locker.list_items()) == 2
+
+    @pytest.mark.positive
+    def test_connections_closed(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        conn = storage.connection
+        storage.close()
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        # connected again when next needed
+        assert storage.connection is not conn
+        assert self.my_locker.list_item_names() == [self.common_item_name]
+        ended = threading.Thread(target=storage.list_items)
+        ended.start()
+        ended.join()
+        assert sqlite_storage.close_connections(stale=True) == 1
+        assert sqlite_storage.close_connections(stale=True) == 0
+
+    @pytest.mark.negative
+    def test_delete_locker(self, setup_and_teardown):
+        storage = self.storage(self.my_locker)
+        Locker.delete(self.password, self.locker_name)
+        with pytest.raises(PhibesNotFoundError):
+            Locker.get(self.password, self.locker_name)
+        assert not storage.connection.execute(
+            "SELECT count(*) FROM items WHERE locker_id = ?", (storage.key,)
+        ).fetchone()[0]
+
+
+class TestSqliteSchema(object):
+
+    @pytest.mark.positive
+    def test_versions_added(self, tmp_path):
+        # a database from before items were versioned
+        storage = SqliteStorage(locker_id="locker", store_path=tmp_path)
+        conn = sqlite3.connect(str(storage.db_path))
+        conn.execute(
+            "CREATE TABLE items (locker_id TEXT NOT NULL,"
+            " item_id TEXT NOT NULL, salt TEXT NOT NULL,"
+            " crypt_id TEXT NOT NULL, timestamp TEXT NOT NULL,"
+            " body BLOB NOT NULL, PRIMARY KEY (locker_id, item_id))"
+        )
+        conn.execute(
+            "INSERT INTO items VALUES"
+            " ('locker', 'item', 'salt', 'crypt_id', 'ts', x'00')"
+        )
+        conn.commit()
+        conn.close()
+        assert storage.get_item("item")['version'] == 0
+        rec = dict(storage.get_item("item"), _ciphertext=b"\x01")
+        assert storage.save_item("item", rec, replace=True) == 1
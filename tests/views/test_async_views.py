@@ -0,0 +1,153 @@
+"""
+pytest module for lib.async_views
+"""
+
+# Standard library imports
+import asyncio
+import threading
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib import async_views, views
+from phibes.lib.errors import PhibesError, PhibesNotFoundError
+from phibes.storage import async_storage
+
+# Local test imports
+from tests.lib.test_helpers import count_key_derivations, PopulatedLocker
+
+
+class TestAsyncViews(PopulatedLocker):
+    """
+    Test the async view functions & AsyncLockerSession
+    """
+
+    @pytest.mark.positive
+    def test_views(self, setup_and_teardown):
+        async def views():
+            found = await async_views.get_item(
+                password=self.password,
+                locker_name=self.locker_name,
+                item_name=self.common_item_name
+            )
+            assert found['body'] == self.content
+            created = await async_views.create_item(
+                self.password, self.locker_name, "new", "new body"
+            )
+            assert created['body'] == "new body"
+            await async_views.update_item(
+                self.password, self.locker_name, "new", "changed"
+            )
+            assert sorted(await async_views.get_item_names(
+                self.password, self.locker_name
+            )) == sorted(["new", self.common_item_name])
+            assert len(await async_views.get_items(
+                self.password, self.locker_name
+            )) == 2
+            await async_views.delete_item(
+                self.password, self.locker_name, "new"
+            )
+            with pytest.raises(PhibesNotFoundError):
+                await async_views.get_item(
+                    self.password, self.locker_name, "new"
+                )
+            assert (await async_views.get_locker(
+                self.password, self.locker_name
+            ))['crypt_id']
+
+        asyncio.run(views())
+
+    @pytest.mark.positive
+    def test_loop_not_blocked(self, setup_and_teardown):
+        ticks = []
+
+        async def ticker(done: asyncio.Event):
+            while not done.is_set():
+                ticks.append(1)
+                await asyncio.sleep(0.001)
+
+        async def unlock_all():
+            done = asyncio.Event()
+            ticking = asyncio.ensure_future(ticker(done))
+            names = list(self.lockers.keys()) + [self.locker_name]
+            found = await asyncio.gather(*[
+                async_views.get_item(
+                    self.password, name, self.common_item_name
+                )
+                for name in names
+            ])
+            done.set()
+            await ticking
+            return found
+
+        found = asyncio.run(unlock_all())
+        assert all(item['body'] == self.content for item in found)
+        # the loop ran while the lockers were unlocked
+        assert len(ticks) > 1
+
+    @pytest.mark.positive
+    def test_unlocks_apart_from_io(self, monkeypatch, setup_and_teardown):
+        release = threading.Event()
+        open_locker = views.open_locker
+        unlocked_in = []
+
+        def slow_unlock(**kwargs):
+            unlocked_in.append(threading.current_thread().name)
+            release.wait(5)
+            return open_locker(**kwargs)
+
+        monkeypatch.setattr(views, 'open_locker', slow_unlock)
+
+        async def unlocks_and_io():
+            lck = await async_views.open_locker(
+                self.password, self.locker_name
+            )
+            release.clear()
+            unlocking = [
+                asyncio.ensure_future(async_views.get_item(
+                    self.password, self.locker_name, self.common_item_name
+                ))
+                for _ in range(async_storage.DEFAULT_MAX_WORKERS)
+            ]
+            # while every unlock waits, I/O goes ahead
+            found = await asyncio.wait_for(async_views.get_item(
+                self.password, self.locker_name, self.common_item_name,
+                locker_inst=lck
+            ), 2)
+            release.set()
+            return [found] + await asyncio.gather(*unlocking)
+
+        release.set()
+        found = asyncio.run(unlocks_and_io())
+        assert all(item['body'] == self.content for item in found)
+        assert all(name.startswith("phibes-kdf") for name in unlocked_in)
+
+    @pytest.mark.positive
+    def test_session_one_unlock(self, monkeypatch, setup_and_teardown):
+        derivations = count_key_derivations(monkeypatch)
+
+        async def session_ops():
+            session = await async_views.AsyncLockerSession.open(
+                self.password, self.locker_name
+            )
+            async with session:
+                await asyncio.gather(*[
+                    session.create_item(f"item{num}", f"body{num}")
+                    for num in range(5)
+                ])
+                assert await session.append_item("item1", " more") == len(
+                    "body1 more"
+                )
+                assert (await session.get_item("item1"))['body'] == (
+                    "body1 more"
+                )
+                assert await session.read_item_range("item1", 1, 3) == b"ody"
+                assert len(await session.list_item_names()) == 6
+                await session.delete_item("item0")
+                assert len(await session.list_items()) == 5
+            with pytest.raises(PhibesError):
+                await session.get_item("item1")
+
+        asyncio.run(session_ops())
+        assert len(derivations) == 1
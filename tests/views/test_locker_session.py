@@ -0,0 +1,70 @@
+"""
+pytest module for views.LockerSession
+"""
+
+# Standard library imports
+
+# Related third party imports
+import pytest
+
+# Local application/library specific imports
+from phibes.lib.errors import PhibesError, PhibesNotFoundError
+from phibes.lib.views import LockerSession
+
+# Local test imports
+from tests.lib.test_helpers import count_key_derivations, PopulatedLocker
+
+
+class TestLockerSession(PopulatedLocker):
+    """
+    Test the LockerSession view class
+    """
+
+    @pytest.mark.positive
+    def test_many_ops_one_unlock(self, monkeypatch, setup_and_teardown):
+        for locker_name in list(self.lockers.keys()) + [self.locker_name]:
+            derivations = count_key_derivations(monkeypatch)
+            with LockerSession(self.password, locker_name) as session:
+                for num in range(20):
+                    created = session.create_item(f"item{num}", f"body{num}")
+                    assert created['body'] == f"body{num}"
+                for num in range(0, 20, 2):
+                    updated = session.update_item(f"item{num}", "changed")
+                    assert updated['body'] == "changed"
+                for num in range(1, 20, 2):
+                    session.delete_item(f"item{num}")
+                found = session.get_item("item4")
+                assert found['body'] == "changed"
+                assert found['name'] == "item4"
+                # the 10 remaining plus the common item
+                assert len(session.list_items()) == 11
+                assert session.get_locker()['crypt_id']
+            assert len(derivations) == 1
+            monkeypatch.undo()
+
+    @pytest.mark.positive
+    def test_bytes_content(self, setup_and_teardown):
+        content = bytes(range(256)) * 16
+        for locker_name in list(self.lockers.keys()) + [self.locker_name]:
+            with LockerSession(self.password, locker_name) as session:
+                assert session.create_item("binary", content)['body'] is None
+                assert session.get_item_bytes("binary") == content
+                session.update_item("binary", content[::-1])
+                assert session.get_item_bytes("binary") == content[::-1]
+                # text items are bytes too
+                assert session.get_item_bytes(self.common_item_name) == (
+                    self.content.encode('utf-8')
+                )
+
+    @pytest.mark.negative
+    def test_closed(self, setup_and_teardown):
+        with LockerSession(self.password, self.locker_name) as session:
+            assert session.get_item(self.common_item_name)
+        with pytest.raises(PhibesError):
+            session.get_item(self.common_item_name)
+
+    @pytest.mark.negative
+    def test_missing_item(self, setup_and_teardown):
+        with LockerSession(self.password, self.locker_name) as session:
+            with pytest.raises(PhibesNotFoundError):
+                session.get_item("never")